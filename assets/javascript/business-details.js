@@ -41,6 +41,45 @@ import debounce from "lodash.debounce";
       .then((response) => response.json())
       .then(({ results }) => results);
   };
+
+  const canStream =
+    typeof ReadableStream !== "undefined" &&
+    typeof TextDecoder !== "undefined";
+
+  // Each line of the streamed response is a batch of results, these are passed
+  // to onResults as they arrive so the first matches can be shown whilst the
+  // rest are still being fetched
+  const streamCompanies = (query, onResults) => {
+    const url = `/api/company-search/?q=${query}&stream=1`;
+
+    return fetch(url).then((response) => {
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let companies = [];
+      let buffer = "";
+
+      const read = () =>
+        reader.read().then(({ done, value }) => {
+          if (done) {
+            onResults(companies);
+            return companies;
+          }
+          buffer += decoder.decode(value, { stream: true });
+          const lines = buffer.split("\n");
+          buffer = lines.pop();
+          const batches = lines.filter((line) => line);
+          if (batches.length) {
+            batches.forEach((line) => {
+              companies = companies.concat(JSON.parse(line).results);
+            });
+            onResults(companies);
+          }
+          return read();
+        });
+
+      return read();
+    });
+  };
   const getInputValue = (selected) => {
     if (typeof selected == "string") {
       return selected;
@@ -76,6 +115,14 @@ import debounce from "lodash.debounce";
 
   const searchCompanies = (query, populateResults) => {
     currentSearch = query;
+    if (canStream) {
+      streamCompanies(query, (companies) => {
+        if (currentSearch == query) {
+          populateResults(companies);
+        }
+      });
+      return;
+    }
     fetchCompanies(query).then((companies) => {
       if (currentSearch == query) {
         populateResults(companies);
@@ -0,0 +1,98 @@
+"""Measures the throughput of the company search endpoint.
+
+Start the server the same way as production, either the current gevent WSGI
+setup:
+
+    gunicorn export_support.wsgi:application --worker-class=gevent \
+        --worker-connections=1000 --workers=1 --bind=127.0.0.1:8000
+
+or over ASGI:
+
+    gunicorn export_support.asgi:application \
+        --worker-class=uvicorn.workers.UvicornWorker --workers=1 --bind=127.0.0.1:8000
+
+and then run this against the matching endpoint, for example:
+
+    python benchmarks/company_search_throughput.py \
+        http://127.0.0.1:8000/api/company-search/ --requests=2000 --concurrency=500
+    python benchmarks/company_search_throughput.py \
+        http://127.0.0.1:8000/api/company-search/async/ --requests=2000 --concurrency=500
+
+Setting COMPANIES_HOUSE_SEARCH_CACHE_TTL=0 makes every request go to Companies
+House, which is the case the async view is designed for.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+QUERIES = [
+    "acme",
+    "tesco",
+    "rolls royce",
+    "british",
+    "london",
+    "global trading",
+    "engineering",
+    "consulting",
+]
+
+
+async def _request(client, url, query, latencies, errors):
+    start = time.perf_counter()
+    try:
+        response = await client.get(url, params={"q": query})
+        response.raise_for_status()
+    except httpx.HTTPError:
+        errors.append(query)
+        return
+    latencies.append(time.perf_counter() - start)
+
+
+async def run(url, num_requests, concurrency):
+    latencies = []
+    errors = []
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+
+        async def _limited_request(i):
+            async with semaphore:
+                query = QUERIES[i % len(QUERIES)]
+                await _request(client, url, query, latencies, errors)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(_limited_request(i) for i in range(num_requests)))
+        elapsed = time.perf_counter() - start
+
+    return elapsed, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("url")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    elapsed, latencies, errors = asyncio.run(
+        run(args.url, args.requests, args.concurrency)
+    )
+
+    print(f"{args.url}")
+    print(f"  requests:    {args.requests} ({len(errors)} failed)")
+    print(f"  concurrency: {args.concurrency}")
+    print(f"  throughput:  {len(latencies) / elapsed:.1f} requests/s")
+    if latencies:
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(f"  p50 latency: {quantiles[49] * 1000:.1f}ms")
+        print(f"  p95 latency: {quantiles[94] * 1000:.1f}ms")
+        print(f"  p99 latency: {quantiles[98] * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
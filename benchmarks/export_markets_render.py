@@ -0,0 +1,95 @@
+"""Measures how long the export markets checkboxes take to render with the
+template rendered for every request compared with the widget's fast path and
+the prerendered widget.
+
+Run it with the same environment as the project, for example:
+
+    DJANGO_SETTINGS_MODULE=export_support.settings.local \
+        python benchmarks/export_markets_render.py --iterations=200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _time_renders(form_class, data, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        form = form_class(data, prefix="export-markets")
+        str(form["markets"])
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _report(name, timings):
+    print(
+        f"{name}: mean {statistics.mean(timings) * 1000:.2f}ms "
+        f"p95 {statistics.quantiles(timings, n=20)[-1] * 1000:.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "export_support.settings.local")
+    django.setup()
+
+    from export_support.core.consts import MARKETS_MAP
+    from export_support.core.forms import ExportMarketsForm
+    from export_support.gds import fields as gds_fields
+
+    class TemplateCheckboxSelectMultiple(gds_fields.CheckboxSelectMultiple):
+        fast_template_name = None
+
+    def with_widget(widget_class):
+        class Form(ExportMarketsForm):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.fields["markets"].widget = widget_class(
+                    choices=self.fields["markets"].choices
+                )
+
+        return Form
+
+    TemplateExportMarketsForm = with_widget(TemplateCheckboxSelectMultiple)
+    FastExportMarketsForm = with_widget(gds_fields.CheckboxSelectMultiple)
+
+    markets = list(MARKETS_MAP)
+    cases = {
+        "nothing selected": {},
+        "some markets selected": {"export-markets-markets": markets[::10]},
+        "every market selected": {"export-markets-markets": markets},
+    }
+
+    print(f"{len(markets)} markets, {args.iterations} renders each")
+    for case, data in cases.items():
+        print(case)
+        _report(
+            "  template",
+            _time_renders(TemplateExportMarketsForm, data, args.iterations),
+        )
+        _report(
+            "  fast path",
+            _time_renders(FastExportMarketsForm, data, args.iterations),
+        )
+        # the first render prerenders the fragments so isn't included
+        _time_renders(ExportMarketsForm, data, 1)
+        _report(
+            "  prerendered",
+            _time_renders(ExportMarketsForm, data, args.iterations),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Measures how long a fresh process takes to load
+`export_support.wsgi:application` and to serve its first response, with a
+breakdown of the time spent importing the slowest packages.
+
+Each run starts a new interpreter with `-X importtime`, for example:
+
+    DJANGO_SETTINGS_MODULE=export_support.settings.local \
+        python benchmarks/startup_profile.py --runs=5 --output=startup.json
+
+The results can be saved and compared with those from another commit:
+
+    python benchmarks/startup_profile.py --baseline=startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# The imports worth tracking between commits, each includes everything it
+# imports that isn't already imported
+IMPORT_GROUPS = [
+    "django",
+    "sentry_sdk",
+    "directory_forms_api_client",
+    "formtools",
+    "export_support.settings",
+    "export_support.core.markets_data",
+    "export_support.core.forms",
+]
+
+NUM_SLOWEST_IMPORTS = 15
+
+# Runs in the new interpreter and prints its timings as JSON
+CHILD_SCRIPT = """
+import json
+import sys
+import time
+
+start = time.perf_counter()
+
+from export_support.wsgi import application
+
+loaded = time.perf_counter()
+
+from wsgiref.util import setup_testing_defaults
+
+environ = {"PATH_INFO": sys.argv[1], "HTTP_HOST": sys.argv[2]}
+setup_testing_defaults(environ)
+status = []
+response = application(environ, lambda s, headers, exc_info=None: status.append(s))
+b"".join(response)
+response.close()
+
+responded = time.perf_counter()
+
+print(json.dumps({
+    "status": status[0],
+    "load_application": (loaded - start) * 1000,
+    "first_response": (responded - loaded) * 1000,
+}))
+"""
+
+
+def _parse_import_times(stderr):
+    # Each line is "import time: self [us] | cumulative | imported package",
+    # with the package indented by how deeply it was imported. Packages are
+    # listed after everything they import, so reading them backwards lists
+    # each package before the packages it imported.
+    prefix = "import time:"
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith(prefix) or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix(prefix).split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return imports
+
+
+def _in_group(name, group):
+    return name == group or name.startswith(f"{group}.")
+
+
+def _get_group_times(imports):
+    group_times = {group: 0 for group in IMPORT_GROUPS}
+    ancestors = []
+    for name, depth, _, cumulative_us in reversed(imports):
+        ancestors = ancestors[:depth]
+        for group in IMPORT_GROUPS:
+            # only count the outermost import so nothing is counted twice
+            if _in_group(name, group) and not any(
+                _in_group(ancestor, group) for ancestor in ancestors
+            ):
+                group_times[group] += cumulative_us / 1000
+        ancestors.append(name)
+    return group_times
+
+
+def _run(settings_module, path, host):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module)
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_SCRIPT, path, host],
+        capture_output=True,
+        check=True,
+        cwd=ROOT_DIR,
+        env=env,
+        text=True,
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process"] = elapsed
+    return timings, _parse_import_times(result.stderr)
+
+
+def profile(settings_module, path, host, runs):
+    timings = []
+    group_times = []
+    self_times = {}
+    for _ in range(runs):
+        run_timings, imports = _run(settings_module, path, host)
+        timings.append(run_timings)
+        group_times.append(_get_group_times(imports))
+        for name, _, self_us, _ in imports:
+            self_times.setdefault(name, []).append(self_us / 1000)
+
+    slowest_imports = sorted(
+        ((name, statistics.median(times)) for name, times in self_times.items()),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:NUM_SLOWEST_IMPORTS]
+
+    return {
+        "settings_module": settings_module,
+        "python": platform.python_version(),
+        "path": path,
+        "status": timings[-1]["status"],
+        "runs": runs,
+        "timings": {
+            key: statistics.median(run_timings[key] for run_timings in timings)
+            for key in ["process", "load_application", "first_response"]
+        },
+        "imports": {
+            group: statistics.median(times[group] for times in group_times)
+            for group in IMPORT_GROUPS
+        },
+        "slowest_imports": dict(slowest_imports),
+    }
+
+
+def _report_section(title, results, baseline):
+    print(title)
+    for name, value in results.items():
+        line = f"  {name}: {value:.1f}ms"
+        if baseline and name in baseline:
+            difference = value - baseline[name]
+            line += f" ({difference:+.1f}ms against {baseline[name]:.1f}ms)"
+        print(line)
+
+
+def report(results, baseline=None):
+    baseline = baseline or {}
+    print(
+        f"{results['settings_module']} on Python {results['python']}, "
+        f"median of {results['runs']} runs, "
+        f"{results['path']} returned {results['status']}"
+    )
+    _report_section("startup", results["timings"], baseline.get("timings"))
+    _report_section("imports", results["imports"], baseline.get("imports"))
+    _report_section(
+        "slowest imports (excluding what they import)",
+        results["slowest_imports"],
+        baseline.get("slowest_imports"),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/", help="The path of the first request")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--output", help="Path to save the results to as JSON")
+    parser.add_argument("--baseline", help="Path to results to compare with")
+    args = parser.parse_args()
+
+    settings_module = os.environ.get(
+        "DJANGO_SETTINGS_MODULE", "export_support.settings.local"
+    )
+    results = profile(settings_module, args.path, args.host, args.runs)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    report(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=4)
+
+
+if __name__ == "__main__":
+    main()
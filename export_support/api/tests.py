@@ -16,3 +16,40 @@ def test_companies_search(client, mocker):
     response = client.get(f"{url}?q=test")
     mock_search_companies.assert_called_with("test")
     assert response.json() == {"results": {"testing": [1, 2, 3]}}
+
+
+def test_async_companies_search(client, mocker):
+    mock_search_companies_async = mocker.patch(
+        "export_support.api.views.search_companies_async",
+        new_callable=mocker.AsyncMock,
+    )
+    url = reverse("api:company-search-async")
+
+    response = client.get(url)
+    mock_search_companies_async.assert_not_called()
+    assert response.json() == {"results": {}}
+
+    mock_search_companies_async.return_value = [{"name": "testing"}]
+    response = client.get(f"{url}?q=test")
+    mock_search_companies_async.assert_awaited_with("test", shared_client=False)
+    assert response.json() == {"results": [{"name": "testing"}]}
+
+
+def test_companies_search_stream(client, mocker):
+    mock_iter_search_companies = mocker.patch(
+        "export_support.api.views.iter_search_companies"
+    )
+    mock_iter_search_companies.return_value = iter(
+        [[{"name": "first"}], [{"name": "second"}, {"name": "third"}]]
+    )
+    url = reverse("api:company-search")
+
+    response = client.get(f"{url}?q=test&stream=1")
+
+    assert response.streaming
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert b"".join(response.streaming_content) == (
+        b'{"results": [{"name": "first"}]}\n'
+        b'{"results": [{"name": "second"}, {"name": "third"}]}\n'
+    )
+    mock_iter_search_companies.assert_called_with("test")
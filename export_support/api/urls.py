@@ -6,4 +6,9 @@ app_name = "api"
 
 urlpatterns = [
     path("company-search/", views.CompaniesSearchView.as_view(), name="company-search"),
+    path(
+        "company-search/async/",
+        views.AsyncCompaniesSearchView.as_view(),
+        name="company-search-async",
+    ),
 ]
@@ -1,12 +1,29 @@
-from django.http import JsonResponse
+import json
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views import View
 
-from export_support.companies.search import search_companies
+from export_support.companies.async_search import search_companies_async
+from export_support.companies.search import iter_search_companies, search_companies
+
+
+def _stream_results(query):
+    for results in iter_search_companies(query):
+        yield json.dumps({"results": results}) + "\n"
 
 
 class CompaniesSearchView(View):
     def get(self, request):
         query = request.GET.get("q")
+        if query and request.GET.get("stream") == "1":
+            # Each batch of results is a line of JSON, sent as soon as its
+            # page has been fetched so that the first matches can be shown
+            return StreamingHttpResponse(
+                _stream_results(query),
+                content_type="application/x-ndjson",
+            )
+
         if query:
             results = search_companies(request.GET.get("q"))
         else:
@@ -17,3 +34,25 @@ class CompaniesSearchView(View):
                 "results": results,
             }
         )
+
+
+class AsyncCompaniesSearchView(View):
+    """Async version of `CompaniesSearchView` for when the project is served
+    over ASGI, so waiting on Companies House doesn't hold up a worker.
+    """
+
+    async def get(self, request):
+        query = request.GET.get("q")
+        if query:
+            # Only the ASGI event loop lives long enough to pool connections
+            results = await search_companies_async(
+                query, shared_client=isinstance(request, ASGIRequest)
+            )
+        else:
+            results = {}
+
+        return JsonResponse(
+            {
+                "results": results,
+            }
+        )
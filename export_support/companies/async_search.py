@@ -0,0 +1,136 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .cache import get_fresh_results, normalise_query, store_results
+from .circuit_breaker import (
+    CircuitOpenError,
+    before_request,
+    record_failure,
+    record_success,
+    release_probe,
+)
+from .search import (
+    DESIRED_NUM_RESULTS,
+    ITEMS_PER_PAGE,
+    SEARCH_URL,
+    TOKEN,
+    _filter_results,
+    _search_snapshot,
+    rank_results,
+)
+
+# Connections can only be used by the event loop that opened them, so the
+# shared clients are kept per loop. Served over ASGI there is one loop, and so
+# one pooled client, per worker.
+_shared_clients = {}
+
+
+def _create_client():
+    return httpx.AsyncClient(
+        headers={"Authorization": f"Basic {TOKEN}"},
+        limits=httpx.Limits(
+            max_connections=settings.COMPANIES_HOUSE_POOL_MAXSIZE,
+            max_keepalive_connections=settings.COMPANIES_HOUSE_POOL_MAXSIZE,
+        ),
+        timeout=httpx.Timeout(
+            settings.COMPANIES_HOUSE_READ_TIMEOUT,
+            connect=settings.COMPANIES_HOUSE_CONNECT_TIMEOUT,
+        ),
+    )
+
+
+@asynccontextmanager
+async def _get_client(shared):
+    """Yields the client shared by the requests handled by the running event
+    loop, or if not `shared` a client that is closed afterwards.
+
+    Under WSGI each call to an async view runs in a new loop that is closed
+    when it returns, so its connections can't be pooled or closed later.
+    """
+    if not shared:
+        async with _create_client() as client:
+            yield client
+        return
+
+    loop = asyncio.get_running_loop()
+    if loop not in _shared_clients:
+        _shared_clients[loop] = _create_client()
+    yield _shared_clients[loop]
+
+
+async def _fetch_page(client, query, page):
+    url = SEARCH_URL.format(query=query, start_index=page * ITEMS_PER_PAGE)
+
+    is_probe = await sync_to_async(before_request)()
+    try:
+        response = await client.get(url)
+        if response.status_code >= 500:
+            response.raise_for_status()
+        items = response.json()["items"]
+    except httpx.HTTPError:
+        await sync_to_async(record_failure)(is_probe)
+        raise
+    except BaseException:
+        await sync_to_async(release_probe)(is_probe)
+        raise
+    await sync_to_async(record_success)(is_probe)
+
+    return items
+
+
+async def _search_companies_house_async(client, query):
+    items = []
+    is_complete = False
+    seen = set()
+
+    for page in range(settings.COMPANIES_HOUSE_SEARCH_MAX_PAGES):
+        results = await _fetch_page(client, query, page)
+        for item in _filter_results(results):
+            if item["companyNumber"] not in seen:
+                seen.add(item["companyNumber"])
+                items.append(item)
+        is_complete = len(results) < ITEMS_PER_PAGE
+
+        if len(items) >= DESIRED_NUM_RESULTS:
+            break
+
+        if is_complete:
+            break
+
+    return items, is_complete
+
+
+async def search_companies_async(query, shared_client=False):
+    """Searches like `search_companies` except that requests to Companies
+    House don't block the event loop.
+
+    Connections to Companies House are only pooled across searches with
+    `shared_client`, which should only be set when served over ASGI.
+
+    Only fresh cached results are used, without the stale results, coalescing
+    of concurrent misses or prefix reuse of `get_cached_results`. The cache
+    and snapshot index are read through their synchronous clients in a thread.
+    """
+    query = normalise_query(query)
+
+    if settings.COMPANIES_HOUSE_SEARCH_BACKEND == "snapshot":
+        items = await sync_to_async(_search_snapshot)(query)
+        if items is not None:
+            return rank_results(query, items)
+
+    items = await sync_to_async(get_fresh_results)(query)
+    if items is not None:
+        return rank_results(query, items)
+
+    try:
+        async with _get_client(shared_client) as client:
+            items, is_complete = await _search_companies_house_async(client, query)
+    except CircuitOpenError:
+        return []
+    await sync_to_async(store_results)(query, items, is_complete)
+
+    return rank_results(query, items)
@@ -0,0 +1,354 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+from .circuit_breaker import CircuitOpenError
+from .single_flight import single_flight, single_flight_iter
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "company-search"
+FETCH_LOCK_POLL_INTERVAL = 0.05
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+# The typeahead doesn't search for anything shorter than this
+MIN_PREFIX_LENGTH = 3
+
+STATS = ("hit", "stale_hit", "miss", "prefix_hit", "prefix_miss")
+
+
+def normalise_query(query):
+    return " ".join(query.lower().split())
+
+
+def _get_key(*parts):
+    return ":".join([CACHE_KEY_PREFIX, *parts])
+
+
+def _get_query_key(name, query):
+    # Queries are user input so they are hashed to give a predictable key
+    digest = hashlib.sha256(query.encode("utf-8")).hexdigest()
+    return _get_key(name, digest)
+
+
+def _increment(stat):
+    key = _get_key("stats", stat)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def get_stats():
+    keys = {stat: _get_key("stats", stat) for stat in STATS}
+    values = cache.get_many(keys.values())
+    return {stat: values.get(key, 0) for stat, key in keys.items()}
+
+
+def _get_fresh_timeout(items):
+    if not items:
+        return settings.COMPANIES_HOUSE_SEARCH_NEGATIVE_CACHE_TTL
+    return settings.COMPANIES_HOUSE_SEARCH_CACHE_TTL
+
+
+def _is_fresh(entry):
+    age = time.time() - entry["fetched_at"]
+    return age < _get_fresh_timeout(entry["items"])
+
+
+def store_results(query, items, is_complete):
+    if not settings.COMPANIES_HOUSE_SEARCH_CACHE_TTL:
+        return
+
+    entry = {
+        "items": items,
+        "is_complete": is_complete,
+        "fetched_at": time.time(),
+    }
+    # Entries are kept beyond their fresh lifetime so that they can still be
+    # served whilst a replacement is fetched in the background
+    timeout = (
+        _get_fresh_timeout(items) + settings.COMPANIES_HOUSE_SEARCH_CACHE_STALE_TTL
+    )
+    cache.set(_get_query_key("results", query), entry, timeout=timeout)
+
+
+def _get_lock_timeout():
+    # Long enough for the slowest fetch, which times out on every page
+    return settings.COMPANIES_HOUSE_SEARCH_MAX_PAGES * (
+        settings.COMPANIES_HOUSE_CONNECT_TIMEOUT + settings.COMPANIES_HOUSE_READ_TIMEOUT
+    )
+
+
+def _acquire_lock(name, query):
+    """Returns a token for releasing the lock, or `None` if another worker
+    holds it.
+    """
+    token = uuid.uuid4().hex
+    if cache.add(_get_query_key(name, query), token, timeout=_get_lock_timeout()):
+        return token
+    return None
+
+
+def _release_lock(name, query, token):
+    # Only releases the lock if it is still ours, it may have expired and been
+    # taken by another worker. This is checked and deleted in one step so that
+    # it can't expire in between.
+    release = get_redis_connection("default").register_script(RELEASE_LOCK_SCRIPT)
+    release(
+        keys=[cache.client.make_key(_get_query_key(name, query))],
+        args=[cache.client.encode(token)],
+    )
+
+
+def _fetch_and_store(query, fetch):
+    items, is_complete = fetch(query)
+    store_results(query, items, is_complete)
+    return items
+
+
+def _get_cached_entry(query):
+    return cache.get(_get_query_key("results", query))
+
+
+def _wait_for_cached_entry(query):
+    deadline = time.monotonic() + settings.COMPANIES_HOUSE_SEARCH_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(FETCH_LOCK_POLL_INTERVAL)
+        entry = _get_cached_entry(query)
+        if entry is not None:
+            return entry
+    return None
+
+
+def _fetch_and_store_once(query, fetch):
+    """Fetches and caches the results for `query` with only one worker doing
+    this at a time, the other workers wait for the results to be cached.
+
+    If the results don't appear in time then the waiting worker gives up and
+    fetches them itself.
+    """
+    token = _acquire_lock("fetching", query)
+    if token is None:
+        entry = _wait_for_cached_entry(query)
+        if entry is not None:
+            return entry["items"]
+        return _fetch_and_store(query, fetch)
+
+    try:
+        # Another worker may have stored the results between our cache miss
+        # and taking the lock
+        entry = _get_cached_entry(query)
+        if entry is not None:
+            return entry["items"]
+        return _fetch_and_store(query, fetch)
+    finally:
+        _release_lock("fetching", query, token)
+
+
+def _get_words(value):
+    if not value:
+        return []
+    return re.findall(r"\w+", value.lower())
+
+
+def _matches_words(item, words):
+    item_words = _get_words(item["name"]) + _get_words(item["postcode"])
+    return all(
+        any(item_word.startswith(word) for item_word in item_words) for word in words
+    )
+
+
+def _get_prefixes(query):
+    words = query.split(" ")
+    prefixes = [" ".join(words[:i]) for i in range(len(words) - 1, 0, -1)]
+    return [prefix for prefix in prefixes if len(prefix) >= MIN_PREFIX_LENGTH]
+
+
+def _get_results_from_prefix(query):
+    """Returns the results for `query` by filtering the cached results of a
+    shorter query that it starts with, or `None` if there aren't any.
+
+    Only complete result sets can be used as a truncated one might not
+    include everything that the longer query would have found. The prefixes
+    are whole words so that Companies House has already matched those words
+    and only the extra words need to be matched here, against the words of
+    the company name or postcode like Companies House's title and address
+    matches.
+    """
+    prefixes = _get_prefixes(query)
+    if not prefixes:
+        return None
+
+    keys = {prefix: _get_query_key("results", prefix) for prefix in prefixes}
+    entries = cache.get_many(keys.values())
+
+    for prefix in prefixes:
+        entry = entries.get(keys[prefix])
+        if entry is None or not entry["is_complete"] or not _is_fresh(entry):
+            continue
+
+        words = _get_words(query.removeprefix(prefix))
+        return [item for item in entry["items"] if _matches_words(item, words)]
+
+    return None
+
+
+def _refresh(query, fetch, token):
+    try:
+        _fetch_and_store(query, fetch)
+    except CircuitOpenError:
+        # Expected whilst Companies House is unavailable, which the circuit
+        # opening has already been logged for
+        logger.info("Skipped refreshing company search results for %s", query)
+    except Exception:
+        logger.exception("Failed to refresh company search results for %s", query)
+    finally:
+        _release_lock("refreshing", query, token)
+
+
+def get_fresh_results(query):
+    """Returns the cached results for `query` if they are still fresh, without
+    fetching or refreshing anything.
+    """
+    if not settings.COMPANIES_HOUSE_SEARCH_CACHE_TTL:
+        return None
+
+    entry = _get_cached_entry(query)
+    if entry is None or not _is_fresh(entry):
+        _increment("miss")
+        return None
+
+    _increment("hit")
+    return entry["items"]
+
+
+def _run_in_background(func, *args):
+    thread = threading.Thread(target=func, args=args, daemon=True)
+    thread.start()
+
+
+def _get_cached_items(query, fetch):
+    """Returns the results for `query` from the cache, whether fresh, stale or
+    filtered from a shorter query's results, or `None` if there aren't any.
+    """
+    entry = _get_cached_entry(query)
+    if entry is None:
+        if settings.COMPANIES_HOUSE_SEARCH_INCREMENTAL:
+            items = _get_results_from_prefix(query)
+            if items is not None:
+                _increment("prefix_hit")
+                return items
+            _increment("prefix_miss")
+
+        _increment("miss")
+        return None
+
+    items = entry["items"]
+    if _is_fresh(entry):
+        _increment("hit")
+        return items
+
+    _increment("stale_hit")
+    token = _acquire_lock("refreshing", query)
+    if token is not None:
+        _run_in_background(_refresh, query, fetch, token)
+
+    return items
+
+
+def get_cached_results(query, fetch):
+    """Returns the results for `query` from the cache, calling `fetch` to get
+    them if they haven't been cached.
+
+    Results that are past their TTL are still returned but are refreshed in
+    the background, with only one worker doing the refresh at a time.
+
+    Concurrent misses for the same query are coalesced into a single call to
+    `fetch`, both between greenlets in this worker and across workers.
+
+    `fetch` returns the results and whether they are complete, in incremental
+    mode complete results are reused to answer longer queries.
+    """
+    if not settings.COMPANIES_HOUSE_SEARCH_CACHE_TTL:
+        items, _ = single_flight(query, lambda: fetch(query))
+        return items
+
+    items = _get_cached_items(query, fetch)
+    if items is not None:
+        return items
+
+    return single_flight(query, lambda: _fetch_and_store_once(query, fetch))
+
+
+def _iter_fetch(query, iter_fetch, store):
+    items = []
+    is_complete = False
+    for page_items, is_complete in iter_fetch(query):
+        if page_items:
+            yield page_items
+        items += page_items
+
+    if store:
+        store_results(query, items, is_complete)
+
+
+def _iter_fetch_and_store_once(query, iter_fetch):
+    # The same as `_fetch_and_store_once` except that the worker fetching the
+    # results yields them as they are fetched
+    token = _acquire_lock("fetching", query)
+    if token is None:
+        entry = _wait_for_cached_entry(query)
+        if entry is not None:
+            yield entry["items"]
+            return
+        yield from _iter_fetch(query, iter_fetch, store=True)
+        return
+
+    try:
+        entry = _get_cached_entry(query)
+        if entry is not None:
+            yield entry["items"]
+            return
+        yield from _iter_fetch(query, iter_fetch, store=True)
+    finally:
+        _release_lock("fetching", query, token)
+
+
+def iter_cached_results(query, fetch, iter_fetch):
+    """Yields the results for `query` in batches, otherwise the same as
+    `get_cached_results`.
+
+    Cached results are yielded in one batch. On a miss `iter_fetch` yields the
+    results of each page along with whether they are complete so far, and
+    these are yielded as they are fetched by the one greenlet and worker
+    fetching them. Any others searching for the same query at the same time
+    wait for them and yield them afterwards.
+    """
+    key = ("stream", query)
+    if not settings.COMPANIES_HOUSE_SEARCH_CACHE_TTL:
+        yield from single_flight_iter(
+            key, lambda: _iter_fetch(query, iter_fetch, store=False)
+        )
+        return
+
+    items = _get_cached_items(query, fetch)
+    if items is not None:
+        yield items
+        return
+
+    yield from single_flight_iter(
+        key, lambda: _iter_fetch_and_store_once(query, iter_fetch)
+    )
@@ -0,0 +1,141 @@
+import logging
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "companies-house-circuit"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+def _get_key(name):
+    return f"{CACHE_KEY_PREFIX}:{name}"
+
+
+def _get_probe_timeout():
+    return (
+        settings.COMPANIES_HOUSE_CONNECT_TIMEOUT + settings.COMPANIES_HOUSE_READ_TIMEOUT
+    )
+
+
+def _open():
+    cache.set(_get_key("opened_at"), time.time(), timeout=None)
+    cache.delete(_get_key("probe"))
+    logger.warning("Companies House circuit opened")
+
+
+def _close():
+    cache.delete_many([_get_key("opened_at"), _get_key("failures"), _get_key("probe")])
+    logger.info("Companies House circuit closed")
+
+
+def _get_opened_at():
+    return cache.get(_get_key("opened_at"))
+
+
+def get_state():
+    """Returns the state of the circuit shared by every worker.
+
+    The circuit opens once there have been enough failures within the failure
+    window, and after the reset timeout it is half-open where one request at a
+    time is let through to probe whether Companies House has recovered.
+    """
+    if not settings.COMPANIES_HOUSE_CIRCUIT_FAILURE_THRESHOLD:
+        return CLOSED
+
+    opened_at = _get_opened_at()
+    if opened_at is None:
+        return CLOSED
+
+    if time.time() - opened_at < settings.COMPANIES_HOUSE_CIRCUIT_RESET_TIMEOUT:
+        return OPEN
+
+    return HALF_OPEN
+
+
+def before_request():
+    """Raises `CircuitOpenError` if a request to Companies House shouldn't be
+    made, otherwise returns whether the request is the half-open probe.
+    """
+    state = get_state()
+    if state == CLOSED:
+        return False
+
+    if state == HALF_OPEN and cache.add(
+        _get_key("probe"), True, timeout=_get_probe_timeout()
+    ):
+        return True
+
+    raise CircuitOpenError("Companies House circuit is open")
+
+
+def record_success(is_probe):
+    if is_probe:
+        _close()
+
+
+def record_failure(is_probe):
+    if not settings.COMPANIES_HOUSE_CIRCUIT_FAILURE_THRESHOLD:
+        return
+
+    if is_probe:
+        _open()
+        return
+
+    key = _get_key("failures")
+    cache.add(key, 0, timeout=settings.COMPANIES_HOUSE_CIRCUIT_FAILURE_WINDOW)
+    try:
+        failures = cache.incr(key)
+    except ValueError:
+        # The failure window expired between adding and incrementing the key
+        cache.add(key, 1, timeout=settings.COMPANIES_HOUSE_CIRCUIT_FAILURE_WINDOW)
+        failures = 1
+
+    if failures >= settings.COMPANIES_HOUSE_CIRCUIT_FAILURE_THRESHOLD:
+        if _get_opened_at() is None:
+            _open()
+
+
+def release_probe(is_probe):
+    # Anything other than the errors of a request isn't a sign that Companies
+    # House is unavailable but the probe still needs to be given up so that
+    # another request can probe
+    if is_probe:
+        cache.delete(_get_key("probe"))
+
+
+@contextmanager
+def circuit_breaker(*errors):
+    """Runs the block as a request to Companies House, raising
+    `CircuitOpenError` straight away instead if the circuit is open.
+
+    Any of `errors` raised by the block count as a failure.
+    """
+    is_probe = before_request()
+    try:
+        yield
+    except errors:
+        record_failure(is_probe)
+        raise
+    except BaseException:
+        release_probe(is_probe)
+        raise
+    record_success(is_probe)
+
+
+def get_circuit_stats():
+    return {
+        "state": get_state(),
+        "failures": cache.get(_get_key("failures"), 0),
+        "opened_at": _get_opened_at(),
+    }
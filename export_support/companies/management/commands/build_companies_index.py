@@ -0,0 +1,117 @@
+import csv
+import io
+import os
+import sqlite3
+import time
+import zipfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from export_support.companies.snapshot import create_index
+
+BATCH_SIZE = 10000
+
+
+@contextmanager
+def _open_csv(path):
+    # Companies House publishes the basic company data as a zipped CSV, the
+    # member is streamed straight out of the archive rather than extracted
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            csv_names = [name for name in archive.namelist() if name.endswith(".csv")]
+            if not csv_names:
+                raise CommandError(f"No CSV file found in {path}")
+            with io.TextIOWrapper(
+                archive.open(csv_names[0]), encoding="utf-8-sig"
+            ) as csv_file:
+                yield csv_file
+        return
+
+    with open(path, encoding="utf-8-sig", newline="") as csv_file:
+        yield csv_file
+
+
+def _iter_active_companies(csv_file):
+    reader = csv.reader(csv_file)
+    # some of the headers in the Companies House file have leading spaces
+    headers = [header.strip() for header in next(reader)]
+    try:
+        name_index = headers.index("CompanyName")
+        number_index = headers.index("CompanyNumber")
+        status_index = headers.index("CompanyStatus")
+        postcode_index = headers.index("RegAddress.PostCode")
+    except ValueError as e:
+        raise CommandError(f"Unexpected basic company data headers: {e}") from e
+
+    for row in reader:
+        # statuses such as "Active - Proposal to Strike off" are still active
+        if not row[status_index].startswith("Active"):
+            continue
+        yield row[name_index], row[postcode_index], row[number_index]
+
+
+class Command(BaseCommand):
+    help = "Builds the local search index from the Companies House basic company data"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="Path to the basic company data CSV, or the zip file it is published in",
+        )
+        parser.add_argument(
+            "--output",
+            default=settings.COMPANIES_HOUSE_SNAPSHOT_PATH,
+            help="Path to write the index to",
+        )
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        output = options["output"]
+
+        # The index is built alongside the existing one and then swapped in so
+        # that running workers never see a partially built index
+        tmp_output = f"{output}.tmp"
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        if os.path.exists(tmp_output):
+            os.remove(tmp_output)
+
+        connection = sqlite3.connect(tmp_output)
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        create_index(connection)
+
+        num_companies = 0
+        with _open_csv(options["path"]) as csv_file:
+            companies = _iter_active_companies(csv_file)
+            while True:
+                batch = [company for _, company in zip(range(BATCH_SIZE), companies)]
+                if not batch:
+                    break
+                connection.executemany(
+                    "INSERT INTO companies (name, postcode, company_number) VALUES (?, ?, ?)",
+                    batch,
+                )
+                num_companies += len(batch)
+
+        connection.execute(
+            "INSERT INTO companies (companies) VALUES ('optimize')",
+        )
+        connection.executemany(
+            "INSERT INTO metadata (key, value) VALUES (?, ?)",
+            [
+                ("source", os.path.basename(options["path"])),
+                ("built_at", str(int(time.time()))),
+                ("num_companies", str(num_companies)),
+            ],
+        )
+        connection.commit()
+        connection.close()
+
+        os.replace(tmp_output, output)
+
+        self.stdout.write(
+            f"Indexed {num_companies} active companies to {output} "
+            f"in {time.monotonic() - start:.1f}s"
+        )
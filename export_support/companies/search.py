@@ -1,11 +1,21 @@
 import base64
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 
 import requests
 from django.conf import settings
 
+from export_support.core.http import create_pooled_session, get_pool_stats
+
+from .cache import _get_words, get_cached_results, iter_cached_results, normalise_query
+from .circuit_breaker import CircuitOpenError, circuit_breaker
+from .snapshot import SnapshotUnavailableError, search_snapshot
+
+logger = logging.getLogger(__name__)
+
 ITEMS_PER_PAGE = 20
 DESIRED_NUM_RESULTS = 20
-MAX_PAGE_SEARCH_ATTEMPTS = 5
 
 SEARCH_URL = "https://api.companieshouse.gov.uk/search/companies?q={}&items_per_page={}&start_index={}".format(
     "{query}",
@@ -14,11 +24,26 @@ SEARCH_URL = "https://api.companieshouse.gov.uk/search/companies?q={}&items_per_
 )
 TOKEN = base64.b64encode(bytes(settings.COMPANIES_HOUSE_TOKEN, "utf-8")).decode("utf-8")
 
+# Shared by every request in the worker so that each search reuses an already
+# established connection to Companies House rather than doing a new handshake.
+session = create_pooled_session(
+    pool_maxsize=settings.COMPANIES_HOUSE_POOL_MAXSIZE,
+    pool_block=settings.COMPANIES_HOUSE_POOL_BLOCK,
+)
+
+
+def get_session_stats():
+    return get_pool_stats(session)
+
 
 def _search_companies_house_api(query, start_index):
     headers = {"Authorization": f"Basic {TOKEN}"}
     url = SEARCH_URL.format(query=query, start_index=start_index)
-    return requests.get(url, headers=headers)
+    timeout = (
+        settings.COMPANIES_HOUSE_CONNECT_TIMEOUT,
+        settings.COMPANIES_HOUSE_READ_TIMEOUT,
+    )
+    return session.get(url, headers=headers, timeout=timeout)
 
 
 def _get_result(item):
@@ -45,23 +70,199 @@ def _exclude_snippet_results(items):
     ]
 
 
-def search_companies(query):
+def _filter_results(results):
+    filtered_items = _filter_active_companies(results)
+    filtered_items = _exclude_snippet_results(filtered_items)
+    return [_get_result(item) for item in filtered_items]
+
+
+def _fetch_page(query, page):
+    with circuit_breaker(requests.exceptions.RequestException):
+        response = _search_companies_house_api(query, page * ITEMS_PER_PAGE)
+        if response.status_code >= 500:
+            response.raise_for_status()
+    return response.json()["items"]
+
+
+def _iter_pages(query):
+    for page in range(settings.COMPANIES_HOUSE_SEARCH_MAX_PAGES):
+        yield _fetch_page(query, page)
+
+
+def _iter_pages_concurrently(query, concurrency):
+    """Yields the raw results for each page in order whilst fetching up to
+    `concurrency` pages ahead of the page being consumed.
+
+    Closing the generator cancels any requests that haven't been started and
+    the responses of any that are already in flight are ignored.
+    """
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        futures = [
+            executor.submit(_fetch_page, query, page)
+            for page in range(settings.COMPANIES_HOUSE_SEARCH_MAX_PAGES)
+        ]
+        for future in futures:
+            yield future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _iter_search_pages(query):
+    """Yields the filtered results of each page for `query` as they are
+    fetched, along with whether they are all of the matching results
+    Companies House has so far, stopping once there are enough results.
+    """
+    concurrency = settings.COMPANIES_HOUSE_PAGE_FETCH_CONCURRENCY
+    if concurrency > 1:
+        pages = _iter_pages_concurrently(query, concurrency)
+    else:
+        pages = _iter_pages(query)
+
+    num_items = 0
+    seen = set()
+
+    with closing(pages):
+        for results in pages:
+            # Results move between pages if the index changes whilst paginating
+            # so the same company can be on more than one page
+            items = []
+            for item in _filter_results(results):
+                if item["companyNumber"] not in seen:
+                    seen.add(item["companyNumber"])
+                    items.append(item)
+            is_complete = len(results) < ITEMS_PER_PAGE
+            yield items, is_complete
+
+            num_items += len(items)
+            if num_items >= DESIRED_NUM_RESULTS:
+                break
+
+            if is_complete:
+                break
+
+
+def _search_companies_house(query):
+    """Returns the filtered results for `query` along with whether they are
+    all of the matching results Companies House has, rather than having been
+    cut short at the desired number of results or maximum number of pages.
+    """
     items = []
+    is_complete = False
 
-    for attempt in range(MAX_PAGE_SEARCH_ATTEMPTS):
-        response = _search_companies_house_api(query, attempt * ITEMS_PER_PAGE)
-        results = response.json()["items"]
+    for page_items, is_complete in _iter_search_pages(query):
+        items += page_items
 
-        filtered_items = _filter_active_companies(results)
-        filtered_items = _exclude_snippet_results(filtered_items)
-        filtered_items = [_get_result(item) for item in filtered_items]
+    return items, is_complete
 
-        items += filtered_items
 
-        if len(items) >= DESIRED_NUM_RESULTS:
-            break
+def _search_snapshot(query):
+    try:
+        items, _ = search_snapshot(query, DESIRED_NUM_RESULTS)
+    except SnapshotUnavailableError:
+        if not settings.COMPANIES_HOUSE_SNAPSHOT_API_FALLBACK:
+            raise
+        logger.exception("Companies snapshot unavailable, searching the API")
+        return None
 
-        if len(results) < ITEMS_PER_PAGE:
-            break
+    # The snapshot is only updated periodically so it won't have companies
+    # that have been incorporated since
+    if not items and settings.COMPANIES_HOUSE_SNAPSHOT_API_FALLBACK:
+        return None
 
     return items
+
+
+def _get_rank(query, item):
+    """Returns how well `item` matches `query`, lower is better.
+
+    Names that are the query come first, followed by names starting with it,
+    then names with words starting with each of the query's words and lastly
+    everything else, such as address matches. Within those, results whose
+    postcode matches more of the query's words come first.
+    """
+    name = normalise_query(item["name"])
+    words = _get_words(query)
+    name_words = _get_words(name)
+    postcode_words = _get_words(item["postcode"])
+
+    postcode_matches = sum(
+        any(postcode_word.startswith(word) for postcode_word in postcode_words)
+        for word in words
+    )
+
+    if name == query:
+        rank = 0
+    elif name.startswith(query):
+        rank = 1
+    elif all(
+        any(name_word.startswith(word) for name_word in name_words + postcode_words)
+        for word in words
+    ):
+        rank = 2
+    else:
+        rank = 3
+
+    return rank, -postcode_matches
+
+
+def rank_results(query, items):
+    """Returns the best `DESIRED_NUM_RESULTS` of `items` for `query`, keeping
+    Companies House's order for results that match equally well.
+    """
+    ranked = sorted(items, key=lambda item: _get_rank(query, item))
+    return ranked[:DESIRED_NUM_RESULTS]
+
+
+def search_companies(query):
+    query = normalise_query(query)
+
+    if settings.COMPANIES_HOUSE_SEARCH_BACKEND == "snapshot":
+        items = _search_snapshot(query)
+        if items is not None:
+            return rank_results(query, items)
+
+    try:
+        items = get_cached_results(query, _search_companies_house)
+    except CircuitOpenError:
+        # Cached results are still served whilst the circuit is open, this is
+        # only reached when there aren't any
+        return []
+
+    # The full results are cached so that they can be filtered for longer
+    # queries and only ranked and cut down when they are returned
+    return rank_results(query, items)
+
+
+def iter_search_companies(query):
+    """Yields the results for `query` in batches as each page is fetched from
+    Companies House, rather than waiting for all of them.
+
+    Results from the snapshot index or the cache are yielded in one batch.
+    Each batch is ranked, and no more than `DESIRED_NUM_RESULTS` are yielded
+    altogether.
+    """
+    query = normalise_query(query)
+
+    if settings.COMPANIES_HOUSE_SEARCH_BACKEND == "snapshot":
+        items = _search_snapshot(query)
+        if items is not None:
+            yield rank_results(query, items)
+            return
+
+    num_results = 0
+    try:
+        # Every batch is read, rather than stopping once there are enough
+        # results, as they are only cached after the last page is fetched
+        for items in iter_cached_results(
+            query, _search_companies_house, _iter_search_pages
+        ):
+            remaining = DESIRED_NUM_RESULTS - num_results
+            results = rank_results(query, items)[:remaining]
+            if results:
+                yield results
+                num_results += len(results)
+    except CircuitOpenError:
+        # As with `search_companies` this is only reached when there aren't
+        # any cached results
+        return
@@ -0,0 +1,85 @@
+import threading
+
+_lock = threading.Lock()
+_in_flight = {}
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exception = None
+
+
+def single_flight(key, func):
+    """Calls `func` and returns its result, unless there is already a call in
+    progress for `key` in which case this waits for that call to finish and
+    returns its result instead.
+
+    Under gevent these are greenlet primitives so waiting only blocks the
+    greenlet that is waiting and not the whole worker.
+    """
+    with _lock:
+        call = _in_flight.get(key)
+        is_leader = call is None
+        if is_leader:
+            call = _Call()
+            _in_flight[key] = call
+
+    if not is_leader:
+        call.done.wait()
+        if call.exception:
+            raise call.exception
+        return call.result
+
+    try:
+        call.result = func()
+    except Exception as e:
+        call.exception = e
+        raise
+    finally:
+        with _lock:
+            del _in_flight[key]
+        call.done.set()
+
+    return call.result
+
+
+def single_flight_iter(key, func):
+    """Yields the items of the iterable returned by `func`, unless there is
+    already a call in progress for `key` in which case this waits for that
+    call to finish and then yields the same items.
+
+    If the caller of the call in progress stops before it has every item
+    then the waiting callers call `func` themselves.
+    """
+    with _lock:
+        call = _in_flight.get(key)
+        is_leader = call is None
+        if is_leader:
+            call = _Call()
+            _in_flight[key] = call
+
+    if not is_leader:
+        call.done.wait()
+        if call.exception:
+            raise call.exception
+        if call.result is None:
+            yield from func()
+        else:
+            yield from call.result
+        return
+
+    items = []
+    try:
+        for item in func():
+            items.append(item)
+            yield item
+        call.result = items
+    except Exception as e:
+        call.exception = e
+        raise
+    finally:
+        with _lock:
+            del _in_flight[key]
+        call.done.set()
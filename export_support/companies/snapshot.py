@@ -0,0 +1,106 @@
+import os
+import re
+import sqlite3
+import threading
+
+from django.conf import settings
+
+# One read-only connection is shared by every thread and greenlet in the
+# process, so searches take turns with it
+_lock = threading.Lock()
+_connection = None
+_connection_key = None
+
+
+class SnapshotUnavailableError(Exception):
+    pass
+
+
+def create_index(connection):
+    connection.executescript(
+        """
+        CREATE VIRTUAL TABLE companies USING fts5(
+            name,
+            postcode,
+            company_number UNINDEXED,
+            tokenize = "unicode61 remove_diacritics 2",
+            prefix = "1 2 3"
+        );
+        CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT);
+        """
+    )
+
+
+def _get_connection(path):
+    """Returns the process's connection to the index at `path`, which must
+    only be used whilst holding `_lock`.
+    """
+    global _connection, _connection_key
+
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError as e:
+        raise SnapshotUnavailableError(f"No companies snapshot at {path}") from e
+
+    # The index is replaced wholesale when it is rebuilt so the connection is
+    # reopened when the file changes. A connection inherited from the parent
+    # process mustn't be used or closed in a forked worker.
+    connection_key = (path, mtime, os.getpid())
+    if _connection_key != connection_key:
+        if _connection is not None and _connection_key[2] == os.getpid():
+            _connection.close()
+        _connection = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False
+        )
+        _connection.execute("PRAGMA mmap_size = 268435456")
+        _connection_key = connection_key
+
+    return _connection
+
+
+def _get_match_expression(query):
+    # Each word is quoted so user input can't be interpreted as FTS syntax and
+    # the trailing * makes it a prefix search for typeahead
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_snapshot(query, limit):
+    """Searches the local Companies House snapshot index for active companies
+    matching every word in `query` by name or postcode.
+
+    Returns the results in the same format as the live search along with
+    whether they are all of the matching companies.
+    """
+    match_expression = _get_match_expression(query)
+    if not match_expression:
+        return [], True
+
+    try:
+        with _lock:
+            connection = _get_connection(settings.COMPANIES_HOUSE_SNAPSHOT_PATH)
+            rows = connection.execute(
+                """
+            SELECT name, postcode, company_number
+            FROM companies
+            WHERE companies MATCH ?
+            ORDER BY rank
+            LIMIT ?
+            """,
+                (match_expression, limit + 1),
+            ).fetchall()
+    except sqlite3.DatabaseError as e:
+        raise SnapshotUnavailableError(
+            "Companies snapshot could not be searched"
+        ) from e
+
+    items = [
+        {
+            "name": name,
+            "postcode": postcode or None,
+            "companyNumber": company_number,
+        }
+        for name, postcode, company_number in rows[:limit]
+    ]
+
+    return items, len(rows) <= limit
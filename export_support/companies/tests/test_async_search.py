@@ -0,0 +1,193 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.urls import reverse
+
+from export_support.companies.async_search import (
+    _shared_clients,
+    search_companies_async,
+)
+from export_support.companies.circuit_breaker import CircuitOpenError, _get_key
+
+
+def _get_result(title, company_status="active"):
+    return {
+        "title": title,
+        "address": {"postal_code": "SW1A 1AA"},
+        "company_number": title,
+        "company_status": company_status,
+        "matches": ["title"],
+    }
+
+
+@pytest.fixture
+def companies_house(mocker):
+    pages = {}
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        start_index = request.url.params["start_index"]
+        return httpx.Response(200, json={"items": pages.get(start_index, [])})
+
+    mocker.patch(
+        "export_support.companies.async_search._create_client",
+        side_effect=lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+    return pages, requests
+
+
+def test_search_companies_async(companies_house):
+    pages, requests = companies_house
+    pages["0"] = [_get_result("ACME LTD"), _get_result("OLD LTD", "dissolved")]
+
+    items = async_to_sync(search_companies_async)(" ACME ")
+
+    assert items == [
+        {"name": "ACME LTD", "postcode": "SW1A 1AA", "companyNumber": "ACME LTD"},
+    ]
+    assert len(requests) == 1
+    assert requests[0].url.params["q"] == "acme"
+
+
+def test_search_companies_async_pages(companies_house):
+    pages, requests = companies_house
+    pages["0"] = [_get_result(f"ACME {i}") for i in range(10)] + [
+        _get_result(f"OLD {i}", "dissolved") for i in range(10)
+    ]
+    pages["20"] = [_get_result(f"ACME {i}") for i in range(10, 20)] + [
+        _get_result(f"OLD {i}", "dissolved") for i in range(10, 20)
+    ]
+
+    items = async_to_sync(search_companies_async)("acme")
+
+    assert [item["name"] for item in items] == [f"ACME {i}" for i in range(20)]
+    assert [request.url.params["start_index"] for request in requests] == ["0", "20"]
+
+
+def test_search_companies_async_cached(companies_house, settings):
+    settings.COMPANIES_HOUSE_SEARCH_CACHE_TTL = 60
+    cache.clear()
+    pages, requests = companies_house
+    pages["0"] = [_get_result("ACME LTD")]
+
+    first = async_to_sync(search_companies_async)("acme")
+    second = async_to_sync(search_companies_async)("acme")
+
+    assert first == second
+    assert len(requests) == 1
+    cache.clear()
+
+
+def test_search_companies_async_circuit_open(companies_house, mocker):
+    pages, requests = companies_house
+    mocker.patch(
+        "export_support.companies.async_search.before_request",
+        side_effect=CircuitOpenError(),
+    )
+
+    assert async_to_sync(search_companies_async)("acme") == []
+    assert requests == []
+
+
+def test_search_companies_async_releases_probe(mocker):
+    def handler(request):
+        return httpx.Response(200, content=b"not json")
+
+    mocker.patch(
+        "export_support.companies.async_search._create_client",
+        side_effect=lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    mocker.patch(
+        "export_support.companies.async_search.before_request", return_value=True
+    )
+    mock_record_success = mocker.patch(
+        "export_support.companies.async_search.record_success"
+    )
+    cache.set(_get_key("probe"), True)
+
+    with pytest.raises(ValueError):
+        async_to_sync(search_companies_async)("acme")
+
+    # another request can probe Companies House
+    assert cache.get(_get_key("probe")) is None
+    mock_record_success.assert_not_called()
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+        body = json.dumps({"items": [_get_result("ACME LTD")]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def keep_alive_server(mocker):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    # the handlers wait on the kept alive connections until they are closed
+    server.daemon_threads = True
+    server.block_on_close = False
+    server.connections = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    mocker.patch(
+        "export_support.companies.async_search.SEARCH_URL",
+        f"http://127.0.0.1:{server.server_port}/search/companies"
+        "?q={query}&start_index={start_index}",
+    )
+    _shared_clients.clear()
+    yield server
+    _shared_clients.clear()
+    server.shutdown()
+    server.server_close()
+
+
+def test_search_companies_async_shared_client(keep_alive_server):
+    async def search_twice():
+        try:
+            return [
+                await search_companies_async(query, shared_client=True)
+                for query in ["acme", "acme ltd"]
+            ]
+        finally:
+            for client in _shared_clients.values():
+                await client.aclose()
+
+    results = async_to_sync(search_twice)()
+
+    assert (
+        results
+        == [[{"name": "ACME LTD", "postcode": "SW1A 1AA", "companyNumber": "ACME LTD"}]]
+        * 2
+    )
+    assert len(_shared_clients) == 1
+    # the second search reused the connection kept alive by the first
+    assert len(keep_alive_server.connections) == 1
+
+
+def test_async_companies_search_view_closes_clients(client, keep_alive_server):
+    # Under WSGI each request runs the async view in a new event loop, which
+    # can't use the connections pooled by the previous one, so they are closed
+    url = reverse("api:company-search-async")
+
+    for query in ["acme", "acme ltd"]:
+        response = client.get(url, {"q": query})
+        assert response.status_code == 200
+        assert [item["name"] for item in response.json()["results"]] == ["ACME LTD"]
+
+    assert _shared_clients == {}
+    assert len(keep_alive_server.connections) == 2
@@ -0,0 +1,386 @@
+import logging
+
+import pytest
+from django.core.cache import cache
+from requests_mock import ANY as ANY_URL
+
+from export_support.companies.cache import (
+    _acquire_lock,
+    _fetch_and_store,
+    _get_lock_timeout,
+    _get_query_key,
+    _release_lock,
+    get_cached_results,
+    get_stats,
+    iter_cached_results,
+    normalise_query,
+)
+from export_support.companies.circuit_breaker import CircuitOpenError
+from export_support.companies.search import search_companies
+
+
+@pytest.fixture(autouse=True)
+def companies_search_cache(settings):
+    settings.COMPANIES_HOUSE_SEARCH_CACHE_TTL = 60
+    settings.COMPANIES_HOUSE_SEARCH_NEGATIVE_CACHE_TTL = 10
+    settings.COMPANIES_HOUSE_SEARCH_CACHE_STALE_TTL = 60
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def mock_time(mocker):
+    mock_time = mocker.patch("export_support.companies.cache.time")
+    mock_time.time.return_value = 1000.0
+    return mock_time
+
+
+@pytest.fixture
+def run_in_foreground(mocker):
+    return mocker.patch(
+        "export_support.companies.cache._run_in_background",
+        side_effect=lambda func, *args: func(*args),
+    )
+
+
+def test_normalise_query():
+    assert normalise_query("test") == "test"
+    assert normalise_query("  Acme   Widgets LTD ") == "acme widgets ltd"
+
+
+def test_get_cached_results_miss_then_hit(mocker):
+    fetch = mocker.Mock(return_value=([{"name": "ACME"}], False))
+
+    assert get_cached_results("acme", fetch) == [{"name": "ACME"}]
+    assert get_cached_results("acme", fetch) == [{"name": "ACME"}]
+
+    fetch.assert_called_once_with("acme")
+    assert get_stats() == {
+        "hit": 1,
+        "stale_hit": 0,
+        "miss": 1,
+        "prefix_hit": 0,
+        "prefix_miss": 0,
+    }
+
+
+def test_get_cached_results_disabled(mocker, settings):
+    settings.COMPANIES_HOUSE_SEARCH_CACHE_TTL = 0
+    fetch = mocker.Mock(return_value=([], False))
+
+    get_cached_results("acme", fetch)
+    get_cached_results("acme", fetch)
+
+    assert fetch.call_count == 2
+    assert get_stats() == {
+        "hit": 0,
+        "stale_hit": 0,
+        "miss": 0,
+        "prefix_hit": 0,
+        "prefix_miss": 0,
+    }
+
+
+def test_get_cached_results_negative_ttl(mocker, mock_time, run_in_foreground):
+    fetch = mocker.Mock(return_value=([], False))
+
+    get_cached_results("acme", fetch)
+    mock_time.time.return_value += 9
+    get_cached_results("acme", fetch)
+    fetch.assert_called_once()
+
+    mock_time.time.return_value += 2
+    get_cached_results("acme", fetch)
+    assert fetch.call_count == 2
+
+
+def test_get_cached_results_stale_while_revalidate(
+    mocker, mock_time, run_in_foreground
+):
+    fetch = mocker.Mock(return_value=([{"name": "OLD"}], False))
+    assert get_cached_results("acme", fetch) == [{"name": "OLD"}]
+
+    mock_time.time.return_value += 61
+    fetch.return_value = ([{"name": "NEW"}], False)
+    assert get_cached_results("acme", fetch) == [{"name": "OLD"}]
+    run_in_foreground.assert_called_once()
+    assert fetch.call_count == 2
+
+    assert get_cached_results("acme", fetch) == [{"name": "NEW"}]
+    assert fetch.call_count == 2
+    assert get_stats() == {
+        "hit": 1,
+        "stale_hit": 1,
+        "miss": 1,
+        "prefix_hit": 0,
+        "prefix_miss": 0,
+    }
+
+
+def test_get_cached_results_single_background_refresh(mocker, mock_time):
+    mock_run_in_background = mocker.patch(
+        "export_support.companies.cache._run_in_background"
+    )
+    fetch = mocker.Mock(return_value=([{"name": "OLD"}], False))
+    get_cached_results("acme", fetch)
+
+    mock_time.time.return_value += 61
+    get_cached_results("acme", fetch)
+    get_cached_results("acme", fetch)
+
+    mock_run_in_background.assert_called_once()
+
+
+def test_get_cached_results_failed_refresh_keeps_stale_results(
+    mocker, mock_time, run_in_foreground
+):
+    fetch = mocker.Mock(return_value=([{"name": "OLD"}], False))
+    get_cached_results("acme", fetch)
+
+    mock_time.time.return_value += 61
+    fetch.side_effect = Exception("Companies House unavailable")
+    assert get_cached_results("acme", fetch) == [{"name": "OLD"}]
+    assert get_cached_results("acme", fetch) == [{"name": "OLD"}]
+
+
+def test_get_cached_results_refresh_circuit_open(
+    mocker, mock_time, run_in_foreground, caplog
+):
+    fetch = mocker.Mock(return_value=([{"name": "OLD"}], False))
+    get_cached_results("acme", fetch)
+
+    mock_time.time.return_value += 61
+    fetch.side_effect = CircuitOpenError()
+    with caplog.at_level(logging.INFO, logger="export_support.companies.cache"):
+        assert get_cached_results("acme", fetch) == [{"name": "OLD"}]
+
+    assert [record.levelno for record in caplog.records] == [logging.INFO]
+
+
+def test_get_cached_results_waits_for_other_worker(mocker):
+    # another worker holds the lock and stores its results whilst we wait
+    cache.add(_get_query_key("fetching", "acme"), True)
+    other_worker_fetch = mocker.Mock(return_value=([{"name": "ACME"}], False))
+    mocker.patch(
+        "export_support.companies.cache.time.sleep",
+        side_effect=lambda _: _fetch_and_store("acme", other_worker_fetch),
+    )
+    fetch = mocker.Mock(return_value=([{"name": "ACME"}], False))
+
+    assert get_cached_results("acme", fetch) == [{"name": "ACME"}]
+    fetch.assert_not_called()
+    other_worker_fetch.assert_called_once_with("acme")
+
+
+def test_get_cached_results_stops_waiting_for_other_worker(mocker, settings):
+    settings.COMPANIES_HOUSE_SEARCH_LOCK_WAIT = 0.1
+    cache.add(_get_query_key("fetching", "acme"), True)
+    fetch = mocker.Mock(return_value=([{"name": "ACME"}], False))
+
+    assert get_cached_results("acme", fetch) == [{"name": "ACME"}]
+    fetch.assert_called_once_with("acme")
+
+
+def test_get_cached_results_releases_fetch_lock(mocker):
+    fetch = mocker.Mock(side_effect=Exception("Companies House unavailable"))
+    with pytest.raises(Exception):
+        get_cached_results("acme", fetch)
+
+    assert cache.get(_get_query_key("fetching", "acme")) is None
+
+
+def test_get_cached_results_keeps_other_workers_fetch_lock(mocker):
+    # our lock expires mid-fetch and another worker takes it
+    def fetch(query):
+        cache.set(_get_query_key("fetching", query), "other-worker")
+        return [{"name": "ACME"}], False
+
+    assert get_cached_results("acme", fetch) == [{"name": "ACME"}]
+    assert cache.get(_get_query_key("fetching", "acme")) == "other-worker"
+
+
+def test_release_lock():
+    token = _acquire_lock("fetching", "acme")
+    assert _acquire_lock("fetching", "acme") is None
+
+    _release_lock("fetching", "acme", "another-token")
+    assert cache.get(_get_query_key("fetching", "acme")) == token
+
+    _release_lock("fetching", "acme", token)
+    assert cache.get(_get_query_key("fetching", "acme")) is None
+
+
+def test_get_lock_timeout(settings):
+    settings.COMPANIES_HOUSE_SEARCH_MAX_PAGES = 5
+    settings.COMPANIES_HOUSE_CONNECT_TIMEOUT = 3
+    settings.COMPANIES_HOUSE_READ_TIMEOUT = 5
+
+    assert _get_lock_timeout() == 40
+
+
+ACME_RESULTS = [
+    {"name": "ACME LTD", "postcode": "SW1A 1AA", "companyNumber": "1"},
+    {"name": "ACME ENGINEERING LTD", "postcode": "M1 1AA", "companyNumber": "2"},
+    {"name": "ACME ENERGY LIMITED", "postcode": None, "companyNumber": "3"},
+    {
+        "name": "THE ACME-ENTERPRISE COMPANY",
+        "postcode": "EN1 1AA",
+        "companyNumber": "4",
+    },
+]
+
+
+def test_get_cached_results_incremental(mocker, settings):
+    settings.COMPANIES_HOUSE_SEARCH_INCREMENTAL = True
+    fetch = mocker.Mock(return_value=(ACME_RESULTS, True))
+    get_cached_results("acme", fetch)
+
+    assert get_cached_results("acme e", fetch) == ACME_RESULTS[1:]
+    assert get_cached_results("acme en", fetch) == ACME_RESULTS[1:]
+    assert get_cached_results("acme eng", fetch) == ACME_RESULTS[1:2]
+    assert get_cached_results("acme ener ltd", fetch) == []
+    assert get_cached_results("acme sw1a", fetch) == ACME_RESULTS[:1]
+    fetch.assert_called_once_with("acme")
+
+    assert get_stats() == {
+        "hit": 0,
+        "stale_hit": 0,
+        "miss": 1,
+        "prefix_hit": 5,
+        "prefix_miss": 1,
+    }
+
+
+def test_get_cached_results_incremental_longest_prefix(mocker, settings):
+    settings.COMPANIES_HOUSE_SEARCH_INCREMENTAL = True
+    get_cached_results("acme", mocker.Mock(return_value=(ACME_RESULTS, True)))
+    get_cached_results(
+        "acme energy", mocker.Mock(return_value=(ACME_RESULTS[2:3], True))
+    )
+
+    fetch = mocker.Mock()
+    assert get_cached_results("acme energy l", fetch) == ACME_RESULTS[2:3]
+    fetch.assert_not_called()
+
+
+def test_get_cached_results_incremental_incomplete_prefix(mocker, settings):
+    settings.COMPANIES_HOUSE_SEARCH_INCREMENTAL = True
+    get_cached_results("acme", mocker.Mock(return_value=(ACME_RESULTS, False)))
+
+    fetch = mocker.Mock(return_value=(ACME_RESULTS[1:2], True))
+    assert get_cached_results("acme e", fetch) == ACME_RESULTS[1:2]
+    fetch.assert_called_once_with("acme e")
+
+
+def test_get_cached_results_incremental_partial_word_prefix(mocker, settings):
+    settings.COMPANIES_HOUSE_SEARCH_INCREMENTAL = True
+    get_cached_results("acm", mocker.Mock(return_value=([], True)))
+
+    fetch = mocker.Mock(return_value=(ACME_RESULTS, True))
+    assert get_cached_results("acme", fetch) == ACME_RESULTS
+    fetch.assert_called_once_with("acme")
+
+
+def test_get_cached_results_incremental_stale_prefix(mocker, mock_time, settings):
+    settings.COMPANIES_HOUSE_SEARCH_INCREMENTAL = True
+    get_cached_results("acme", mocker.Mock(return_value=(ACME_RESULTS, True)))
+    mock_time.time.return_value += 61
+
+    fetch = mocker.Mock(return_value=(ACME_RESULTS[1:2], True))
+    assert get_cached_results("acme e", fetch) == ACME_RESULTS[1:2]
+    fetch.assert_called_once_with("acme e")
+
+
+def test_get_cached_results_incremental_disabled(mocker):
+    get_cached_results("acme", mocker.Mock(return_value=(ACME_RESULTS, True)))
+
+    fetch = mocker.Mock(return_value=(ACME_RESULTS[1:2], True))
+    assert get_cached_results("acme e", fetch) == ACME_RESULTS[1:2]
+    fetch.assert_called_once_with("acme e")
+
+
+def _iter_pages(*pages):
+    return lambda query: iter(pages)
+
+
+def test_iter_cached_results_miss_then_hit(mocker):
+    fetch = mocker.Mock()
+    iter_fetch = mocker.Mock(
+        side_effect=_iter_pages(
+            ([{"name": "ACME"}], False), ([{"name": "ACME 2"}], True)
+        )
+    )
+
+    assert list(iter_cached_results("acme", fetch, iter_fetch)) == [
+        [{"name": "ACME"}],
+        [{"name": "ACME 2"}],
+    ]
+    assert list(iter_cached_results("acme", fetch, iter_fetch)) == [
+        [{"name": "ACME"}, {"name": "ACME 2"}]
+    ]
+    iter_fetch.assert_called_once_with("acme")
+    fetch.assert_not_called()
+    assert cache.get(_get_query_key("fetching", "acme")) is None
+
+
+def test_iter_cached_results_stale_while_revalidate(
+    mocker, mock_time, run_in_foreground
+):
+    fetch = mocker.Mock(return_value=([{"name": "NEW"}], False))
+    iter_fetch = mocker.Mock(side_effect=_iter_pages(([{"name": "OLD"}], False)))
+    list(iter_cached_results("acme", fetch, iter_fetch))
+
+    mock_time.time.return_value += 61
+    assert list(iter_cached_results("acme", fetch, iter_fetch)) == [[{"name": "OLD"}]]
+    fetch.assert_called_once_with("acme")
+    assert list(iter_cached_results("acme", fetch, iter_fetch)) == [[{"name": "NEW"}]]
+    iter_fetch.assert_called_once_with("acme")
+
+
+def test_iter_cached_results_incremental(mocker, settings):
+    settings.COMPANIES_HOUSE_SEARCH_INCREMENTAL = True
+    fetch = mocker.Mock(return_value=(ACME_RESULTS, True))
+    get_cached_results("acme", fetch)
+    iter_fetch = mocker.Mock()
+
+    assert list(iter_cached_results("acme eng", fetch, iter_fetch)) == [
+        ACME_RESULTS[1:2]
+    ]
+    iter_fetch.assert_not_called()
+
+
+def test_iter_cached_results_waits_for_other_worker(mocker):
+    cache.add(_get_query_key("fetching", "acme"), "other-worker")
+    other_worker_fetch = mocker.Mock(return_value=([{"name": "ACME"}], False))
+    mocker.patch(
+        "export_support.companies.cache.time.sleep",
+        side_effect=lambda _: _fetch_and_store("acme", other_worker_fetch),
+    )
+    iter_fetch = mocker.Mock()
+
+    assert list(iter_cached_results("acme", mocker.Mock(), iter_fetch)) == [
+        [{"name": "ACME"}]
+    ]
+    iter_fetch.assert_not_called()
+
+
+def test_search_companies_cached(requests_mock):
+    requests_mock.get(
+        ANY_URL,
+        json={
+            "items": [
+                {
+                    "title": "ACME LTD",
+                    "company_number": "12345",
+                    "company_status": "active",
+                    "matches": ["title"],
+                },
+            ],
+        },
+    )
+
+    expected = [{"name": "ACME LTD", "postcode": None, "companyNumber": "12345"}]
+    assert search_companies("acme") == expected
+    assert search_companies(" ACME ") == expected
+    assert requests_mock.call_count == 1
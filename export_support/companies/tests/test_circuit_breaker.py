@@ -0,0 +1,158 @@
+import pytest
+import requests
+from django.core.cache import cache
+from requests_mock import ANY as ANY_URL
+
+from export_support.companies.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitOpenError,
+    circuit_breaker,
+    get_circuit_stats,
+    get_state,
+)
+from export_support.companies.search import search_companies
+
+
+class CompaniesHouseError(Exception):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def companies_house_circuit(settings):
+    settings.COMPANIES_HOUSE_CIRCUIT_FAILURE_THRESHOLD = 2
+    settings.COMPANIES_HOUSE_CIRCUIT_FAILURE_WINDOW = 60
+    settings.COMPANIES_HOUSE_CIRCUIT_RESET_TIMEOUT = 30
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def mock_time(mocker):
+    mock_time = mocker.patch("export_support.companies.circuit_breaker.time")
+    mock_time.time.return_value = 1000.0
+    return mock_time
+
+
+def _fail():
+    with pytest.raises(CompaniesHouseError):
+        with circuit_breaker(CompaniesHouseError):
+            raise CompaniesHouseError()
+
+
+def _succeed():
+    with circuit_breaker(CompaniesHouseError):
+        pass
+
+
+def test_circuit_opens_after_failure_threshold(mock_time):
+    _fail()
+    assert get_state() == CLOSED
+
+    _fail()
+    assert get_state() == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        _succeed()
+
+
+def test_circuit_ignores_other_errors(mock_time):
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            with circuit_breaker(CompaniesHouseError):
+                raise ValueError()
+
+    assert get_state() == CLOSED
+
+
+def test_circuit_half_open_probe_success(mock_time):
+    _fail()
+    _fail()
+
+    mock_time.time.return_value += 30
+    assert get_state() == HALF_OPEN
+
+    with circuit_breaker(CompaniesHouseError):
+        # only the probe is let through whilst it is in progress
+        with pytest.raises(CircuitOpenError):
+            _succeed()
+
+    assert get_state() == CLOSED
+    assert get_circuit_stats() == {"state": CLOSED, "failures": 0, "opened_at": None}
+
+
+def test_circuit_half_open_probe_failure(mock_time):
+    _fail()
+    _fail()
+
+    mock_time.time.return_value += 30
+    _fail()
+    assert get_state() == OPEN
+    assert get_circuit_stats()["opened_at"] == 1030.0
+
+    with pytest.raises(CircuitOpenError):
+        _succeed()
+
+
+def test_circuit_disabled(settings):
+    settings.COMPANIES_HOUSE_CIRCUIT_FAILURE_THRESHOLD = 0
+
+    for _ in range(3):
+        _fail()
+
+    assert get_state() == CLOSED
+
+
+def test_search_companies_circuit_open(requests_mock):
+    requests_mock.get(ANY_URL, exc=requests.exceptions.ConnectTimeout)
+
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ConnectTimeout):
+            search_companies("acme")
+
+    assert search_companies("acme") == []
+    assert requests_mock.call_count == 2
+
+
+def test_search_companies_server_errors_open_circuit(requests_mock):
+    requests_mock.get(ANY_URL, status_code=503)
+
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.HTTPError):
+            search_companies("acme")
+
+    assert get_state() == OPEN
+
+
+def test_search_companies_circuit_open_serves_cached_results(
+    requests_mock, settings, mocker
+):
+    settings.COMPANIES_HOUSE_SEARCH_CACHE_TTL = 60
+    mocker.patch("export_support.companies.cache._run_in_background")
+    mock_cache_time = mocker.patch("export_support.companies.cache.time")
+    mock_cache_time.time.return_value = 1000.0
+    requests_mock.get(
+        ANY_URL,
+        json={
+            "items": [
+                {
+                    "title": "ACME LTD",
+                    "company_number": "12345",
+                    "company_status": "active",
+                    "matches": ["title"],
+                },
+            ],
+        },
+    )
+    expected = [{"name": "ACME LTD", "postcode": None, "companyNumber": "12345"}]
+    assert search_companies("acme") == expected
+
+    requests_mock.get(ANY_URL, exc=requests.exceptions.ConnectTimeout)
+    for query in ["acme e", "acme en"]:
+        with pytest.raises(requests.exceptions.ConnectTimeout):
+            search_companies(query)
+
+    mock_cache_time.time.return_value += 61
+    assert search_companies("acme") == expected
@@ -0,0 +1,576 @@
+from collections import namedtuple
+
+import pytest
+from django.core.cache import cache
+from faker import Faker
+from requests_mock import ANY as ANY_URL
+
+from export_support.companies.cache import store_results
+from export_support.companies.circuit_breaker import CircuitOpenError
+from export_support.companies.search import (
+    _search_companies_house,
+    get_session_stats,
+    iter_search_companies,
+    rank_results,
+    search_companies,
+    session,
+)
+
+fake = Faker()
+
+
+Company = namedtuple(
+    "Company",
+    [
+        "name",
+        "postal_code",
+        "company_number",
+        "company_status",
+        "matches",
+    ],
+)
+
+
+def _get_company(company_status="active", matches=None):
+    if matches is None:
+        matches = ["title"]
+    if matches is False:
+        matches = None
+    return Company(
+        name=fake.company(),
+        postal_code=fake.postcode(),
+        # results are deduplicated by company number so these must be unique
+        company_number=fake.unique.random_int(),
+        company_status=company_status,
+        matches=matches,
+    )
+
+
+def _to_result(company):
+    result = {
+        "title": company.name,
+        "address": {
+            "postal_code": company.postal_code,
+        },
+        "company_number": company.company_number,
+        "company_status": company.company_status,
+    }
+
+    if company.matches is not None:
+        result["matches"] = company.matches
+
+    return result
+
+
+def _to_results(companies):
+    return [_to_result(company) for company in companies]
+
+
+def _to_items(companies):
+    return [
+        {
+            "name": company.name,
+            "postcode": company.postal_code,
+            "companyNumber": company.company_number,
+        }
+        for company in companies
+    ]
+
+
+def test_search_companies_query(requests_mock):
+    requests_mock.get(
+        ANY_URL,
+        json={
+            "items": [],
+        },
+    )
+    search_companies("test")
+    assert (
+        requests_mock.last_request.url
+        == "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=0"
+    )
+
+    search_companies("another")
+    assert (
+        requests_mock.last_request.url
+        == "https://api.companieshouse.gov.uk/search/companies?q=another&items_per_page=20&start_index=0"
+    )
+
+
+def test_search_companies_timeout(requests_mock, settings):
+    settings.COMPANIES_HOUSE_CONNECT_TIMEOUT = 1
+    settings.COMPANIES_HOUSE_READ_TIMEOUT = 2
+    requests_mock.get(
+        ANY_URL,
+        json={
+            "items": [],
+        },
+    )
+    search_companies("test")
+    assert requests_mock.last_request.timeout == (1, 2)
+
+
+def test_search_companies_session_stats():
+    adapter = session.get_adapter("https://api.companieshouse.gov.uk")
+    adapter.poolmanager.connection_from_url("https://api.companieshouse.gov.uk")
+
+    stats = get_session_stats()
+    assert {
+        "scheme": "https",
+        "host": "api.companieshouse.gov.uk",
+        "port": 443,
+        "maxsize": 20,
+        "idle_connections": 0,
+        "connections_opened": 0,
+        "requests": 0,
+    } in stats
+
+
+def test_search_companies_less_than_full_page_results(requests_mock):
+    companies = [_get_company() for _ in range(2)]
+
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=0",
+        json={
+            "items": _to_results(companies),
+        },
+    )
+
+    items = search_companies("test")
+    assert items == _to_items(companies)
+
+
+def test_search_companies_full_page_results(requests_mock):
+    companies = [_get_company() for _ in range(20)]
+
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=0",
+        json={
+            "items": _to_results(companies),
+        },
+    )
+
+    items = search_companies("test")
+    assert items == _to_items(companies)
+
+
+def test_search_companies_active_company_filtering(requests_mock):
+    active = [_get_company()]
+    inactive = [_get_company("inactive")]
+    companies = active + inactive
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=0",
+        json={
+            "items": _to_results(companies),
+        },
+    )
+
+    items = search_companies("test")
+    assert items == _to_items(active)
+
+
+def test_search_companies_snippets_filtering(requests_mock):
+    include_snippets = [
+        _get_company(matches=["title"]),
+        _get_company(matches=["address_snippet"]),
+        _get_company(matches=["snippet", "address_snippet"]),
+    ]
+    exclude_snippets = [
+        _get_company(matches=False),
+        _get_company(matches=[]),
+        _get_company(matches=["snippet"]),
+    ]
+    companies = include_snippets + exclude_snippets
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=0",
+        json={
+            "items": _to_results(companies),
+        },
+    )
+
+    items = search_companies("test")
+    assert items == _to_items(include_snippets)
+
+
+@pytest.mark.parametrize("concurrency", [1, 2, 5])
+def test_search_companies_desired_results_after_filtering(
+    requests_mock, settings, concurrency
+):
+    settings.COMPANIES_HOUSE_PAGE_FETCH_CONCURRENCY = concurrency
+
+    first_page_active = [_get_company() for _ in range(10)]
+    first_page_inactive = [_get_company(company_status="inactive") for _ in range(10)]
+    first_page_results = first_page_active + first_page_inactive
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=0",
+        json={
+            "items": _to_results(first_page_results),
+        },
+    )
+
+    second_page_active = [_get_company() for _ in range(10)]
+    second_page_inactive = [_get_company(company_status="inactive") for _ in range(10)]
+    second_page_results = second_page_active + second_page_inactive
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=20",
+        json={
+            "items": _to_results(second_page_results),
+        },
+    )
+
+    items = search_companies("test")
+    assert items == _to_items(first_page_active + second_page_active)
+
+
+@pytest.mark.parametrize("concurrency", [1, 2, 5])
+def test_search_companies_maximum_page_searches(requests_mock, settings, concurrency):
+    settings.COMPANIES_HOUSE_PAGE_FETCH_CONCURRENCY = concurrency
+    settings.COMPANIES_HOUSE_SEARCH_MAX_PAGES = 5
+
+    first_page_active = [_get_company()]
+    first_page_inactive = [_get_company(company_status="inactive") for _ in range(19)]
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=0",
+        json={
+            "items": _to_results(first_page_active + first_page_inactive),
+        },
+    )
+    second_page_active = [_get_company()]
+    second_page_inactive = [_get_company(company_status="inactive") for _ in range(19)]
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=20",
+        json={
+            "items": _to_results(second_page_active + second_page_inactive),
+        },
+    )
+    third_page_active = [_get_company()]
+    third_page_inactive = [_get_company(company_status="inactive") for _ in range(19)]
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=40",
+        json={
+            "items": _to_results(third_page_active + third_page_inactive),
+        },
+    )
+    fourth_page_active = [_get_company()]
+    fourth_page_inactive = [_get_company(company_status="inactive") for _ in range(19)]
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=60",
+        json={
+            "items": _to_results(fourth_page_active + fourth_page_inactive),
+        },
+    )
+    fifth_page_active = [_get_company()]
+    fifth_page_inactive = [_get_company(company_status="inactive") for _ in range(19)]
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=80",
+        json={
+            "items": _to_results(fifth_page_active + fifth_page_inactive),
+        },
+    )
+
+    items = search_companies("test")
+    assert items == _to_items(
+        first_page_active
+        + second_page_active
+        + third_page_active
+        + fourth_page_active
+        + fifth_page_active
+    )
+
+
+def test_search_companies_concurrently_ignores_unneeded_pages(requests_mock, settings):
+    settings.COMPANIES_HOUSE_PAGE_FETCH_CONCURRENCY = 5
+
+    first_page_active = [_get_company()]
+    first_page_inactive = [_get_company(company_status="inactive") for _ in range(19)]
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=0",
+        json={
+            "items": _to_results(first_page_active + first_page_inactive),
+        },
+    )
+    second_page_active = [_get_company()]
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=20",
+        json={
+            "items": _to_results(second_page_active),
+        },
+    )
+    third_page_active = [_get_company() for _ in range(20)]
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=40",
+        json={
+            "items": _to_results(third_page_active),
+        },
+    )
+    # the remaining pages aren't mocked so any speculative requests for them
+    # fail, which shouldn't matter as they are never needed
+
+    items = search_companies("test")
+    assert items == _to_items(first_page_active + second_page_active)
+
+
+def test_search_companies_house_is_complete(requests_mock):
+    first_page = [_get_company() for _ in range(20)]
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=0",
+        json={
+            "items": _to_results(first_page),
+        },
+    )
+    items, is_complete = _search_companies_house("test")
+    assert items == _to_items(first_page)
+    assert not is_complete
+
+    first_page = [_get_company() for _ in range(5)]
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=0",
+        json={
+            "items": _to_results(first_page),
+        },
+    )
+    items, is_complete = _search_companies_house("test")
+    assert items == _to_items(first_page)
+    assert is_complete
+
+
+def test_iter_search_companies(requests_mock):
+    first_page_active = [_get_company() for _ in range(10)]
+    first_page_inactive = [_get_company(company_status="inactive") for _ in range(10)]
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=0",
+        json={
+            "items": _to_results(first_page_active + first_page_inactive),
+        },
+    )
+    second_page_inactive = [_get_company(company_status="inactive") for _ in range(20)]
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=20",
+        json={
+            "items": _to_results(second_page_inactive),
+        },
+    )
+    third_page_active = [_get_company() for _ in range(5)]
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=40",
+        json={
+            "items": _to_results(third_page_active),
+        },
+    )
+
+    batches = iter_search_companies(" TEST ")
+    assert next(batches) == _to_items(first_page_active)
+    assert requests_mock.call_count == 1
+
+    # pages without any results left after filtering aren't yielded
+    assert list(batches) == [_to_items(third_page_active)]
+    assert requests_mock.call_count == 3
+
+
+def test_iter_search_companies_cached(requests_mock, settings):
+    settings.COMPANIES_HOUSE_SEARCH_CACHE_TTL = 60
+    cache.clear()
+    first_page = [_get_company() for _ in range(5)]
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=0",
+        json={
+            "items": _to_results(first_page),
+        },
+    )
+
+    assert list(iter_search_companies("test")) == [_to_items(first_page)]
+    assert list(iter_search_companies("test")) == [_to_items(first_page)]
+    assert search_companies("test") == _to_items(first_page)
+    assert requests_mock.call_count == 1
+    cache.clear()
+
+
+def test_iter_search_companies_stale_circuit_open(mocker, settings):
+    settings.COMPANIES_HOUSE_SEARCH_CACHE_TTL = 60
+    cache.clear()
+    mock_time = mocker.patch("export_support.companies.cache.time")
+    mock_time.time.return_value = 1000.0
+    items = [{"name": "ACME LTD", "postcode": "SW1A 1AA", "companyNumber": "1"}]
+    store_results("acme", items, True)
+
+    mock_time.time.return_value += 61
+    mocker.patch(
+        "export_support.companies.cache._run_in_background",
+        side_effect=lambda func, *args: func(*args),
+    )
+    mock_fetch_page = mocker.patch(
+        "export_support.companies.search._fetch_page",
+        side_effect=CircuitOpenError(),
+    )
+
+    assert search_companies("acme") == items
+    assert list(iter_search_companies("acme")) == [items]
+    # the stale results are refreshed in the background
+    assert mock_fetch_page.call_count == 2
+    cache.clear()
+
+
+def test_iter_search_companies_ranked(settings):
+    settings.COMPANIES_HOUSE_SEARCH_CACHE_TTL = 60
+    cache.clear()
+    items = [
+        {"name": f"THE ACME {i}", "postcode": None, "companyNumber": str(i)}
+        for i in range(25)
+    ]
+    items.append({"name": "ACME", "postcode": None, "companyNumber": "25"})
+    store_results("acme", items, True)
+
+    (results,) = list(iter_search_companies("acme"))
+    assert results == search_companies("acme")
+    assert len(results) == 20
+    assert results[0]["name"] == "ACME"
+    cache.clear()
+
+
+def test_search_companies_max_pages(requests_mock, settings):
+    settings.COMPANIES_HOUSE_SEARCH_MAX_PAGES = 2
+    requests_mock.get(
+        ANY_URL,
+        json={
+            "items": _to_results(
+                [_get_company(company_status="inactive") for _ in range(20)]
+            ),
+        },
+    )
+
+    assert search_companies("test") == []
+    assert requests_mock.call_count == 2
+
+
+def test_search_companies_default_max_pages(requests_mock):
+    # Even when most of each page is filtered out the default number of pages
+    # fills the results, with the best match ranked first from the last page
+    pages = [
+        [_get_company() for _ in range(7)]
+        + [_get_company(company_status="dissolved") for _ in range(13)]
+        for _ in range(3)
+    ]
+    pages[2][6] = _get_company()._replace(name="Test")
+    for page, companies in enumerate(pages):
+        requests_mock.get(
+            "https://api.companieshouse.gov.uk/search/companies"
+            f"?q=test&items_per_page=20&start_index={page * 20}",
+            json={
+                "items": _to_results(companies),
+            },
+        )
+
+    items = search_companies("test")
+    assert len(items) == 20
+    assert items[0]["name"] == "Test"
+    assert requests_mock.call_count == 3
+
+
+def test_search_companies_deduplicates_pages(requests_mock):
+    first_page = [_get_company() for _ in range(15)] + [
+        _get_company(company_status="inactive") for _ in range(5)
+    ]
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=0",
+        json={
+            "items": _to_results(first_page),
+        },
+    )
+    # the first page's last active companies have moved on to the second page
+    second_page = first_page[10:15] + [_get_company() for _ in range(5)]
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20&start_index=20",
+        json={
+            "items": _to_results(second_page),
+        },
+    )
+
+    items = search_companies("test")
+    assert items == _to_items(first_page[:15] + second_page[5:])
+
+
+def _get_item(name, postcode=None, company_number=None):
+    return {
+        "name": name,
+        "postcode": postcode,
+        "companyNumber": company_number or name,
+    }
+
+
+def test_rank_results():
+    items = [
+        _get_item("THE ACME WIDGETS COMPANY"),
+        _get_item("WIDGETS BY ACME LTD"),
+        _get_item("ACME WIDGETS LTD"),
+        _get_item("ACME WIDGETS"),
+        _get_item("ADDRESS MATCH LTD", "AC1 1AA"),
+    ]
+
+    assert rank_results("acme widgets", items) == [
+        _get_item("ACME WIDGETS"),
+        _get_item("ACME WIDGETS LTD"),
+        _get_item("THE ACME WIDGETS COMPANY"),
+        _get_item("WIDGETS BY ACME LTD"),
+        _get_item("ADDRESS MATCH LTD", "AC1 1AA"),
+    ]
+
+
+def test_rank_results_postcode():
+    items = [
+        _get_item("ACME LTD", "M1 1AA", "1"),
+        _get_item("ACME LTD", "SW1A 1AA", "2"),
+        _get_item("ACME LTD", None, "3"),
+    ]
+
+    assert rank_results("acme sw1a", items) == [
+        _get_item("ACME LTD", "SW1A 1AA", "2"),
+        _get_item("ACME LTD", "M1 1AA", "1"),
+        _get_item("ACME LTD", None, "3"),
+    ]
+
+
+def test_rank_results_desired_num_results():
+    items = [_get_item(f"ACME {i}") for i in range(30)] + [_get_item("ACME")]
+
+    ranked = rank_results("acme", items)
+    assert len(ranked) == 20
+    assert ranked[0] == _get_item("ACME")
+    assert ranked[1:] == items[:19]
+
+
+def test_no_address_results(requests_mock):
+    requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies?q=test&items_per_page=20",
+        json={
+            "items": [
+                {
+                    "title": "no address",
+                    "company_number": "12345",
+                    "company_status": "active",
+                    "matches": ["title"],
+                },
+                {
+                    "title": "none address",
+                    "address": None,
+                    "company_number": "67890",
+                    "company_status": "active",
+                    "matches": ["title"],
+                },
+            ],
+        },
+    )
+
+    items = search_companies("test")
+
+    assert items == [
+        {
+            "name": "no address",
+            "postcode": None,
+            "companyNumber": "12345",
+        },
+        {
+            "name": "none address",
+            "postcode": None,
+            "companyNumber": "67890",
+        },
+    ]
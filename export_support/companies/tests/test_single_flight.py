@@ -0,0 +1,153 @@
+import threading
+
+import pytest
+
+from export_support.companies.single_flight import (
+    _in_flight,
+    single_flight,
+    single_flight_iter,
+)
+
+
+def _call_concurrently(func, num_calls):
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(func()))
+        for _ in range(num_calls)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(True)
+        started.set()
+        release.wait()
+        return ["result"]
+
+    leader = threading.Thread(target=lambda: single_flight("acme", fetch))
+    leader.start()
+    started.wait()
+
+    threads, results = _call_concurrently(lambda: single_flight("acme", fetch), 5)
+    release.set()
+    leader.join()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [["result"]] * 5
+
+
+def test_single_flight_separate_keys():
+    assert single_flight("acme", lambda: "acme") == "acme"
+    assert single_flight("other", lambda: "other") == "other"
+
+
+def test_single_flight_sequential_calls_are_not_coalesced():
+    calls = []
+
+    def fetch():
+        calls.append(True)
+        return len(calls)
+
+    assert single_flight("acme", fetch) == 1
+    assert single_flight("acme", fetch) == 2
+
+
+def test_single_flight_exception_is_shared():
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def fetch():
+        started.set()
+        release.wait()
+        raise ValueError("upstream failure")
+
+    def call():
+        try:
+            single_flight("acme", fetch)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=call)
+    follower.start()
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert len(errors) == 2
+
+    with pytest.raises(ValueError):
+        single_flight("acme", fetch)
+
+
+def test_single_flight_iter_coalesces_concurrent_calls():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(True)
+        yield "first"
+        started.set()
+        release.wait()
+        yield "second"
+
+    leader_batches = single_flight_iter("acme", fetch)
+    assert next(leader_batches) == "first"
+
+    threads, results = _call_concurrently(
+        lambda: list(single_flight_iter("acme", fetch)), 5
+    )
+    release.set()
+    assert list(leader_batches) == ["second"]
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [["first", "second"]] * 5
+
+
+def test_single_flight_iter_abandoned_call():
+    calls = []
+
+    def fetch():
+        calls.append(True)
+        yield "first"
+        yield "second"
+
+    leader_batches = single_flight_iter("acme", fetch)
+    assert next(leader_batches) == "first"
+
+    done = _in_flight["acme"].done
+    wait = done.wait
+    waiting = threading.Event()
+
+    def wait_for_leader():
+        waiting.set()
+        return wait()
+
+    done.wait = wait_for_leader
+    threads, results = _call_concurrently(
+        lambda: list(single_flight_iter("acme", fetch)), 1
+    )
+    waiting.wait()
+
+    # the follower fetches the results itself when the leader stops early
+    leader_batches.close()
+    for thread in threads:
+        thread.join()
+
+    assert results == [["first", "second"]]
+    assert len(calls) == 2
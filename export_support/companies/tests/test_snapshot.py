@@ -0,0 +1,213 @@
+import csv
+import os
+import sqlite3
+import threading
+import zipfile
+
+import pytest
+from django.core.management import call_command
+from requests_mock import ANY as ANY_URL
+
+from export_support.companies import snapshot
+from export_support.companies.search import search_companies
+from export_support.companies.snapshot import SnapshotUnavailableError, search_snapshot
+
+HEADERS = [
+    "CompanyName",
+    " CompanyNumber",
+    "RegAddress.AddressLine1",
+    "RegAddress.PostCode",
+    "CompanyCategory",
+    "CompanyStatus",
+]
+
+COMPANIES = [
+    [
+        "ACME LTD",
+        "00000001",
+        "1 High Street",
+        "SW1A 1AA",
+        "Private Limited Company",
+        "Active",
+    ],
+    [
+        "ACME ENGINEERING LTD",
+        "00000002",
+        "",
+        "M1 1AA",
+        "Private Limited Company",
+        "Active",
+    ],
+    [
+        "ACME DISSOLVED LTD",
+        "00000003",
+        "",
+        "M1 1AA",
+        "Private Limited Company",
+        "Dissolved",
+    ],
+    [
+        "ACME ENERGY LIMITED",
+        "00000004",
+        "",
+        "",
+        "Private Limited Company",
+        "Active - Proposal to Strike off",
+    ],
+    [
+        "OTHER COMPANY LTD",
+        "00000005",
+        "",
+        "SW1A 2AA",
+        "Private Limited Company",
+        "Active",
+    ],
+]
+
+
+def _write_csv(path):
+    with open(path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(HEADERS)
+        writer.writerows(COMPANIES)
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, settings):
+    csv_path = tmp_path / "BasicCompanyData.csv"
+    _write_csv(csv_path)
+
+    snapshot_path = tmp_path / "snapshot.sqlite3"
+    settings.COMPANIES_HOUSE_SNAPSHOT_PATH = str(snapshot_path)
+    call_command("build_companies_index", str(csv_path), output=str(snapshot_path))
+
+    return snapshot_path
+
+
+def test_build_companies_index_from_zip(tmp_path, settings):
+    csv_path = tmp_path / "BasicCompanyData.csv"
+    _write_csv(csv_path)
+    zip_path = tmp_path / "BasicCompanyData.zip"
+    with zipfile.ZipFile(zip_path, "w") as archive:
+        archive.write(csv_path, "BasicCompanyData.csv")
+
+    snapshot_path = tmp_path / "snapshot.sqlite3"
+    settings.COMPANIES_HOUSE_SNAPSHOT_PATH = str(snapshot_path)
+    call_command("build_companies_index", str(zip_path), output=str(snapshot_path))
+
+    items, _ = search_snapshot("acme", 20)
+    assert len(items) == 3
+
+
+def test_build_companies_index_new_directory(tmp_path, settings):
+    csv_path = tmp_path / "BasicCompanyData.csv"
+    _write_csv(csv_path)
+
+    snapshot_path = tmp_path / "build" / "snapshot.sqlite3"
+    settings.COMPANIES_HOUSE_SNAPSHOT_PATH = str(snapshot_path)
+    call_command("build_companies_index", str(csv_path), output=str(snapshot_path))
+
+    items, _ = search_snapshot("acme", 20)
+    assert len(items) == 3
+
+
+def test_search_snapshot_shares_connection(snapshot_path):
+    search_snapshot("acme", 20)
+    connection = snapshot._connection
+
+    # other threads, and so greenlets, use the same connection
+    thread = threading.Thread(target=search_snapshot, args=("acme", 20))
+    thread.start()
+    thread.join()
+    assert snapshot._connection is connection
+
+    # and it is replaced once the index is rebuilt
+    mtime = os.stat(snapshot_path).st_mtime_ns
+    os.utime(snapshot_path, ns=(mtime + 1_000_000_000, mtime + 1_000_000_000))
+    items, _ = search_snapshot("acme", 20)
+    assert len(items) == 3
+    assert snapshot._connection is not connection
+    with pytest.raises(sqlite3.ProgrammingError):
+        connection.execute("SELECT 1")
+
+
+def test_search_snapshot(snapshot_path):
+    items, is_complete = search_snapshot("acme", 20)
+    assert sorted(item["companyNumber"] for item in items) == [
+        "00000001",
+        "00000002",
+        "00000004",
+    ]
+    assert is_complete
+
+    items, _ = search_snapshot("acme eng", 20)
+    assert items == [
+        {
+            "name": "ACME ENGINEERING LTD",
+            "postcode": "M1 1AA",
+            "companyNumber": "00000002",
+        },
+    ]
+
+    items, _ = search_snapshot("acme energy", 20)
+    assert items == [
+        {"name": "ACME ENERGY LIMITED", "postcode": None, "companyNumber": "00000004"},
+    ]
+
+    items, _ = search_snapshot("sw1a", 20)
+    assert sorted(item["companyNumber"] for item in items) == ["00000001", "00000005"]
+
+    items, is_complete = search_snapshot("acme", 2)
+    assert len(items) == 2
+    assert not is_complete
+
+    assert search_snapshot('acme" OR *', 20) == ([], True)
+    assert search_snapshot("", 20) == ([], True)
+    assert search_snapshot("dissolved", 20) == ([], True)
+
+
+def test_search_snapshot_unavailable(tmp_path, settings):
+    settings.COMPANIES_HOUSE_SNAPSHOT_PATH = str(tmp_path / "missing.sqlite3")
+    with pytest.raises(SnapshotUnavailableError):
+        search_snapshot("acme", 20)
+
+
+def test_search_companies_snapshot_backend(snapshot_path, settings, requests_mock):
+    settings.COMPANIES_HOUSE_SEARCH_BACKEND = "snapshot"
+
+    assert search_companies("ACME Eng") == [
+        {
+            "name": "ACME ENGINEERING LTD",
+            "postcode": "M1 1AA",
+            "companyNumber": "00000002",
+        },
+    ]
+    assert not requests_mock.called
+
+
+def test_search_companies_snapshot_backend_api_fallback(
+    snapshot_path, settings, requests_mock
+):
+    settings.COMPANIES_HOUSE_SEARCH_BACKEND = "snapshot"
+    requests_mock.get(ANY_URL, json={"items": []})
+
+    assert search_companies("new company") == []
+    assert requests_mock.call_count == 1
+
+    settings.COMPANIES_HOUSE_SNAPSHOT_PATH = str(snapshot_path.parent / "missing")
+    assert search_companies("acme") == []
+    assert requests_mock.call_count == 2
+
+
+def test_search_companies_snapshot_backend_no_api_fallback(
+    snapshot_path, settings, requests_mock
+):
+    settings.COMPANIES_HOUSE_SEARCH_BACKEND = "snapshot"
+    settings.COMPANIES_HOUSE_SNAPSHOT_API_FALLBACK = False
+
+    assert search_companies("new company") == []
+
+    settings.COMPANIES_HOUSE_SNAPSHOT_PATH = str(snapshot_path.parent / "missing")
+    with pytest.raises(SnapshotUnavailableError):
+        search_companies("acme")
+    assert not requests_mock.called
@@ -0,0 +1,162 @@
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+from urllib.parse import urlencode
+
+import requests
+from django.conf import settings
+from django_ga_measurement_protocol.track import (
+    DEBUG_GOOGLE_ANALYTICS_ENDPOINT,
+    build_tracking_data,
+)
+
+from .http import create_pooled_session, get_pool_stats
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_ANALYTICS_BATCH_ENDPOINT = "https://www.google-analytics.com/batch"
+
+# The limits of the measurement protocol's batch endpoint
+MAX_HITS_PER_BATCH = 20
+MAX_HIT_SIZE = 8 * 1024
+MAX_BATCH_SIZE = 16 * 1024
+
+session = create_pooled_session(pool_maxsize=1)
+
+
+def get_session_stats():
+    return get_pool_stats(session)
+
+
+class HitDispatcher:
+    """Sends measurement protocol hits to Google Analytics in batches from a
+    background thread, which is a greenlet when gevent has patched threading,
+    so that requests don't wait for Google.
+
+    At most `max_queue_size` hits are kept waiting, after which the oldest are
+    dropped.
+    """
+
+    def __init__(self, max_queue_size, flush_interval, timeout):
+        self.hits = deque(maxlen=max_queue_size)
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.pid = None
+        self.stats = {"queued": 0, "dropped": 0, "sent": 0, "failed": 0}
+
+    def enqueue(self, tracking_data):
+        hit = urlencode(
+            {key: value for key, value in tracking_data.items() if value is not None}
+        )
+        if len(hit) > MAX_HIT_SIZE:
+            logger.warning("Dropped a Google Analytics hit that was too big to send")
+            return
+
+        with self.lock:
+            if len(self.hits) == self.hits.maxlen:
+                self.stats["dropped"] += 1
+            self.hits.append(hit)
+            self.stats["queued"] += 1
+            is_full_batch = len(self.hits) >= MAX_HITS_PER_BATCH
+
+        self._start()
+        if is_full_batch:
+            self.wake.set()
+
+    def _start(self):
+        # Started in the process that sends the hits, as a thread started
+        # before gunicorn forks its workers wouldn't be running in them
+        pid = os.getpid()
+        if self.pid == pid:
+            return
+        with self.lock:
+            if self.pid == pid:
+                return
+            self.pid = pid
+            self.stopped.clear()
+            self.thread = threading.Thread(
+                target=self._run, name="google-analytics", daemon=True
+            )
+            self.thread.start()
+
+    def _run(self):
+        while not self.stopped.is_set():
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self.flush()
+
+    def _take_batch(self):
+        batch = []
+        batch_size = 0
+        with self.lock:
+            while self.hits and len(batch) < MAX_HITS_PER_BATCH:
+                # Each hit is on its own line
+                hit_size = len(self.hits[0]) + 1
+                if batch_size + hit_size > MAX_BATCH_SIZE:
+                    break
+                batch.append(self.hits.popleft())
+                batch_size += hit_size
+        return batch
+
+    def _send(self, batch):
+        try:
+            if getattr(settings, "GA_MEASUREMENT_PROTOCOL_DEBUG", False):
+                # The debug endpoint only validates one hit at a time
+                for hit in batch:
+                    response = session.post(
+                        DEBUG_GOOGLE_ANALYTICS_ENDPOINT, data=hit, timeout=self.timeout
+                    )
+                    logger.debug("Tracking response: %s", response.json())
+            else:
+                response = session.post(
+                    GOOGLE_ANALYTICS_BATCH_ENDPOINT,
+                    data="\n".join(batch),
+                    timeout=self.timeout,
+                )
+                response.raise_for_status()
+        except requests.exceptions.RequestException:
+            logger.warning(
+                "Failed to send %s hits to Google Analytics", len(batch), exc_info=True
+            )
+            self.stats["failed"] += len(batch)
+            return
+        self.stats["sent"] += len(batch)
+
+    def flush(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            self._send(batch)
+
+    def shutdown(self):
+        """Stops the background thread and sends the hits still waiting."""
+        self.stopped.set()
+        self.wake.set()
+        if self.thread is not None and self.pid == os.getpid():
+            self.thread.join(self.timeout)
+        self.flush()
+
+
+dispatcher = HitDispatcher(
+    max_queue_size=settings.GA_MEASUREMENT_PROTOCOL_QUEUE_SIZE,
+    flush_interval=settings.GA_MEASUREMENT_PROTOCOL_FLUSH_INTERVAL,
+    timeout=settings.GA_MEASUREMENT_PROTOCOL_TIMEOUT,
+)
+
+# gunicorn's worker_exit hook also shuts it down, before the worker's gevent
+# hub is torn down
+atexit.register(dispatcher.shutdown)
+
+
+def track_page_view(request):
+    if not getattr(settings, "GA_MEASUREMENT_PROTOCOL_TRACK_EVENTS", False):
+        return
+
+    dispatcher.enqueue(build_tracking_data(request, {"t": "pageview"}))
@@ -1,4 +1,4 @@
-from .markets import get_market_name_from_code
+from . import markets_data
 
 ENQUIRY_MARKET_CODES = {
     "AD": "andorra__ess_export",
@@ -197,12 +197,9 @@ ENQUIRY_MARKET_CODES = {
     "ZW": "zimbabwe__ess_export",
 }
 
-MARKETS_MAP = {
-    machine_readable_value: get_market_name_from_code(code)
-    for code, machine_readable_value in sorted(
-        ENQUIRY_MARKET_CODES.items(), key=lambda x: get_market_name_from_code(x[0])
-    )
-}
+# Generated from ENQUIRY_MARKET_CODES by `python manage.py generate_markets_data`
+MARKETS_MAP = markets_data.MARKETS_MAP
+MARKETS_CHOICES = markets_data.MARKETS_CHOICES
 
 SECTORS_MAP = {
     "advanced_engineering__ess_sector_l1": "Advanced engineering",
@@ -234,6 +231,8 @@ SECTORS_MAP = {
     "water__ess_sector_l1": "Water",
 }
 
+SECTORS_CHOICES = tuple(SECTORS_MAP.items())
+
 EMERGENCY_SITUATION_MARKETS = {
     "israel-palestine": {
         "market_list": "Israel, Occupied Palestinian Territories",
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import logging
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "zendesk-submission"
+DUPLICATES_COUNT_KEY = "zendesk-duplicate-submissions"
+
+
+def _normalise(value):
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {key: _normalise(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalise(item) for item in value]
+    return value
+
+
+def get_submission_key(request, data):
+    # Requests without a session, for example with the cookie wizard storage,
+    # are only told apart by their data, which includes the user's details
+    session_key = request.session.session_key or ""
+    payload = json.dumps(
+        [session_key, _normalise(data)], sort_keys=True, default=str
+    ).encode("utf-8")
+    return f"{CACHE_KEY_PREFIX}:{hashlib.sha256(payload).hexdigest()}"
+
+
+def _record_duplicate():
+    try:
+        return cache.incr(DUPLICATES_COUNT_KEY)
+    except ValueError:
+        cache.add(DUPLICATES_COUNT_KEY, 0, timeout=None)
+        return cache.incr(DUPLICATES_COUNT_KEY)
+
+
+def get_duplicates_count():
+    return cache.get(DUPLICATES_COUNT_KEY, 0)
+
+
+def _ignore_duplicate():
+    count = _record_duplicate()
+    logger.info("Ignored a duplicate Zendesk submission (%s so far)", count)
+
+
+@contextmanager
+def duplicate_submission_guard(request, data):
+    """Yields whether the same `data` has already been submitted in this
+    session within ZENDESK_DUPLICATE_SUBMISSION_TTL, or is being submitted,
+    so that double clicks and retried requests don't send it again.
+
+    The submission is only marked as sent once the block has finished. Until
+    then it is claimed for ZENDESK_DUPLICATE_SUBMISSION_IN_FLIGHT_TTL, so if
+    the block raises an exception, or the worker dies, the user can try again.
+    """
+    if not settings.ZENDESK_DUPLICATE_SUBMISSION_TTL:
+        yield False
+        return
+
+    key = get_submission_key(request, data)
+    in_flight_key = f"{key}:in-flight"
+    if not cache.add(
+        in_flight_key,
+        True,
+        timeout=settings.ZENDESK_DUPLICATE_SUBMISSION_IN_FLIGHT_TTL,
+    ):
+        _ignore_duplicate()
+        yield True
+        return
+
+    try:
+        # Checked after claiming the submission as the claim is only given up
+        # once the submission has been marked as sent
+        if cache.get(key):
+            _ignore_duplicate()
+            yield True
+            return
+
+        yield False
+        cache.set(key, True, timeout=settings.ZENDESK_DUPLICATE_SUBMISSION_TTL)
+    finally:
+        cache.delete(in_flight_key)
@@ -8,7 +8,7 @@ from django.utils.html import format_html
 from export_support.gds import fields as gds_fields
 from export_support.gds import forms as gds_forms
 
-from .consts import MARKETS_MAP, SECTORS_MAP
+from .consts import MARKETS_CHOICES, MARKETS_MAP, SECTORS_CHOICES, SECTORS_MAP
 from .validators import postcode_validator
 
 logger = logging.getLogger(__name__)
@@ -184,13 +184,10 @@ class ExportMarketsForm(gds_forms.FormErrorMixin, forms.Form):
         ),
     )
     markets = forms.MultipleChoiceField(
-        choices=[
-            (machine_value, market_name)
-            for machine_value, market_name in MARKETS_MAP.items()
-        ],
+        choices=MARKETS_CHOICES,
         label="Which market are you selling to?",
         required=False,
-        widget=gds_fields.CheckboxSelectMultiple,
+        widget=gds_fields.PrerenderedCheckboxSelectMultiple,
     )
     no_specific_market = forms.BooleanField(
         label="My query is not related to a specific market",
@@ -882,7 +879,7 @@ class SoloExporterAdditionalInformationForm(PositivityForGrowthMixin):
 
 class SectorsForm(gds_forms.FormErrorMixin, forms.Form):
     sectors = forms.MultipleChoiceField(
-        choices=SECTORS_MAP.items(),
+        choices=SECTORS_CHOICES,
         label="Which industry or business area does your enquiry relate to?",
         required=False,
         widget=gds_fields.CheckboxSelectMultiple,
@@ -1106,7 +1103,7 @@ class EmergencySituationEnquiryForm(gds_forms.FormErrorMixin, forms.Form):
         ),
     )
     sectors = forms.MultipleChoiceField(
-        choices=SECTORS_MAP.items(),
+        choices=SECTORS_CHOICES,
         label="Which industry or business area does your enquiry relate to?",
         required=False,
         widget=gds_fields.CheckboxSelectMultiple,
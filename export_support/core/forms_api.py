@@ -0,0 +1,52 @@
+import requests
+from directory_forms_api_client.client import APIFormsClient
+from django.conf import settings
+from urllib3.util.retry import Retry
+
+from .http import create_pooled_session, get_pool_stats
+
+# Shared by every request in the worker so that submissions and healthchecks
+# reuse an already established connection to directory-forms-api rather than
+# doing a new handshake. Connection errors are retried, but a request that may
+# have reached the API is only retried if it is idempotent, so never a POST.
+session = create_pooled_session(
+    pool_maxsize=settings.DIRECTORY_FORMS_API_POOL_MAXSIZE,
+    pool_block=settings.DIRECTORY_FORMS_API_POOL_BLOCK,
+    max_retries=Retry(
+        total=settings.DIRECTORY_FORMS_API_RETRIES,
+        backoff_factor=settings.DIRECTORY_FORMS_API_RETRY_BACKOFF_FACTOR,
+        raise_on_status=False,
+    ),
+)
+
+
+def get_timeout():
+    return (
+        settings.DIRECTORY_FORMS_API_CONNECT_TIMEOUT,
+        settings.DIRECTORY_FORMS_API_DEFAULT_TIMEOUT,
+    )
+
+
+def get_session_stats():
+    return get_pool_stats(session)
+
+
+class PooledAPIFormsClient(APIFormsClient):
+    """The directory-forms-api client, sending its requests with the shared
+    session rather than a new session per request.
+    """
+
+    def send(self, method, url, request=None, allow_redirects=True, *args, **kwargs):
+        prepared_request = requests.Request(method, url, *args, **kwargs).prepare()
+        signed_request = self.sign_request(prepared_request=prepared_request)
+        return session.send(
+            signed_request, timeout=get_timeout(), allow_redirects=allow_redirects
+        )
+
+
+forms_api_client = PooledAPIFormsClient(
+    base_url=settings.DIRECTORY_FORMS_API_BASE_URL,
+    api_key=settings.DIRECTORY_FORMS_API_API_KEY,
+    sender_id=settings.DIRECTORY_FORMS_API_SENDER_ID,
+    timeout=settings.DIRECTORY_FORMS_API_DEFAULT_TIMEOUT,
+)
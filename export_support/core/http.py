@@ -0,0 +1,56 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def create_pooled_session(*, pool_maxsize, pool_block=False, max_retries=0):
+    """Returns a `requests.Session` that keeps connections alive between calls.
+
+    urllib3 keeps a separate pool per host so `pool_maxsize` is the number of
+    connections kept open to each upstream host. When `pool_block` is set the
+    pool size is also a hard limit and callers wait for a free connection
+    instead of opening a throwaway one.
+
+    Connection pools are guarded by a queue, which gevent monkey patches, so a
+    single session can be shared between all greenlets in a worker.
+    """
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+        max_retries=max_retries,
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return session
+
+
+def get_pool_stats(session):
+    """Returns usage information for every host pool opened by `session`."""
+    stats = []
+
+    adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+    for adapter in adapters.values():
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            # urllib3 pre-fills the queue with `None` placeholders so only the
+            # real entries are connections that are open and ready to reuse
+            idle = [conn for conn in list(pool.pool.queue) if conn] if pool.pool else []
+            stats.append(
+                {
+                    "scheme": pool.scheme,
+                    "host": pool.host,
+                    "port": pool.port,
+                    "maxsize": pool.pool.maxsize if pool.pool else 0,
+                    "idle_connections": len(idle),
+                    "connections_opened": pool.num_connections,
+                    "requests": pool.num_requests,
+                }
+            )
+
+    return stats
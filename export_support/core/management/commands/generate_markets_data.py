@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from export_support.core import markets_data
+from export_support.core.consts import ENQUIRY_MARKET_CODES
+from export_support.core.markets import (
+    MARKETS_DATA_PATH,
+    generate_markets_data,
+    get_source_hash,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates the markets data module from the FCDO CSV and ENQUIRY_MARKET_CODES"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Fail if the markets data module is out of date rather than generating it",
+        )
+        parser.add_argument(
+            "--output",
+            default=MARKETS_DATA_PATH,
+            help="Path to write the module to",
+        )
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            if markets_data.SOURCE_HASH != get_source_hash(ENQUIRY_MARKET_CODES):
+                raise CommandError(
+                    "The markets data is out of date, "
+                    "run `python manage.py generate_markets_data`"
+                )
+            self.stdout.write("The markets data is up to date")
+            return
+
+        with open(options["output"], "w") as output:
+            output.write(generate_markets_data(ENQUIRY_MARKET_CODES))
+
+        self.stdout.write(f"Generated the markets data in {options['output']}")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from export_support.core.zendesk_outbox import replay_dead_letters
+
+
+class Command(BaseCommand):
+    help = "Moves the Zendesk submissions that failed to send back into the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="The number of submissions moved per round trip to Redis",
+        )
+
+    def handle(self, *args, **options):
+        replayed = replay_dead_letters(batch_size=options["batch_size"])
+        self.stdout.write(f"Replayed {replayed} Zendesk submissions")
@@ -0,0 +1,35 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from export_support.core.zendesk_outbox import get_outbox_stats, run_worker
+
+
+class Command(BaseCommand):
+    help = "Sends the Zendesk submissions in the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.ZENDESK_OUTBOX_CONCURRENCY,
+            help="The most submissions sent at the same time",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once there are no more pending submissions",
+        )
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        # Finish sending the submissions already taken from the outbox before
+        # exiting when the platform stops the worker
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        signal.signal(signal.SIGINT, lambda *args: stop.set())
+
+        self.stdout.write(f"Outbox: {get_outbox_stats()}")
+        run_worker(options["concurrency"], once=options["once"], stop=stop)
+        self.stdout.write(f"Outbox: {get_outbox_stats()}")
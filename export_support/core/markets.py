@@ -1,16 +1,77 @@
 import csv
+import hashlib
+import json
 from pathlib import Path
 
+from .markets_data import MARKET_CODE_MAP
+
 DATA_DIR = Path(__file__).resolve().parent / "data"
 
 CSV_FILE_PATH = DATA_DIR / "FCDO_Geographical_Names_Index-2021-3-31.csv"
 
-MARKET_CODE_MAP = {}
-with open(CSV_FILE_PATH) as csv_file:
-    reader = csv.reader(csv_file)
-    for code, name, _, _ in reader:
-        MARKET_CODE_MAP[code] = name
+MARKETS_DATA_PATH = Path(__file__).resolve().parent / "markets_data.py"
 
 
 def get_market_name_from_code(code):
     return MARKET_CODE_MAP[code]
+
+
+def read_market_code_map(csv_file_path=CSV_FILE_PATH):
+    market_code_map = {}
+    with open(csv_file_path) as csv_file:
+        reader = csv.reader(csv_file)
+        next(reader)  # the header
+        for code, name, _, _ in reader:
+            market_code_map[code] = name
+    return market_code_map
+
+
+def get_source_hash(enquiry_market_codes, csv_file_path=CSV_FILE_PATH):
+    """Returns a hash of everything `markets_data` is generated from, so that
+    it can be checked to be up to date.
+    """
+    source = hashlib.sha256(Path(csv_file_path).read_bytes())
+    source.update(json.dumps(enquiry_market_codes, sort_keys=True).encode("utf-8"))
+    return source.hexdigest()
+
+
+def _format_dict(name, items):
+    lines = [f"{name} = {{"]
+    for key, value in items:
+        lines.append(
+            f"    {json.dumps(key, ensure_ascii=False)}: "
+            f"{json.dumps(value, ensure_ascii=False)},"
+        )
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def generate_markets_data(enquiry_market_codes, csv_file_path=CSV_FILE_PATH):
+    """Returns the source of the `markets_data` module, which holds the market
+    names from the FCDO CSV and the enquiry markets already sorted by name.
+    """
+    market_code_map = read_market_code_map(csv_file_path)
+    markets = sorted(
+        (
+            (machine_readable_value, market_code_map[code])
+            for code, machine_readable_value in enquiry_market_codes.items()
+        ),
+        key=lambda market: market[1],
+    )
+
+    return "\n".join(
+        [
+            "# Generated by `python manage.py generate_markets_data` from the FCDO CSV",
+            "# and ENQUIRY_MARKET_CODES, don't edit it by hand.",
+            "",
+            f'SOURCE_HASH = "{get_source_hash(enquiry_market_codes, csv_file_path)}"',
+            "",
+            _format_dict("MARKET_CODE_MAP", market_code_map.items()),
+            "",
+            "# The enquiry markets sorted by name",
+            _format_dict("MARKETS_MAP", markets),
+            "",
+            "MARKETS_CHOICES = tuple(MARKETS_MAP.items())",
+            "",
+        ]
+    )
@@ -0,0 +1,403 @@
+# Generated by `python manage.py generate_markets_data` from the FCDO CSV
+# and ENQUIRY_MARKET_CODES, don't edit it by hand.
+
+SOURCE_HASH = "4458aa5d766c9922803c91fc7dda1e075f1f70262dc9b27adc65c29fc8903d01"
+
+MARKET_CODE_MAP = {
+    "AF": "Afghanistan",
+    "AL": "Albania",
+    "DZ": "Algeria",
+    "AD": "Andorra",
+    "AO": "Angola",
+    "AG": "Antigua and Barbuda",
+    "AR": "Argentina",
+    "AM": "Armenia",
+    "AU": "Australia",
+    "AT": "Austria",
+    "AZ": "Azerbaijan",
+    "BH": "Bahrain",
+    "BD": "Bangladesh",
+    "BB": "Barbados",
+    "BY": "Belarus",
+    "BE": "Belgium",
+    "BZ": "Belize",
+    "BJ": "Benin",
+    "BT": "Bhutan",
+    "BO": "Bolivia",
+    "BA": "Bosnia and Herzegovina",
+    "BW": "Botswana",
+    "BR": "Brazil",
+    "BN": "Brunei",
+    "BG": "Bulgaria",
+    "BF": "Burkina Faso",
+    "BI": "Burundi",
+    "KH": "Cambodia",
+    "CM": "Cameroon",
+    "CA": "Canada",
+    "CV": "Cape Verde",
+    "CF": "Central African Republic",
+    "TD": "Chad",
+    "CL": "Chile",
+    "CN": "China",
+    "CO": "Colombia",
+    "KM": "Comoros",
+    "CG": "Congo",
+    "CD": "Congo (Democratic Republic)",
+    "CR": "Costa Rica",
+    "HR": "Croatia",
+    "CU": "Cuba",
+    "CY": "Cyprus",
+    "CZ": "Czechia",
+    "DK": "Denmark",
+    "DJ": "Djibouti",
+    "DM": "Dominica",
+    "DO": "Dominican Republic",
+    "TL": "East Timor",
+    "EC": "Ecuador",
+    "EG": "Egypt",
+    "SV": "El Salvador",
+    "GQ": "Equatorial Guinea",
+    "ER": "Eritrea",
+    "EE": "Estonia",
+    "SZ": "Eswatini",
+    "ET": "Ethiopia",
+    "FJ": "Fiji",
+    "FI": "Finland",
+    "FR": "France",
+    "GA": "Gabon",
+    "GE": "Georgia",
+    "DE": "Germany",
+    "GH": "Ghana",
+    "GR": "Greece",
+    "GD": "Grenada",
+    "GT": "Guatemala",
+    "GN": "Guinea",
+    "GW": "Guinea-Bissau",
+    "GY": "Guyana",
+    "HT": "Haiti",
+    "HN": "Honduras",
+    "HU": "Hungary",
+    "IS": "Iceland",
+    "IN": "India",
+    "ID": "Indonesia",
+    "IR": "Iran",
+    "IQ": "Iraq",
+    "IE": "Ireland",
+    "IL": "Israel",
+    "IT": "Italy",
+    "CI": "Ivory Coast",
+    "JM": "Jamaica",
+    "JP": "Japan",
+    "JO": "Jordan",
+    "KZ": "Kazakhstan",
+    "KE": "Kenya",
+    "KI": "Kiribati",
+    "XK": "Kosovo",
+    "KW": "Kuwait",
+    "KG": "Kyrgyzstan",
+    "LA": "Laos",
+    "LV": "Latvia",
+    "LB": "Lebanon",
+    "LS": "Lesotho",
+    "LR": "Liberia",
+    "LY": "Libya",
+    "LI": "Liechtenstein",
+    "LT": "Lithuania",
+    "LU": "Luxembourg",
+    "MG": "Madagascar",
+    "MW": "Malawi",
+    "MY": "Malaysia",
+    "MV": "Maldives",
+    "ML": "Mali",
+    "MT": "Malta",
+    "MH": "Marshall Islands",
+    "MR": "Mauritania",
+    "MU": "Mauritius",
+    "MX": "Mexico",
+    "FM": "Micronesia",
+    "MD": "Moldova",
+    "MC": "Monaco",
+    "MN": "Mongolia",
+    "ME": "Montenegro",
+    "MA": "Morocco",
+    "MZ": "Mozambique",
+    "MM": "Myanmar (Burma)",
+    "NA": "Namibia",
+    "NR": "Nauru",
+    "NP": "Nepal",
+    "NL": "Netherlands",
+    "NZ": "New Zealand",
+    "NI": "Nicaragua",
+    "NE": "Niger",
+    "NG": "Nigeria",
+    "KP": "North Korea",
+    "MK": "North Macedonia",
+    "NO": "Norway",
+    "OM": "Oman",
+    "PK": "Pakistan",
+    "PW": "Palau",
+    "PA": "Panama",
+    "PG": "Papua New Guinea",
+    "PY": "Paraguay",
+    "PE": "Peru",
+    "PH": "Philippines",
+    "PL": "Poland",
+    "PT": "Portugal",
+    "QA": "Qatar",
+    "RO": "Romania",
+    "RU": "Russia",
+    "RW": "Rwanda",
+    "WS": "Samoa",
+    "SM": "San Marino",
+    "ST": "Sao Tome and Principe",
+    "SA": "Saudi Arabia",
+    "SN": "Senegal",
+    "RS": "Serbia",
+    "SC": "Seychelles",
+    "SL": "Sierra Leone",
+    "SG": "Singapore",
+    "SK": "Slovakia",
+    "SI": "Slovenia",
+    "SB": "Solomon Islands",
+    "SO": "Somalia",
+    "ZA": "South Africa",
+    "KR": "South Korea",
+    "SS": "South Sudan",
+    "ES": "Spain",
+    "LK": "Sri Lanka",
+    "KN": "St Kitts and Nevis",
+    "LC": "St Lucia",
+    "VC": "St Vincent",
+    "SD": "Sudan",
+    "SR": "Suriname",
+    "SE": "Sweden",
+    "CH": "Switzerland",
+    "SY": "Syria",
+    "TJ": "Tajikistan",
+    "TZ": "Tanzania",
+    "TH": "Thailand",
+    "BS": "The Bahamas",
+    "GM": "The Gambia",
+    "TG": "Togo",
+    "TO": "Tonga",
+    "TT": "Trinidad and Tobago",
+    "TN": "Tunisia",
+    "TR": "Turkey",
+    "TM": "Turkmenistan",
+    "TV": "Tuvalu",
+    "TW": "Taiwan",
+    "UG": "Uganda",
+    "UA": "Ukraine",
+    "AE": "United Arab Emirates",
+    "GB": "United Kingdom",
+    "US": "United States",
+    "UY": "Uruguay",
+    "UZ": "Uzbekistan",
+    "VU": "Vanuatu",
+    "VA": "Vatican City",
+    "VE": "Venezuela",
+    "VN": "Vietnam",
+    "YE": "Yemen",
+    "ZM": "Zambia",
+    "ZW": "Zimbabwe",
+}
+
+# The enquiry markets sorted by name
+MARKETS_MAP = {
+    "afghanistan__ess_export": "Afghanistan",
+    "albania__ess_export": "Albania",
+    "algeria__ess_export": "Algeria",
+    "andorra__ess_export": "Andorra",
+    "angola__ess_export": "Angola",
+    "argentina__ess_export": "Argentina",
+    "armenia__ess_export": "Armenia",
+    "australia__ess_export": "Australia",
+    "austria__ess_export": "Austria",
+    "azerbaijan__ess_export": "Azerbaijan",
+    "bahrain__ess_export": "Bahrain",
+    "bangladesh__ess_export": "Bangladesh",
+    "barbados__ess_export": "Barbados",
+    "belarus__ess_export": "Belarus",
+    "belgium__ess_export": "Belgium",
+    "belize__ess_export": "Belize",
+    "benin__ess_export": "Benin",
+    "bhutan__ess_export": "Bhutan",
+    "bolivia__ess_export": "Bolivia",
+    "bosnia_and_herzegovina__ess_export": "Bosnia and Herzegovina",
+    "botswana__ess_export": "Botswana",
+    "brazil__ess_export": "Brazil",
+    "brunei__ess_export": "Brunei",
+    "bulgaria__ess_export": "Bulgaria",
+    "burkina_faso__ess_export": "Burkina Faso",
+    "burundi__ess_export": "Burundi",
+    "cambodia__ess_export": "Cambodia",
+    "cameroon__ess_export": "Cameroon",
+    "canada__ess_export": "Canada",
+    "cape_verde__ess_export": "Cape Verde",
+    "central_african_republic__ess_export": "Central African Republic",
+    "chad__ess_export": "Chad",
+    "chile__ess_export": "Chile",
+    "china__ess_export": "China",
+    "colombia__ess_export": "Colombia",
+    "comoros__ess_export": "Comoros",
+    "congo__ess_export": "Congo",
+    "congo_democratic_republic__ess_export": "Congo (Democratic Republic)",
+    "costa_rica__ess_export": "Costa Rica",
+    "croatia__ess_export": "Croatia",
+    "cuba__ess_export": "Cuba",
+    "cyprus__ess_export": "Cyprus",
+    "czechia__ess_export": "Czechia",
+    "denmark__ess_export": "Denmark",
+    "djibouti__ess_export": "Djibouti",
+    "dominica__ess_export": "Dominica",
+    "dominican_republic__ess_export": "Dominican Republic",
+    "east_timor__ess_export": "East Timor",
+    "ecuador__ess_export": "Ecuador",
+    "egypt__ess_export": "Egypt",
+    "el_salvador__ess_export": "El Salvador",
+    "equatorial_guinea__ess_export": "Equatorial Guinea",
+    "eritrea__ess_export": "Eritrea",
+    "estonia__ess_export": "Estonia",
+    "eswatini__ess_export": "Eswatini",
+    "ethiopia__ess_export": "Ethiopia",
+    "fiji__ess_export": "Fiji",
+    "finland__ess_export": "Finland",
+    "france__ess_export": "France",
+    "gabon__ess_export": "Gabon",
+    "georgia__ess_export": "Georgia",
+    "germany__ess_export": "Germany",
+    "ghana__ess_export": "Ghana",
+    "greece__ess_export": "Greece",
+    "grenada__ess_export": "Grenada",
+    "guatemala__ess_export": "Guatemala",
+    "guinea__ess_export": "Guinea",
+    "guinea_bissau__ess_export": "Guinea-Bissau",
+    "guyana__ess_export": "Guyana",
+    "haiti__ess_export": "Haiti",
+    "honduras__ess_export": "Honduras",
+    "hungary__ess_export": "Hungary",
+    "iceland__ess_export": "Iceland",
+    "india__ess_export": "India",
+    "indonesia__ess_export": "Indonesia",
+    "iran__ess_export": "Iran",
+    "iraq__ess_export": "Iraq",
+    "ireland__ess_export": "Ireland",
+    "israel__ess_export": "Israel",
+    "italy__ess_export": "Italy",
+    "ivory_coast__ess_export": "Ivory Coast",
+    "jamaica__ess_export": "Jamaica",
+    "japan__ess_export": "Japan",
+    "jordan__ess_export": "Jordan",
+    "kazakhstan__ess_export": "Kazakhstan",
+    "kenya__ess_export": "Kenya",
+    "kiribati__ess_export": "Kiribati",
+    "kosovo__ess_export": "Kosovo",
+    "kuwait__ess_export": "Kuwait",
+    "kyrgyzstan__ess_export": "Kyrgyzstan",
+    "laos__ess_export": "Laos",
+    "latvia__ess_export": "Latvia",
+    "lebanon__ess_export": "Lebanon",
+    "lesotho__ess_export": "Lesotho",
+    "liberia__ess_export": "Liberia",
+    "libya__ess_export": "Libya",
+    "liechtenstein__ess_export": "Liechtenstein",
+    "lithuania__ess_export": "Lithuania",
+    "luxembourg__ess_export": "Luxembourg",
+    "madagascar__ess_export": "Madagascar",
+    "malawi__ess_export": "Malawi",
+    "malaysia__ess_export": "Malaysia",
+    "maldives__ess_export": "Maldives",
+    "mali__ess_export": "Mali",
+    "malta__ess_export": "Malta",
+    "marshall_islands__ess_export": "Marshall Islands",
+    "mauritania__ess_export": "Mauritania",
+    "mauritius__ess_export": "Mauritius",
+    "mexico__ess_export": "Mexico",
+    "micronesia__ess_export": "Micronesia",
+    "moldova__ess_export": "Moldova",
+    "monaco__ess_export": "Monaco",
+    "mongolia__ess_export": "Mongolia",
+    "montenegro__ess_export": "Montenegro",
+    "morocco__ess_export": "Morocco",
+    "mozambique__ess_export": "Mozambique",
+    "myanmar__ess_export": "Myanmar (Burma)",
+    "namibia__ess_export": "Namibia",
+    "nauru__ess_export": "Nauru",
+    "nepal__ess_export": "Nepal",
+    "netherland__ess_export": "Netherlands",
+    "new_zealand__ess_export": "New Zealand",
+    "nicaragua__ess_export": "Nicaragua",
+    "niger__ess_export": "Niger",
+    "nigeria__ess_export": "Nigeria",
+    "north_korea__ess_export": "North Korea",
+    "north_macedonia__ess_export": "North Macedonia",
+    "norway__ess_export": "Norway",
+    "oman__ess_export": "Oman",
+    "pakistan__ess_export": "Pakistan",
+    "palau__ess_export": "Palau",
+    "panama__ess_export": "Panama",
+    "papua_new_guinea__ess_export": "Papua New Guinea",
+    "paraguay__ess_export": "Paraguay",
+    "peru__ess_export": "Peru",
+    "philippines__ess_export": "Philippines",
+    "poland__ess_export": "Poland",
+    "portugal__ess_export": "Portugal",
+    "qatar__ess_export": "Qatar",
+    "romania__ess_export": "Romania",
+    "russia__ess_export": "Russia",
+    "rwanda__ess_export": "Rwanda",
+    "samoa__ess_export": "Samoa",
+    "san_marino__ess_export": "San Marino",
+    "sao_tome_and_principe__ess_export": "Sao Tome and Principe",
+    "saudi_arabia__ess_export": "Saudi Arabia",
+    "senegal__ess_export": "Senegal",
+    "serbia__ess_export": "Serbia",
+    "seychelles__ess_export": "Seychelles",
+    "sierra_leone__ess_export": "Sierra Leone",
+    "singapore__ess_export": "Singapore",
+    "slovakia__ess_export": "Slovakia",
+    "slovenia__ess_export": "Slovenia",
+    "solomon_islands__ess_export": "Solomon Islands",
+    "somalia__ess_export": "Somalia",
+    "south_africa__ess_export": "South Africa",
+    "south_korea__ess_export": "South Korea",
+    "south_sudan__ess_export": "South Sudan",
+    "spain__ess_export": "Spain",
+    "sri_lanka__ess_export": "Sri Lanka",
+    "st_kitts_and_nevis__ess_export": "St Kitts and Nevis",
+    "st_lucia__ess_export": "St Lucia",
+    "st_vincent__ess_export": "St Vincent",
+    "sudan__ess_export": "Sudan",
+    "suriname__ess_export": "Suriname",
+    "sweden__ess_export": "Sweden",
+    "switzerland__ess_export": "Switzerland",
+    "syria__ess_export": "Syria",
+    "taiwan__ess_export": "Taiwan",
+    "tajikistan__ess_export": "Tajikistan",
+    "tanzania__ess_export": "Tanzania",
+    "thailand__ess_export": "Thailand",
+    "the_bahamas__ess_export": "The Bahamas",
+    "the_gambia__ess_export": "The Gambia",
+    "togo__ess_export": "Togo",
+    "tonga__ess_export": "Tonga",
+    "trinidad_and_tobago__ess_export": "Trinidad and Tobago",
+    "unisia__ess_export": "Tunisia",
+    "turkey__ess_export": "Turkey",
+    "turkmenistan__ess_export": "Turkmenistan",
+    "tuvalu__ess_export": "Tuvalu",
+    "uganda__ess_export": "Uganda",
+    "ukraine__ess_export": "Ukraine",
+    "united_arab_emirates__ess_export": "United Arab Emirates",
+    "united_states__ess_export": "United States",
+    "uruguay__ess_export": "Uruguay",
+    "uzbekistan__ess_export": "Uzbekistan",
+    "vanuatu__ess_export": "Vanuatu",
+    "vatican_city__ess_export": "Vatican City",
+    "venezuela__ess_export": "Venezuela",
+    "vietnam__ess_export": "Vietnam",
+    "yemen__ess_export": "Yemen",
+    "zambia__ess_export": "Zambia",
+    "zimbabwe__ess_export": "Zimbabwe",
+}
+
+MARKETS_CHOICES = tuple(MARKETS_MAP.items())
@@ -1,5 +1,7 @@
 from django.utils.cache import patch_cache_control
 
+from .analytics import track_page_view
+
 
 def no_index_middleware(get_response):
     def middleware(request):
@@ -24,3 +26,17 @@ def no_cache_middleware(get_response):
         return response
 
     return middleware
+
+
+def page_view_tracking_middleware(get_response):
+    # The same as django_ga_measurement_protocol's middleware except that the
+    # page views are sent in the background
+    def middleware(request):
+        response = get_response(request)
+
+        if response.status_code == 200:
+            track_page_view(request)
+
+        return response
+
+    return middleware
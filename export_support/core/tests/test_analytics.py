@@ -0,0 +1,108 @@
+import time
+from urllib.parse import parse_qs
+
+import pytest
+from django.http import HttpResponse, HttpResponseNotFound
+
+from ..analytics import GOOGLE_ANALYTICS_BATCH_ENDPOINT, HitDispatcher
+from ..middleware import page_view_tracking_middleware
+
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = HitDispatcher(max_queue_size=100, flush_interval=60, timeout=1)
+    yield dispatcher
+    dispatcher.stopped.set()
+    dispatcher.wake.set()
+
+
+def _get_hits(request):
+    return [parse_qs(hit) for hit in request.text.split("\n")]
+
+
+def test_dispatcher_batches_hits(dispatcher, requests_mock, mocker):
+    mocker.patch.object(dispatcher, "_start")
+    requests_mock.post(GOOGLE_ANALYTICS_BATCH_ENDPOINT)
+
+    for index in range(45):
+        dispatcher.enqueue({"t": "pageview", "dl": f"/page/{index}", "dr": None})
+    dispatcher.flush()
+
+    batches = [_get_hits(request) for request in requests_mock.request_history]
+    assert [len(batch) for batch in batches] == [20, 20, 5]
+    assert batches[0][0] == {"t": ["pageview"], "dl": ["/page/0"]}
+    assert dispatcher.stats == {"queued": 45, "dropped": 0, "sent": 45, "failed": 0}
+
+
+def test_dispatcher_drops_oldest_hits(requests_mock, mocker):
+    dispatcher = HitDispatcher(max_queue_size=3, flush_interval=60, timeout=1)
+    mocker.patch.object(dispatcher, "_start")
+    requests_mock.post(GOOGLE_ANALYTICS_BATCH_ENDPOINT)
+
+    for index in range(5):
+        dispatcher.enqueue({"t": "pageview", "dl": f"/page/{index}"})
+    dispatcher.flush()
+
+    (batch,) = [_get_hits(request) for request in requests_mock.request_history]
+    assert [hit["dl"] for hit in batch] == [["/page/2"], ["/page/3"], ["/page/4"]]
+    assert dispatcher.stats["dropped"] == 2
+
+
+def test_dispatcher_send_failure(dispatcher, requests_mock, mocker):
+    mocker.patch.object(dispatcher, "_start")
+    requests_mock.post(GOOGLE_ANALYTICS_BATCH_ENDPOINT, status_code=500)
+
+    dispatcher.enqueue({"t": "pageview"})
+    dispatcher.flush()
+
+    assert dispatcher.stats["failed"] == 1
+    assert not dispatcher.hits
+
+
+def test_dispatcher_sends_in_background(dispatcher, requests_mock):
+    requests_mock.post(GOOGLE_ANALYTICS_BATCH_ENDPOINT)
+
+    # a full batch is sent without waiting for the flush interval
+    for _ in range(20):
+        dispatcher.enqueue({"t": "pageview"})
+
+    for _ in range(100):
+        if dispatcher.stats["sent"]:
+            break
+        time.sleep(0.01)
+    assert dispatcher.stats["sent"] == 20
+    assert dispatcher.thread.is_alive()
+
+
+def test_dispatcher_shutdown_flushes_hits(dispatcher, requests_mock):
+    requests_mock.post(GOOGLE_ANALYTICS_BATCH_ENDPOINT)
+
+    dispatcher.enqueue({"t": "pageview"})
+    dispatcher.shutdown()
+
+    assert not dispatcher.thread.is_alive()
+    assert dispatcher.stats["sent"] == 1
+
+
+@pytest.mark.parametrize(
+    "track_events,response,expected_calls",
+    [
+        (True, HttpResponse(), 1),
+        (True, HttpResponseNotFound(), 0),
+        (False, HttpResponse(), 0),
+    ],
+)
+def test_page_view_tracking_middleware(
+    rf, settings, mocker, track_events, response, expected_calls
+):
+    settings.GA_MEASUREMENT_PROTOCOL_TRACK_EVENTS = track_events
+    mock_enqueue = mocker.patch("export_support.core.analytics.dispatcher.enqueue")
+
+    middleware = page_view_tracking_middleware(lambda request: response)
+    assert middleware(rf.get("/enquiry/")) is response
+
+    assert mock_enqueue.call_count == expected_calls
+    if expected_calls:
+        (tracking_data,) = mock_enqueue.call_args.args
+        assert tracking_data["t"] == "pageview"
+        assert tracking_data["dl"] == "http://testserver/enquiry/"
@@ -0,0 +1,105 @@
+import pytest
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache
+
+from ..duplicate_submissions import (
+    DUPLICATES_COUNT_KEY,
+    duplicate_submission_guard,
+    get_duplicates_count,
+    get_submission_key,
+)
+
+
+@pytest.fixture
+def request_with_session(rf):
+    request = rf.post("/")
+    request.session = SessionStore()
+    request.session.create()
+    yield request
+    key = get_submission_key(request, {"question": "A question"})
+    cache.delete_many([key, f"{key}:in-flight"])
+    cache.delete(DUPLICATES_COUNT_KEY)
+
+
+@pytest.fixture(autouse=True)
+def duplicate_submission_ttl(settings):
+    settings.ZENDESK_DUPLICATE_SUBMISSION_TTL = 60
+
+
+def test_get_submission_key_normalises_data(request_with_session):
+    assert get_submission_key(
+        request_with_session, {"question": "A  question ", "sectors": ["a", "b"]}
+    ) == get_submission_key(
+        request_with_session, {"sectors": ("a", "b"), "question": "A question"}
+    )
+
+
+def test_get_submission_key_per_session(request_with_session, rf):
+    other_request = rf.post("/")
+    other_request.session = SessionStore()
+    other_request.session.create()
+
+    assert get_submission_key(
+        request_with_session, {"question": "A question"}
+    ) != get_submission_key(other_request, {"question": "A question"})
+
+
+def test_duplicate_submission_guard(request_with_session):
+    data = {"question": "A question"}
+
+    with duplicate_submission_guard(request_with_session, data) as is_duplicate:
+        assert not is_duplicate
+
+    for count in [1, 2]:
+        with duplicate_submission_guard(request_with_session, data) as is_duplicate:
+            assert is_duplicate
+        assert get_duplicates_count() == count
+
+
+def test_duplicate_submission_guard_failed_submission(request_with_session):
+    data = {"question": "A question"}
+
+    with pytest.raises(ValueError):
+        with duplicate_submission_guard(request_with_session, data):
+            raise ValueError()
+
+    with duplicate_submission_guard(request_with_session, data) as is_duplicate:
+        assert not is_duplicate
+
+
+def test_duplicate_submission_guard_in_flight(request_with_session):
+    data = {"question": "A question"}
+
+    with duplicate_submission_guard(request_with_session, data) as is_duplicate:
+        assert not is_duplicate
+        with duplicate_submission_guard(request_with_session, data) as is_duplicate:
+            assert is_duplicate
+        assert get_duplicates_count() == 1
+
+    with duplicate_submission_guard(request_with_session, data) as is_duplicate:
+        assert is_duplicate
+
+
+def test_duplicate_submission_guard_dead_worker(request_with_session):
+    data = {"question": "A question"}
+    key = get_submission_key(request_with_session, data)
+
+    # a worker that died whilst sending the submission leaves its claim behind
+    # until the claim expires, but doesn't mark the submission as sent
+    guard = duplicate_submission_guard(request_with_session, data)
+    assert not guard.__enter__()
+    with duplicate_submission_guard(request_with_session, data) as is_duplicate:
+        assert is_duplicate
+
+    cache.delete(f"{key}:in-flight")
+    with duplicate_submission_guard(request_with_session, data) as is_duplicate:
+        assert not is_duplicate
+
+
+def test_duplicate_submission_guard_disabled(request_with_session, settings):
+    settings.ZENDESK_DUPLICATE_SUBMISSION_TTL = 0
+    data = {"question": "A question"}
+
+    for _ in range(2):
+        with duplicate_submission_guard(request_with_session, data) as is_duplicate:
+            assert not is_duplicate
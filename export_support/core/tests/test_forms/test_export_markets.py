@@ -1,3 +1,5 @@
+from export_support.gds.fields import CheckboxSelectMultiple
+
 from ...consts import ENQUIRY_MARKET_CODES
 from ...forms import ExportMarketsForm
 
@@ -126,3 +128,22 @@ def test_get_zendesk_data():
     assert form.get_zendesk_data() == {
         "markets": "Albania, Cyprus, Latvia",
     }
+
+
+def test_export_markets_markets_rendering():
+    data = {
+        "markets": [
+            "albania__ess_export",
+            "cyprus__ess_export",
+            "latvia__ess_export",
+        ],
+    }
+    form = ExportMarketsForm(data, prefix="export-markets")
+    field = form["markets"]
+
+    expected = CheckboxSelectMultiple(choices=field.field.choices).render(
+        field.html_name,
+        field.value(),
+        attrs={"id": field.auto_id},
+    )
+    assert str(field) == expected
@@ -0,0 +1,47 @@
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+from ..forms_api import forms_api_client, get_session_stats, session
+
+
+def test_forms_api_client_uses_shared_session(requests_mock, mocker):
+    mock_send = mocker.spy(session, "send")
+    requests_mock.post(
+        forms_api_client.build_url(
+            settings.DIRECTORY_FORMS_API_BASE_URL, "api/submission/"
+        ),
+        status_code=201,
+    )
+
+    for _ in range(2):
+        response = forms_api_client.submit_generic({"data": {}, "meta": {}})
+        assert response.status_code == 201
+
+    assert mock_send.call_count == 2
+    prepared_request = mock_send.call_args.args[0]
+    assert "X-Signature" in prepared_request.headers
+    assert mock_send.call_args.kwargs["timeout"] == (
+        settings.DIRECTORY_FORMS_API_CONNECT_TIMEOUT,
+        settings.DIRECTORY_FORMS_API_DEFAULT_TIMEOUT,
+    )
+
+
+def test_forms_api_session_retries():
+    adapter = session.get_adapter(settings.DIRECTORY_FORMS_API_BASE_URL)
+
+    assert adapter.max_retries.total == settings.DIRECTORY_FORMS_API_RETRIES
+    # a submission that may have reached the API is never sent again
+    assert "POST" not in adapter.max_retries.allowed_methods
+
+
+def test_forms_api_session_stats():
+    base_url = urlparse(settings.DIRECTORY_FORMS_API_BASE_URL)
+    adapter = session.get_adapter(settings.DIRECTORY_FORMS_API_BASE_URL)
+    adapter.poolmanager.connection_from_url(settings.DIRECTORY_FORMS_API_BASE_URL)
+
+    assert any(
+        pool["host"] == base_url.hostname
+        and pool["maxsize"] == settings.DIRECTORY_FORMS_API_POOL_MAXSIZE
+        for pool in get_session_stats()
+    )
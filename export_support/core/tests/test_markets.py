@@ -0,0 +1,38 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+from .. import markets_data
+from ..consts import ENQUIRY_MARKET_CODES, MARKETS_CHOICES, MARKETS_MAP
+from ..markets import generate_markets_data, get_market_name_from_code
+
+
+def test_markets_data_is_up_to_date():
+    # Run `python manage.py generate_markets_data` if this fails
+    call_command("generate_markets_data", "--check")
+
+
+def test_markets_data_out_of_date(mocker):
+    mocker.patch.object(markets_data, "SOURCE_HASH", "changed")
+
+    with pytest.raises(CommandError):
+        call_command("generate_markets_data", "--check")
+
+
+def test_generate_markets_data(tmp_path):
+    output = tmp_path / "markets_data.py"
+    call_command("generate_markets_data", "--output", str(output))
+
+    assert output.read_text() == generate_markets_data(ENQUIRY_MARKET_CODES)
+
+    generated = {}
+    exec(output.read_text(), generated)
+    assert list(generated["MARKETS_MAP"].items()) == sorted(
+        (
+            (machine_readable_value, get_market_name_from_code(code))
+            for code, machine_readable_value in ENQUIRY_MARKET_CODES.items()
+        ),
+        key=lambda market: market[1],
+    )
+    assert generated["MARKETS_MAP"] == MARKETS_MAP
+    assert generated["MARKETS_CHOICES"] == MARKETS_CHOICES
+    assert generated["MARKET_CODE_MAP"]["GB"] == "United Kingdom"
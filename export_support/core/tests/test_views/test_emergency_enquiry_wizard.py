@@ -1,9 +1,13 @@
 import logging
 
 import pytest
+from django.core.cache import cache
 from django.urls import reverse
 from pytest_django.asserts import assertTemplateUsed
 
+from ...duplicate_submissions import DUPLICATES_COUNT_KEY, get_duplicates_count
+from ...forms_api import forms_api_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -62,6 +66,7 @@ def test_submit_russia_ukraine_form(client, settings, mocker):
     assert response.status_code == 200
 
     mock_zendesk_form.assert_called_with(
+        client=forms_api_client,
         form_url="FORM_URL",
         full_name="Jimmy Space",
         email_address="jimmy.space@test.com",
@@ -165,6 +170,7 @@ def test_submit_israel_palestine_form(client, settings, mocker):
     assert response.status_code == 200
 
     mock_zendesk_form.assert_called_with(
+        client=forms_api_client,
         form_url="FORM_URL",
         full_name="Jimmy Space",
         email_address="jimmy.space@test.com",
@@ -261,3 +267,40 @@ def test_zendesk_form_invalid(client, settings, mocker):
     mock_zendesk_form_is_valid.assert_called()
     mock_zendesk_form.assert_not_called()
     mock_zendesk_form().save.assert_not_called()
+
+
+def test_submit_form_twice(client, settings, mocker):
+    settings.ZENDESK_DUPLICATE_SUBMISSION_TTL = 60
+    cache.delete(DUPLICATES_COUNT_KEY)
+
+    mock_zendesk_form = mocker.patch(
+        "export_support.core.forms.EmergencySituationZendeskForm.action_class"
+    )
+
+    url = reverse(
+        "core:ru-emergency-situation-wizard-step", kwargs={"step": "enquiry-form"}
+    )
+    done_url = reverse(
+        "core:ru-emergency-situation-wizard-step", kwargs={"step": "done"}
+    )
+    data = {
+        "emergency_situation_enquiry_wizard_view-current_step": "enquiry-form",
+        "enquiry-form-full_name": "Jimmy Space",
+        "enquiry-form-email": "jimmy.space@test.com",
+        "enquiry-form-phone": "07786179011",
+        "enquiry-form-company_name": "Golden Throne Inc.",
+        "enquiry-form-company_post_code": "te51aa",
+        "enquiry-form-sectors": ["chemicals__ess_sector_l1"],
+        "enquiry-form-other": "",
+        "enquiry-form-question": "I have a question",
+    }
+
+    for _ in range(2):
+        response = client.post(url, data)
+        assert response.status_code == 302
+        response = client.get(done_url)
+        assert response.status_code == 200
+        assertTemplateUsed(response, "core/enquiry_contact_success.html")
+
+    mock_zendesk_form().save.assert_called_once()
+    assert get_duplicates_count() == 1
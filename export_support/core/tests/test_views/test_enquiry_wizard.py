@@ -3,14 +3,17 @@ from enum import Enum
 
 import pytest
 import requests_mock
+from django.contrib.sessions.backends.cache import SessionStore
 from django.test import Client
 from django.urls import reverse
+from formtools.wizard.storage import get_storage
 from pytest_django.asserts import assertTemplateUsed
 
 from ...consts import ENQUIRY_MARKET_CODES
 from ...forms import (
     SECTORS_MAP,
     BusinessTypeChoices,
+    BusinessTypeForm,
     CompanyTurnoverChoices,
     DoYouHaveAProductYouWantToExportChoices,
     EnquirySubjectChoices,
@@ -23,6 +26,8 @@ from ...forms import (
     PrivateOrPublicCompanyTypeChoices,
     SoloExporterTypeChoices,
 )
+from ...forms_api import forms_api_client
+from ...views import EnquiryWizardView
 
 logger = logging.getLogger(__name__)
 
@@ -249,6 +254,7 @@ def test_full_steps_private_or_limited_business_type_wizard_success(
     assertTemplateUsed(response, "core/enquiry_contact_success.html")
 
     mock_zendesk_form_action_class.assert_called_with(
+        client=forms_api_client,
         form_url="FORM_URL",
         full_name="Firstname Lastname",
         email_address="test@example.com",
@@ -478,6 +484,7 @@ def test_full_steps_other_organisation_business_type_wizard_success(
     assertTemplateUsed(response, "core/enquiry_contact_success.html")
 
     mock_zendesk_form_action_class.assert_called_with(
+        client=forms_api_client,
         form_url="FORM_URL",
         full_name="Firstname Lastname",
         email_address="test@example.com",
@@ -711,6 +718,7 @@ def test_full_steps_solo_exporter_business_type_wizard_success(
     assertTemplateUsed(response, "core/enquiry_contact_success.html")
 
     mock_zendesk_form_action_class.assert_called_with(
+        client=forms_api_client,
         form_url="FORM_URL",
         full_name="Firstname Lastname",
         email_address="test@example.com",
@@ -944,6 +952,7 @@ def test_full_steps_private_or_limited_business_type_wizard_success_custom_field
     assertTemplateUsed(response, "core/enquiry_contact_success.html")
 
     mock_zendesk_form_action_class.assert_called_with(
+        client=forms_api_client,
         form_url="FORM_URL",
         full_name="Firstname Lastname",
         email_address="test@example.com",
@@ -1197,6 +1206,7 @@ def test_full_steps_other_organisation_business_type_wizard_success_custom_field
     assertTemplateUsed(response, "core/enquiry_contact_success.html")
 
     mock_zendesk_form_action_class.assert_called_with(
+        client=forms_api_client,
         form_url="FORM_URL",
         full_name="Firstname Lastname",
         email_address="test@example.com",
@@ -1443,6 +1453,7 @@ def test_full_steps_solo_exporter_business_type_wizard_success_custom_fields(
     assertTemplateUsed(response, "core/enquiry_contact_success.html")
 
     mock_zendesk_form_action_class.assert_called_with(
+        client=forms_api_client,
         form_url="FORM_URL",
         full_name="Firstname Lastname",
         email_address="test@example.com",
@@ -1686,6 +1697,7 @@ def test_full_steps_wizard_success_private_custom_fields_are_ignored(
     assertTemplateUsed(response, "core/enquiry_contact_success.html")
 
     mock_zendesk_form_action_class.assert_called_with(
+        client=forms_api_client,
         form_url="FORM_URL",
         full_name="Firstname Lastname",
         email_address="test@example.com",
@@ -2116,6 +2128,35 @@ def test_enquiry_subject_choices_context_data(run_wizard_enquiry_subject):
     assert ctx["display_subheadings"]
 
 
+@pytest.mark.django_db
+def test_zendesk_data_computed_once_per_step(run_wizard_enquiry_subject, mocker):
+    mock_get_step_zendesk_data = mocker.spy(EnquiryWizardView, "get_step_zendesk_data")
+
+    run_wizard_enquiry_subject([EnquirySubjectChoices.SELLING_GOODS_ABROAD])
+
+    # once as each of the eight steps is posted and not again when submitting
+    assert mock_get_step_zendesk_data.call_count == 8
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "storage_name",
+    [
+        "export_support.core.wizard_storage.CompactSessionStorage",
+        "export_support.core.wizard_storage.RedisHashStorage",
+        "export_support.core.wizard_storage.EncryptedCookieStorage",
+    ],
+)
+def test_wizard_storage_success(run_wizard_enquiry_subject, mocker, storage_name):
+    mocker.patch.object(EnquiryWizardView, "storage_name", storage_name)
+
+    response = run_wizard_enquiry_subject([EnquirySubjectChoices.SELLING_GOODS_ABROAD])
+
+    ctx = response.context
+    assert ctx["display_goods"]
+    assert not ctx["display_services"]
+
+
 @pytest.fixture
 def run_wizard_enquiry_subject_guidance_url():
     def run(enquiry_subject):
@@ -2219,3 +2260,75 @@ def test_enquiry_subject_guidance_url(run_wizard_enquiry_subject_guidance_url, m
     assert (
         ctx["guidance_url"] == f"{reverse('core:not-listed-market-export-enquiries')}?"
     )
+
+
+@pytest.mark.django_db
+def test_business_type_validated_once_per_request(client, mocker):
+    client.get(reverse("core:enquiry-wizard"))
+    for step_name, data in [
+        (
+            "enquiry-subject",
+            {"enquiry_subject": [EnquirySubjectChoices.SELLING_GOODS_ABROAD]},
+        ),
+        ("export-markets", {"markets": ["mexico__ess_export"]}),
+        (
+            "personal-details",
+            {
+                "first_name": "Firstname",
+                "last_name": "Lastname",
+                "email": "test@example.com",
+                "on_behalf_of": OnBehalfOfChoices.OWN_COMPANY,
+            },
+        ),
+    ]:
+        response = client.post(get_step_url(step_name), get_form_data(step_name, data))
+        assert response.status_code == 302
+
+    business_type_full_clean = mocker.spy(BusinessTypeForm, "full_clean")
+
+    business_type_url = get_step_url("business-type")
+    response = client.post(
+        business_type_url,
+        get_form_data(
+            "business-type",
+            {"business_type": BusinessTypeChoices.OTHER},
+        ),
+    )
+    assert response.status_code == 302
+    assert response.url == get_step_url("organisation-details")
+    # once for the posted form and once for the stored data after it changed
+    assert business_type_full_clean.call_count == 2
+
+    business_type_full_clean.reset_mock()
+    response = client.get(get_step_url("organisation-details"))
+    assert response.status_code == 200
+    assert_number_of_steps(response, current_step_number=5, total_number_of_steps=8)
+    assert business_type_full_clean.call_count == 1
+
+
+def test_cleaned_data_for_step_follows_stored_data(rf):
+    request = rf.get(get_step_url("business-type"))
+    request.session = SessionStore()
+    view = EnquiryWizardView(
+        **EnquiryWizardView.get_initkwargs(url_name="core:enquiry-wizard-step")
+    )
+    view.setup(request)
+    view.storage = get_storage(view.storage_name, "enquiry_wizard_view", request)
+
+    def set_business_type(business_type):
+        view.storage.set_step_data(
+            "business-type", {"business-type-business_type": [str(business_type)]}
+        )
+
+    set_business_type(BusinessTypeChoices.OTHER)
+    assert view.get_cleaned_data_for_step("business-type") == {
+        "business_type": BusinessTypeChoices.OTHER
+    }
+
+    set_business_type(BusinessTypeChoices.PRIVATE_OR_LIMITED)
+    assert view.get_cleaned_data_for_step("business-type") == {
+        "business_type": BusinessTypeChoices.PRIVATE_OR_LIMITED
+    }
+
+    view.storage.reset()
+    assert view.get_cleaned_data_for_step("business-type") is None
@@ -0,0 +1,30 @@
+from django.forms.renderers import get_default_renderer
+from django.template import engines
+
+from ..warm_up import WIDGET_TEMPLATES, get_template_names, warm_up_templates
+
+
+def _get_cached_templates(engine):
+    (loader,) = engine.template_loaders
+    return loader.get_template_cache
+
+
+def test_get_template_names():
+    template_names = get_template_names()
+
+    assert "core/wizard_step.html" in template_names
+    assert "core/export_markets_wizard_step.html" in template_names
+    assert "gds/forms/form_group.html" in template_names
+    assert "gds/forms/fields/radio_select.html" in template_names
+
+
+def test_warm_up_templates():
+    engine = engines["django"].engine
+    form_engine = get_default_renderer().engine.engine
+    for each_engine in [engine, form_engine]:
+        each_engine.template_loaders[0].reset()
+
+    assert warm_up_templates() == len(get_template_names()) + len(WIDGET_TEMPLATES)
+
+    assert set(get_template_names()) <= set(_get_cached_templates(engine))
+    assert set(WIDGET_TEMPLATES) <= set(_get_cached_templates(form_engine))
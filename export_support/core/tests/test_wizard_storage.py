@@ -0,0 +1,311 @@
+import json
+
+import pytest
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache
+from django.http import HttpResponse, QueryDict
+from redis import Redis
+
+from ..consts import MARKETS_MAP, SECTORS_MAP
+from ..wizard_storage import (
+    CompactSessionStorage,
+    EncryptedCookieStorage,
+    RedisHashStorage,
+    decode_extra_data,
+    decode_step_data,
+    encode_extra_data,
+    encode_step_data,
+)
+
+
+@pytest.fixture
+def storage(rf):
+    request = rf.get("/")
+    request.session = SessionStore()
+    return CompactSessionStorage("enquiry_wizard_view", request)
+
+
+def test_encode_step_data_indexes_choices():
+    markets = list(MARKETS_MAP)
+    data = {
+        "csrfmiddlewaretoken": ["token"],
+        "enquiry_wizard_view-current_step": ["export-markets"],
+        "export-markets-markets": markets,
+    }
+
+    encoded = encode_step_data(data)
+
+    assert len(encoded) < len(json.dumps(data)) / 10
+    assert decode_step_data(encoded) == {
+        "enquiry_wizard_view-current_step": ["export-markets"],
+        "export-markets-markets": markets,
+    }
+
+
+def test_encode_step_data_unordered_choices():
+    sectors = list(SECTORS_MAP)
+    data = {"sectors-sectors": [sectors[3], sectors[1], sectors[3]]}
+
+    assert decode_step_data(encode_step_data(data)) == data
+
+
+def test_encode_step_data_unknown_choices():
+    data = {
+        "sectors-sectors": [list(SECTORS_MAP)[0], "unknown"],
+        "sectors-other": ["Another sector"],
+    }
+
+    assert decode_step_data(encode_step_data(data)) == data
+
+
+def test_encode_step_data_short():
+    data = {"business-type-business_type": ["1"]}
+
+    encoded = encode_step_data(data)
+
+    assert encoded.startswith("j")
+    assert decode_step_data(encoded) == data
+
+
+def test_decode_step_data_changed_choices(mocker):
+    encoded = encode_step_data({"sectors-sectors": list(SECTORS_MAP)[:2]})
+
+    mocker.patch("export_support.core.wizard_storage.CHOICES_FINGERPRINT", "changed")
+    assert decode_step_data(encoded) is None
+
+
+def test_compact_session_storage(storage):
+    data = QueryDict(mutable=True)
+    data.setlist("export-markets-markets", list(MARKETS_MAP)[:100])
+    data["csrfmiddlewaretoken"] = "token"
+
+    storage.set_step_data("export-markets", data)
+
+    stored = storage.request.session[storage.prefix]["step_data"]["export-markets"]
+    assert isinstance(stored, str)
+    assert (
+        storage.get_step_data("export-markets").getlist("export-markets-markets")
+        == list(MARKETS_MAP)[:100]
+    )
+    assert storage.get_step_data("sectors") is None
+    assert storage.data["bytes_saved"] > 0
+
+
+def test_compact_session_storage_uncompacted_data(storage):
+    storage.data["step_data"]["business-type"] = {"business-type-business_type": ["1"]}
+
+    step_data = storage.get_step_data("business-type")
+    assert step_data.getlist("business-type-business_type") == ["1"]
+
+
+def _get_markets_extra_data():
+    markets = ", ".join(MARKETS_MAP.values())
+    return {
+        "zendesk_data": {
+            "export-markets": {"form_data": {"markets": markets}, "custom_fields": []}
+        }
+    }
+
+
+def test_encode_extra_data():
+    extra_data = _get_markets_extra_data()
+
+    encoded = encode_extra_data(extra_data)
+
+    assert len(encoded) < len(json.dumps(extra_data)) / 10
+    assert decode_extra_data(encoded) == extra_data
+
+
+def test_encode_extra_data_short():
+    extra_data = {"zendesk_data": {}}
+
+    encoded = encode_extra_data(extra_data)
+
+    assert encoded.startswith("j")
+    assert decode_extra_data(encoded) == extra_data
+
+
+def test_decode_extra_data_changed_dictionary(mocker):
+    encoded = encode_extra_data(_get_markets_extra_data())
+
+    mocker.patch(
+        "export_support.core.wizard_storage.ZENDESK_DATA_DICTIONARY",
+        b"Changed markets",
+    )
+    assert decode_extra_data(encoded) == {}
+
+
+def test_compact_session_storage_extra_data(storage):
+    assert storage.extra_data == {}
+
+    storage.extra_data = _get_markets_extra_data()
+
+    stored = storage.request.session[storage.prefix]["extra_data"]
+    assert isinstance(stored, str)
+    assert storage.extra_data == _get_markets_extra_data()
+    assert storage.data["bytes_saved"] > len(json.dumps(_get_markets_extra_data())) / 2
+
+    storage.extra_data = {}
+    assert storage.request.session[storage.prefix]["extra_data"] == {}
+
+
+@pytest.fixture
+def redis_storage(rf):
+    def get_storage(session):
+        request = rf.get("/")
+        request.session = session
+        return RedisHashStorage("enquiry_wizard_view", request)
+
+    return get_storage
+
+
+def test_redis_hash_storage(redis_storage, mocker):
+    mock_pipeline = mocker.spy(Redis, "pipeline")
+    mock_hgetall = mocker.spy(Redis, "hgetall")
+
+    session = SessionStore()
+    storage = redis_storage(session)
+    storage.current_step = "business-type"
+    storage.set_step_data("business-type", {"business-type-business_type": ["1"]})
+    storage.extra_data = {"zendesk_data": {"business-type": {}}}
+    storage.update_response(HttpResponse())
+
+    mock_pipeline.assert_called_once()
+    assert storage.redis.ttl(storage.key) > 0
+
+    mock_pipeline.reset_mock()
+    mock_hgetall.reset_mock()
+    storage = redis_storage(session)
+    assert storage.current_step == "business-type"
+    assert storage.get_step_data("business-type").getlist(
+        "business-type-business_type"
+    ) == ["1"]
+    assert storage.get_step_data("sectors") is None
+    assert storage.extra_data == {"zendesk_data": {"business-type": {}}}
+    storage.update_response(HttpResponse())
+
+    mock_hgetall.assert_called_once()
+    mock_pipeline.assert_not_called()
+
+
+def test_redis_hash_storage_uncompacted_extra_data(redis_storage):
+    storage = redis_storage(SessionStore())
+    storage.redis.hset(
+        storage.key, "extra_data", json.dumps({"zendesk_data": {"business-type": {}}})
+    )
+
+    assert storage.extra_data == {"zendesk_data": {"business-type": {}}}
+
+
+def test_redis_hash_storage_reset(redis_storage):
+    session = SessionStore()
+    storage = redis_storage(session)
+    storage.current_step = "business-type"
+    storage.update_response(HttpResponse())
+    assert storage.redis.exists(storage.key)
+
+    storage = redis_storage(session)
+    storage.reset()
+    assert storage.current_step is None
+    storage.update_response(HttpResponse())
+    assert not storage.redis.exists(storage.key)
+
+
+def test_redis_hash_storage_separate_wizards(redis_storage):
+    storage = redis_storage(SessionStore())
+    storage.current_step = "business-type"
+    storage.update_response(HttpResponse())
+
+    other_storage = redis_storage(SessionStore())
+    assert other_storage.key != storage.key
+    assert other_storage.current_step is None
+
+
+@pytest.fixture
+def cookie_storage(rf):
+    def get_storage(cookies=None):
+        request = rf.get("/")
+        request.COOKIES.update(cookies or {})
+        return EncryptedCookieStorage("enquiry_wizard_view", request)
+
+    return get_storage
+
+
+def _get_cookies(response):
+    return {name: morsel.value for name, morsel in response.cookies.items()}
+
+
+def test_encrypted_cookie_storage(cookie_storage):
+    storage = cookie_storage()
+    storage.current_step = "business-type"
+    storage.set_step_data("business-type", {"business-type-business_type": ["1"]})
+    response = HttpResponse()
+    storage.update_response(response)
+
+    cookie = response.cookies[storage.prefix]
+    assert "business" not in cookie.value
+    assert cookie["httponly"]
+    assert storage.cache_key is None
+
+    storage = cookie_storage(_get_cookies(response))
+    assert storage.current_step == "business-type"
+    assert storage.get_step_data("business-type").getlist(
+        "business-type-business_type"
+    ) == ["1"]
+
+
+def test_encrypted_cookie_storage_tampered(cookie_storage):
+    storage = cookie_storage()
+    storage.current_step = "business-type"
+    response = HttpResponse()
+    storage.update_response(response)
+
+    cookies = _get_cookies(response)
+    cookies[storage.prefix] = cookies[storage.prefix][:-4] + "AAAA"
+    storage = cookie_storage(cookies)
+    assert storage.current_step is None
+
+
+def test_encrypted_cookie_storage_too_big_for_cookie(cookie_storage, settings):
+    settings.ENQUIRY_WIZARD_COOKIE_MAX_SIZE = 100
+    storage = cookie_storage()
+    storage.current_step = "enquiry-details"
+    storage.set_step_data(
+        "enquiry-details", {"enquiry-details-question": ["A long question " * 50]}
+    )
+    response = HttpResponse()
+    storage.update_response(response)
+
+    cache_key = storage.cache_key
+    assert cache.get(cache_key) is not None
+    assert len(response.cookies[storage.prefix].value) < 300
+
+    storage = cookie_storage(_get_cookies(response))
+    assert storage.get_step_data("enquiry-details").getlist(
+        "enquiry-details-question"
+    ) == ["A long question " * 50]
+
+    # the data is back in the cookie once it is small enough
+    settings.ENQUIRY_WIZARD_COOKIE_MAX_SIZE = 2048
+    storage.set_step_data("enquiry-details", {"enquiry-details-question": ["Short"]})
+    response = HttpResponse()
+    storage.update_response(response)
+    assert cache.get(cache_key) is None
+    assert storage.cache_key is None
+
+
+def test_encrypted_cookie_storage_reset(cookie_storage, settings):
+    settings.ENQUIRY_WIZARD_COOKIE_MAX_SIZE = 10
+    storage = cookie_storage()
+    storage.current_step = "business-type"
+    response = HttpResponse()
+    storage.update_response(response)
+    cache_key = storage.cache_key
+
+    storage = cookie_storage(_get_cookies(response))
+    storage.reset()
+    response = HttpResponse()
+    storage.update_response(response)
+
+    assert response.cookies[storage.prefix].value == ""
+    assert cache.get(cache_key) is None
@@ -0,0 +1,302 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+from django.core.management import call_command
+from django_redis import get_redis_connection
+
+from ..forms import EmergencySituationZendeskForm
+from ..forms_api import forms_api_client
+from ..zendesk_outbox import (
+    DEAD_LETTER_KEY,
+    HEARTBEAT_KEY_PREFIX,
+    KEY_PREFIX,
+    PENDING_KEY,
+    PROCESSING_KEY_PREFIX,
+    RETRY_KEY,
+    SENDING_KEY_PREFIX,
+    SENT_KEY_PREFIX,
+    WORKERS_KEY,
+    enqueue,
+    get_outbox_stats,
+    get_retry_delay,
+    move_due_retries,
+    process_message,
+    recover_processing,
+    run_worker,
+    submit,
+)
+
+ACTION_KWARGS = {
+    "form_url": "FORM_URL",
+    "full_name": "Firstname Lastname",
+    "email_address": "test@example.com",
+    "subject": "SUBJECT",
+    "service_name": "ZENDESK_SERVICE_NAME",
+    "subdomain": "ZENDESK_SUBDOMAIN",
+    "spam_control": {"contents": "QUESTION"},
+    "sender": {"email_address": "test@example.com", "country_code": ""},
+}
+
+
+@pytest.fixture
+def redis():
+    redis = get_redis_connection("default")
+    redis.delete(PENDING_KEY, *redis.keys(f"{KEY_PREFIX}:*"))
+    yield redis
+    redis.delete(PENDING_KEY, *redis.keys(f"{KEY_PREFIX}:*"))
+
+
+@pytest.fixture
+def outbox_settings(settings):
+    settings.ZENDESK_OUTBOX_ENABLED = True
+    settings.ZENDESK_OUTBOX_MAX_ATTEMPTS = 3
+    settings.ZENDESK_OUTBOX_RETRY_BASE_DELAY = 2
+    settings.ZENDESK_OUTBOX_RETRY_MAX_DELAY = 60
+    return settings
+
+
+@pytest.fixture
+def mock_action_class(mocker):
+    return mocker.patch("export_support.core.zendesk_outbox.actions.ZendeskAction")
+
+
+def _http_error(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.HTTPError(response=response)
+
+
+def _get_messages(redis, key):
+    if key == RETRY_KEY:
+        return [json.loads(message) for message in redis.zrange(key, 0, -1)]
+    return [json.loads(message) for message in redis.lrange(key, 0, -1)]
+
+
+def _get_form():
+    form = EmergencySituationZendeskForm(
+        data={
+            "enquiry_subject": "Subject",
+            "markets": "Markets",
+            "on_behalf_of": "Myself",
+            "company_type": "Company type",
+            "company_type_category": "Category",
+            "aaa_question": "QUESTION",
+            "full_name": "Firstname Lastname",
+            "email": "test@example.com",
+            "how_did_you_hear_about_this_service": "Other",
+        }
+    )
+    assert form.is_valid(), form.errors
+    return form
+
+
+def test_submit_outbox_disabled(settings, mocker, redis):
+    settings.ZENDESK_OUTBOX_ENABLED = False
+    mock_action_class = mocker.patch(
+        "export_support.core.forms.EmergencySituationZendeskForm.action_class"
+    )
+
+    form = _get_form()
+    submit(form, **ACTION_KWARGS)
+
+    mock_action_class.assert_called_once_with(client=forms_api_client, **ACTION_KWARGS)
+    mock_action_class().save.assert_called_once_with(form.cleaned_data)
+    assert get_outbox_stats()["pending"] == 0
+
+
+def test_submit_outbox_enabled(outbox_settings, mocker, redis, mock_action_class):
+    mock_form_action_class = mocker.patch(
+        "export_support.core.forms.EmergencySituationZendeskForm.action_class"
+    )
+
+    form = _get_form()
+    submit(form, **ACTION_KWARGS)
+
+    mock_form_action_class.assert_not_called()
+    (message,) = _get_messages(redis, PENDING_KEY)
+    assert message["data"] == form.cleaned_data
+    assert message["action"] == ACTION_KWARGS
+
+    run_worker(concurrency=2, once=True)
+
+    mock_action_class.assert_called_once_with(client=forms_api_client, **ACTION_KWARGS)
+    mock_action_class().save.assert_called_once_with(form.cleaned_data)
+    assert redis.exists(f"{SENT_KEY_PREFIX}:{message['id']}")
+    assert get_outbox_stats() == {
+        "pending": 0,
+        "processing": 0,
+        "retrying": 0,
+        "dead": 0,
+    }
+
+
+def test_worker_retries_failures(outbox_settings, redis, mock_action_class):
+    mock_action_class().save.side_effect = requests.ConnectionError()
+    enqueue({"aaa_question": "QUESTION"}, ACTION_KWARGS)
+
+    run_worker(concurrency=1, once=True)
+
+    (message,) = _get_messages(redis, RETRY_KEY)
+    assert message["attempts"] == 1
+    assert "ConnectionError" in message["error"]
+    (score,) = [score for _, score in redis.zrange(RETRY_KEY, 0, -1, withscores=True)]
+    assert message["enqueued_at"] + 1 <= score <= message["enqueued_at"] + 3
+    assert get_outbox_stats()["processing"] == 0
+
+
+def test_worker_dead_letters_after_max_attempts(
+    outbox_settings, redis, mock_action_class, mocker
+):
+    mocker.patch("export_support.core.zendesk_outbox.get_retry_delay", return_value=0)
+    mock_action_class().save.return_value.raise_for_status.side_effect = _http_error(
+        503
+    )
+    enqueue({"aaa_question": "QUESTION"}, ACTION_KWARGS)
+
+    for _ in range(3):
+        run_worker(concurrency=1, once=True)
+
+    assert mock_action_class().save.call_count == 3
+    (message,) = _get_messages(redis, DEAD_LETTER_KEY)
+    assert message["attempts"] == 0
+    assert get_outbox_stats()["retrying"] == 0
+
+
+def test_worker_dead_letters_rejected_submissions(
+    outbox_settings, redis, mock_action_class
+):
+    mock_action_class().save.return_value.raise_for_status.side_effect = _http_error(
+        400
+    )
+    enqueue({"aaa_question": "QUESTION"}, ACTION_KWARGS)
+
+    run_worker(concurrency=1, once=True)
+
+    assert len(_get_messages(redis, DEAD_LETTER_KEY)) == 1
+    assert get_outbox_stats()["retrying"] == 0
+
+
+def test_worker_skips_sent_messages(outbox_settings, redis, mock_action_class):
+    message_id = enqueue({"aaa_question": "QUESTION"}, ACTION_KWARGS)
+    redis.set(f"{SENT_KEY_PREFIX}:{message_id}", 1)
+
+    run_worker(concurrency=1, once=True)
+
+    mock_action_class.assert_not_called()
+    assert get_outbox_stats()["pending"] == 0
+
+
+def test_worker_bounded_concurrency(outbox_settings, redis, mock_action_class, mocker):
+    for _ in range(5):
+        enqueue({"aaa_question": "QUESTION"}, ACTION_KWARGS)
+    mock_executor_class = mocker.patch(
+        "export_support.core.zendesk_outbox.ThreadPoolExecutor",
+        wraps=ThreadPoolExecutor,
+    )
+
+    run_worker(concurrency=2, once=True)
+
+    mock_executor_class.assert_called_once_with(max_workers=2)
+    assert mock_action_class().save.call_count == 5
+
+
+def test_move_due_retries(redis, mocker):
+    mock_time = mocker.patch("export_support.core.zendesk_outbox.time")
+    mock_time.time.return_value = 1000.0
+    redis.zadd(RETRY_KEY, {"due": 999, "later": 1001})
+
+    assert move_due_retries(redis) == 1
+    assert redis.lrange(PENDING_KEY, 0, -1) == [b"due"]
+    assert redis.zrange(RETRY_KEY, 0, -1) == [b"later"]
+
+
+def _start_other_worker(redis, worker_id, messages, is_alive):
+    redis.sadd(WORKERS_KEY, worker_id)
+    redis.lpush(f"{PROCESSING_KEY_PREFIX}:{worker_id}", *messages)
+    if is_alive:
+        redis.set(f"{HEARTBEAT_KEY_PREFIX}:{worker_id}", 1)
+
+
+def test_recover_processing(redis):
+    _start_other_worker(redis, "stopped", ["first", "second"], is_alive=False)
+    _start_other_worker(redis, "running", ["third"], is_alive=True)
+
+    assert recover_processing(redis) == 2
+    # in the order they were taken from the pending list
+    assert redis.lrange(PENDING_KEY, 0, -1) == [b"second", b"first"]
+    assert redis.smembers(WORKERS_KEY) == {b"running"}
+    assert get_outbox_stats()["processing"] == 1
+
+
+def test_worker_leaves_running_workers_messages(
+    outbox_settings, redis, mock_action_class
+):
+    _start_other_worker(redis, "running", ["sending"], is_alive=True)
+
+    run_worker(concurrency=1, once=True)
+
+    mock_action_class.assert_not_called()
+    assert redis.lrange(f"{PROCESSING_KEY_PREFIX}:running", 0, -1) == [b"sending"]
+    # this worker cleans up after itself
+    assert redis.smembers(WORKERS_KEY) == {b"running"}
+    assert redis.keys(f"{HEARTBEAT_KEY_PREFIX}:*") == [
+        f"{HEARTBEAT_KEY_PREFIX}:running".encode("utf-8")
+    ]
+
+
+def test_worker_recovers_stopped_workers_messages(
+    outbox_settings, redis, mock_action_class
+):
+    message_id = enqueue({"aaa_question": "QUESTION"}, ACTION_KWARGS)
+    raw_message = redis.rpop(PENDING_KEY)
+    _start_other_worker(redis, "stopped", [raw_message], is_alive=False)
+
+    run_worker(concurrency=1, once=True)
+
+    mock_action_class().save.assert_called_once()
+    assert redis.exists(f"{SENT_KEY_PREFIX}:{message_id}")
+    assert not redis.exists(f"{SENDING_KEY_PREFIX}:{message_id}")
+    assert get_outbox_stats()["processing"] == 0
+
+
+def test_process_message_being_sent_by_other_worker(
+    outbox_settings, redis, mock_action_class
+):
+    message_id = enqueue({"aaa_question": "QUESTION"}, ACTION_KWARGS)
+    raw_message = redis.rpoplpush(PENDING_KEY, f"{PROCESSING_KEY_PREFIX}:this")
+    redis.set(f"{SENDING_KEY_PREFIX}:{message_id}", "other")
+
+    process_message(redis, raw_message, "this")
+
+    mock_action_class.assert_not_called()
+    assert redis.llen(f"{PROCESSING_KEY_PREFIX}:this") == 0
+    assert redis.get(f"{SENDING_KEY_PREFIX}:{message_id}") == b"other"
+
+
+def test_get_retry_delay(settings):
+    settings.ZENDESK_OUTBOX_RETRY_BASE_DELAY = 2
+    settings.ZENDESK_OUTBOX_RETRY_MAX_DELAY = 60
+
+    assert 1 <= get_retry_delay(1) <= 2
+    assert 8 <= get_retry_delay(4) <= 16
+    assert 30 <= get_retry_delay(10) <= 60
+
+
+def test_replay_command(redis):
+    redis.lpush(DEAD_LETTER_KEY, *[f"message-{i}" for i in range(25)])
+
+    call_command("zendesk_outbox_replay", "--batch-size", "10")
+
+    assert get_outbox_stats()["dead"] == 0
+    assert redis.llen(PENDING_KEY) == 25
+
+
+def test_worker_command(outbox_settings, redis, mock_action_class):
+    enqueue({"aaa_question": "QUESTION"}, ACTION_KWARGS)
+
+    call_command("zendesk_outbox_worker", "--once")
+
+    mock_action_class().save.assert_called_once()
+    assert get_outbox_stats()["pending"] == 0
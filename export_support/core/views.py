@@ -7,7 +7,9 @@ from django.urls import reverse, reverse_lazy
 from django.views.generic import RedirectView, TemplateView
 from formtools.wizard.views import NamedUrlSessionWizardView
 
+from . import zendesk_outbox
 from .consts import EMERGENCY_SITUATION_MARKETS
+from .duplicate_submissions import duplicate_submission_guard
 from .forms import (
     BusinessAdditionalInformationForm,
     BusinessDetailsForm,
@@ -72,6 +74,7 @@ def filter_private_values(value):
 
 
 class EnquiryWizardView(NamedUrlSessionWizardView):
+    storage_name = settings.ENQUIRY_WIZARD_STORAGE
     form_list = [
         ("enquiry-subject", EnquirySubjectForm),
         ("export-markets", ExportMarketsForm),
@@ -109,6 +112,54 @@ class EnquiryWizardView(NamedUrlSessionWizardView):
         ),
     }
 
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        self._cleaned_data_for_steps = {}
+
+    @property
+    def storage(self):
+        return self._storage
+
+    @storage.setter
+    def storage(self, storage):
+        # The memoised cleaned data is out of date once the stored step data
+        # changes, which is through either of these whether the step is being
+        # posted, the wizard has been reset or it has been submitted
+        set_step_data = storage.set_step_data
+        reset = storage.reset
+
+        def set_step_data_and_clear(step, cleaned_data):
+            self._cleaned_data_for_steps.clear()
+            set_step_data(step, cleaned_data)
+
+        def reset_and_clear():
+            self._cleaned_data_for_steps.clear()
+            reset()
+
+        storage.set_step_data = set_step_data_and_clear
+        storage.reset = reset_and_clear
+        self._storage = storage
+
+    def get_cleaned_data_for_step(self, step):
+        # The conditions in `condition_dict` are evaluated every time the form
+        # list is needed, which is many times per request, and each time would
+        # otherwise revalidate the business type form
+        if step not in self._cleaned_data_for_steps:
+            self._cleaned_data_for_steps[step] = super().get_cleaned_data_for_step(step)
+        return self._cleaned_data_for_steps[step]
+
+    def process_step(self, form):
+        # The step's contribution to the Zendesk ticket is worked out now, whilst
+        # its form is already validated, so submitting only has to merge these
+        zendesk_data = self.storage.extra_data.get("zendesk_data", {})
+        zendesk_data[self.steps.current] = self.get_step_zendesk_data(form)
+        self.storage.extra_data = {
+            **self.storage.extra_data,
+            "zendesk_data": zendesk_data,
+        }
+
+        return super().process_step(form)
+
     def get_template_names(self):
         templates = {
             form_name: f"core/{form_name.replace('-', '_')}_wizard_step.html"
@@ -117,47 +168,63 @@ class EnquiryWizardView(NamedUrlSessionWizardView):
 
         return [templates[self.steps.current]]
 
-    def get_form_data(self, form_list):
+    def get_step_zendesk_data(self, form):
         form_data = {}
         custom_fields_data = []
         custom_field_mapping = settings.ZENDESK_CUSTOM_FIELD_MAPPING
 
-        for form in form_list:
-            for field_name, field_value in form.get_zendesk_data().items():
-                field_name = ZendeskForm.FIELD_MAPPING.get(field_name, field_name)
-                form_data[field_name] = field_value
+        for field_name, field_value in form.get_zendesk_data().items():
+            field_name = ZendeskForm.FIELD_MAPPING.get(field_name, field_name)
+            form_data[field_name] = field_value
 
-                try:
-                    custom_field_id = custom_field_mapping[field_name]
-                except KeyError:
-                    continue
+            try:
+                custom_field_id = custom_field_mapping[field_name]
+            except KeyError:
+                continue
 
-                field_value = form.cleaned_data[field_name]
-                field_value = filter_private_values(field_value)
-                if not field_value:
-                    continue
+            field_value = form.cleaned_data[field_name]
+            field_value = filter_private_values(field_value)
+            if not field_value:
+                continue
 
-                custom_fields_data.append({custom_field_id: field_value})
+            custom_fields_data.append({custom_field_id: field_value})
+
+        return {
+            "form_data": form_data,
+            "custom_fields": custom_fields_data,
+        }
+
+    def get_form_data(self, form_list):
+        form_data = {}
+        custom_fields_data = []
+        stored_zendesk_data = self.storage.extra_data.get("zendesk_data", {})
+
+        for form in form_list:
+            # Wizards started before the step data was stored won't have it
+            step_zendesk_data = stored_zendesk_data.get(form.prefix)
+            if step_zendesk_data is None:
+                step_zendesk_data = self.get_step_zendesk_data(form)
+
+            form_data.update(step_zendesk_data["form_data"])
+            custom_fields_data += step_zendesk_data["custom_fields"]
 
         form_data["_custom_fields"] = custom_fields_data
 
         return form_data
 
-    def send_to_zendesk(self, form_list):
+    def send_to_zendesk(self, form_list, form_dict):
         form_data = self.get_form_data(form_list)
         zendesk_form = ZendeskForm(data=form_data)
         if not zendesk_form.is_valid():
             raise ValueError("Invalid ZendeskForm", dict(zendesk_form.errors))
 
-        personal_details_cleaned_data = self.get_cleaned_data_for_step(
-            "personal-details"
-        )
+        personal_details_cleaned_data = form_dict["personal-details"].cleaned_data
         first_name = personal_details_cleaned_data["first_name"]
         last_name = personal_details_cleaned_data["last_name"]
         full_name = f"{first_name} {last_name}"
         email_address = personal_details_cleaned_data["email"]
 
-        enquiry_details_cleaned_data = self.get_cleaned_data_for_step("enquiry-details")
+        enquiry_details_cleaned_data = form_dict["enquiry-details"].cleaned_data
         subject = enquiry_details_cleaned_data["nature_of_enquiry"] or "N/A"
         question = enquiry_details_cleaned_data["question"]
 
@@ -167,16 +234,20 @@ class EnquiryWizardView(NamedUrlSessionWizardView):
             email_address=email_address,
         )
 
-        zendesk_form.save(
-            form_url=settings.FORM_URL,
-            full_name=full_name,
-            email_address=email_address,
-            subject=subject,
-            service_name=settings.ZENDESK_SERVICE_NAME,
-            subdomain=settings.ZENDESK_SUBDOMAIN,
-            spam_control=spam_control,
-            sender=sender,
-        )
+        with duplicate_submission_guard(self.request, form_data) as is_duplicate:
+            if is_duplicate:
+                return
+            zendesk_outbox.submit(
+                zendesk_form,
+                form_url=settings.FORM_URL,
+                full_name=full_name,
+                email_address=email_address,
+                subject=subject,
+                service_name=settings.ZENDESK_SERVICE_NAME,
+                subdomain=settings.ZENDESK_SUBDOMAIN,
+                spam_control=spam_control,
+                sender=sender,
+            )
 
     def get_context_data(self, form, **kwargs):
         ctx = super().get_context_data(form=form, **kwargs)
@@ -199,7 +270,8 @@ class EnquiryWizardView(NamedUrlSessionWizardView):
         return ctx
 
     def done(self, form_list, form_dict, **kwargs):
-        enquiry_subject_cleaned_data = self.get_cleaned_data_for_step("enquiry-subject")
+        # The forms have all just been revalidated by `render_done`
+        enquiry_subject_cleaned_data = form_dict["enquiry-subject"].cleaned_data
         enquiry_subject = enquiry_subject_cleaned_data["enquiry_subject"]
 
         display_goods = EnquirySubjectChoices.SELLING_GOODS_ABROAD in enquiry_subject
@@ -214,12 +286,13 @@ class EnquiryWizardView(NamedUrlSessionWizardView):
             "display_subheadings": display_subheadings,
         }
 
-        self.send_to_zendesk(form_list)
+        self.send_to_zendesk(form_list, form_dict)
 
         return render(self.request, "core/enquiry_contact_success.html", ctx)
 
 
 class EmergencySituationEnquiryWizardView(NamedUrlSessionWizardView):
+    storage_name = settings.ENQUIRY_WIZARD_STORAGE
     form_list = [
         ("enquiry-form", EmergencySituationEnquiryForm),
     ]
@@ -287,16 +360,20 @@ class EmergencySituationEnquiryWizardView(NamedUrlSessionWizardView):
             email_address=email_address,
         )
 
-        zendesk_form.save(
-            form_url=settings.FORM_URL,
-            full_name=full_name,
-            email_address=email_address,
-            subject=subject,
-            service_name=settings.ZENDESK_SERVICE_NAME,
-            subdomain=settings.ZENDESK_SUBDOMAIN,
-            spam_control=spam_control,
-            sender=sender,
-        )
+        with duplicate_submission_guard(self.request, form_data) as is_duplicate:
+            if is_duplicate:
+                return
+            zendesk_outbox.submit(
+                zendesk_form,
+                form_url=settings.FORM_URL,
+                full_name=full_name,
+                email_address=email_address,
+                subject=subject,
+                service_name=settings.ZENDESK_SERVICE_NAME,
+                subdomain=settings.ZENDESK_SUBDOMAIN,
+                spam_control=spam_control,
+                sender=sender,
+            )
 
     def get_context_data(self, form, **kwargs):
         ctx = super().get_context_data(form=form, **kwargs)
@@ -0,0 +1,60 @@
+import logging
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.forms.renderers import get_default_renderer
+from django.template import engines
+
+logger = logging.getLogger(__name__)
+
+# The templates each app renders, relative to the app's templates directory
+TEMPLATE_PATTERNS = {
+    "core": ["core/*.html"],
+    "gds": ["gds/**/*.html"],
+}
+
+# Widgets are rendered by the form renderer, which has its own engine
+WIDGET_TEMPLATES = [
+    "gds/forms/fields/checkbox_select_multiple.html",
+    "gds/forms/fields/radio_select.html",
+    "django/forms/widgets/attrs.html",
+]
+
+
+def get_template_names():
+    template_names = []
+    for app_label, patterns in TEMPLATE_PATTERNS.items():
+        templates_dir = Path(apps.get_app_config(app_label).path) / "templates"
+        for pattern in patterns:
+            template_names += sorted(
+                path.relative_to(templates_dir).as_posix()
+                for path in templates_dir.glob(pattern)
+            )
+    return template_names
+
+
+def warm_up_templates():
+    """Compiles the templates into the cached template loaders so that the
+    first requests a worker handles don't have to.
+
+    Returns the number of templates compiled.
+    """
+    start = time.perf_counter()
+
+    engine = engines["django"]
+    template_names = get_template_names()
+    for template_name in template_names:
+        engine.get_template(template_name)
+
+    renderer = get_default_renderer()
+    for template_name in WIDGET_TEMPLATES:
+        renderer.get_template(template_name)
+
+    count = len(template_names) + len(WIDGET_TEMPLATES)
+    logger.info(
+        "Warmed up %s templates in %.0fms",
+        count,
+        (time.perf_counter() - start) * 1000,
+    )
+    return count
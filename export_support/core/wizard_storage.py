@@ -0,0 +1,418 @@
+import base64
+import hashlib
+import json
+import logging
+import uuid
+import zlib
+
+from cryptography.fernet import Fernet, InvalidToken
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import get_random_string
+from django.utils.datastructures import MultiValueDict
+from django_redis import get_redis_connection
+from formtools.wizard.storage.base import BaseStorage
+from formtools.wizard.storage.exceptions import NoFileStorageConfigured
+from formtools.wizard.storage.session import SessionStorage
+
+from .consts import MARKETS_MAP, SECTORS_MAP
+
+logger = logging.getLogger(__name__)
+
+# Fields whose values are stored as their position in the list of choices
+# rather than the much longer machine readable values
+INDEXED_CHOICES = {
+    "export-markets-markets": list(MARKETS_MAP),
+    "sectors-sectors": list(SECTORS_MAP),
+}
+CHOICE_INDEXES = {
+    key: {choice: index for index, choice in enumerate(choices)}
+    for key, choices in INDEXED_CHOICES.items()
+}
+# Changing the choices changes the indexes so data stored with different
+# choices can't be decoded
+CHOICES_FINGERPRINT = hashlib.sha256(
+    json.dumps(INDEXED_CHOICES, sort_keys=True).encode("utf-8")
+).hexdigest()[:8]
+
+# Submitted with every step but never needed to revalidate it
+EXCLUDED_FIELDS = ["csrfmiddlewaretoken"]
+
+# The steps' Zendesk data lists the names of the selected markets and sectors
+# the same way, so compressing it with these as zlib's preset dictionary
+# stores each name as a reference into the dictionary
+ZENDESK_DATA_DICTIONARY = ", ".join(
+    [*MARKETS_MAP.values(), *SECTORS_MAP.values()]
+).encode("utf-8")
+
+COMPRESSED = "z"
+COMPRESSED_WITH_DICTIONARY = "d"
+UNCOMPRESSED = "j"
+
+
+def _to_json(value):
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _to_bitset(indexes):
+    return format(sum(1 << index for index in indexes), "x")
+
+
+def _from_bitset(bitset):
+    bits = int(bitset, 16)
+    return [index for index in range(bits.bit_length()) if bits >> index & 1]
+
+
+def _compress(encoded):
+    # Compressing short data and then base64 encoding it can make it longer
+    compressed = base64.b64encode(zlib.compress(encoded.encode("utf-8"))).decode()
+    if len(compressed) < len(encoded):
+        return COMPRESSED + compressed
+    return UNCOMPRESSED + encoded
+
+
+def _decompress(encoded):
+    if encoded[0] == COMPRESSED:
+        return zlib.decompress(base64.b64decode(encoded[1:])).decode("utf-8")
+    return encoded[1:]
+
+
+def encode_step_data(data):
+    values = {}
+    indexes = {}
+    bitsets = {}
+
+    for key, value in data.items():
+        if key in EXCLUDED_FIELDS:
+            continue
+
+        choice_indexes = CHOICE_INDEXES.get(key)
+        if not choice_indexes or not all(val in choice_indexes for val in value):
+            values[key] = value
+            continue
+
+        value_indexes = [choice_indexes[val] for val in value]
+        # Choices are normally submitted in the order they are shown, in which
+        # case a bit per choice is enough to keep them in the same order
+        if value_indexes == sorted(set(value_indexes)):
+            bitsets[key] = _to_bitset(value_indexes)
+        else:
+            indexes[key] = value_indexes
+
+    return _compress(
+        _to_json({"f": CHOICES_FINGERPRINT, "v": values, "i": indexes, "b": bitsets})
+    )
+
+
+def decode_step_data(encoded):
+    """Returns the step data from `encoded`, or `None` if it was stored with
+    different choices and so can't be decoded.
+    """
+    decoded = json.loads(_decompress(encoded))
+
+    if decoded["f"] != CHOICES_FINGERPRINT and (decoded["i"] or decoded["b"]):
+        return None
+
+    data = decoded["v"]
+    for key, bitset in decoded["b"].items():
+        decoded["i"][key] = _from_bitset(bitset)
+    for key, indexes in decoded["i"].items():
+        choices = INDEXED_CHOICES[key]
+        data[key] = [choices[index] for index in indexes]
+
+    return data
+
+
+def encode_extra_data(extra_data):
+    encoded = _to_json(extra_data)
+
+    compressor = zlib.compressobj(zdict=ZENDESK_DATA_DICTIONARY)
+    compressed = compressor.compress(encoded.encode("utf-8")) + compressor.flush()
+    compressed = base64.b64encode(compressed).decode()
+    if len(compressed) < len(encoded):
+        return COMPRESSED_WITH_DICTIONARY + compressed
+    return UNCOMPRESSED + encoded
+
+
+def decode_extra_data(encoded):
+    """Returns the extra data from `encoded`, or an empty dict if it was
+    compressed with a different dictionary and so can't be decoded.
+    """
+    if encoded[0] != COMPRESSED_WITH_DICTIONARY:
+        return json.loads(_decompress(encoded))
+
+    decompressor = zlib.decompressobj(zdict=ZENDESK_DATA_DICTIONARY)
+    try:
+        decoded = decompressor.decompress(base64.b64decode(encoded[1:]))
+    except zlib.error:
+        # The steps' Zendesk data is worked out again from their forms
+        return {}
+    return json.loads(decoded.decode("utf-8"))
+
+
+class CompactStepDataMixin:
+    """Keeps each step's data, and the extra data such as the steps' Zendesk
+    data, as compact strings in the storage's data.
+    """
+
+    bytes_saved_key = "bytes_saved"
+
+    def _record_bytes_saved(self, name, data, encoded):
+        # The data would otherwise have been stored as JSON
+        bytes_saved = len(_to_json(data)) - len(encoded)
+        total_bytes_saved = self.data.get(self.bytes_saved_key, 0) + bytes_saved
+        self.data[self.bytes_saved_key] = total_bytes_saved
+        logger.debug(
+            "Stored %s in %s bytes, saving %s bytes (%s for the session)",
+            name,
+            len(encoded),
+            bytes_saved,
+            total_bytes_saved,
+        )
+
+    def _get_extra_data(self):
+        extra_data = self.data[self.extra_data_key]
+        if isinstance(extra_data, str):
+            extra_data = decode_extra_data(extra_data)
+        return extra_data
+
+    def _set_extra_data(self, extra_data):
+        # Left empty so that there is nothing to store until there is some
+        if not extra_data:
+            self.data[self.extra_data_key] = {}
+            return
+
+        encoded = encode_extra_data(extra_data)
+        self.data[self.extra_data_key] = encoded
+        self._record_bytes_saved("extra data", extra_data, encoded)
+
+    def get_step_data(self, step):
+        values = self.data[self.step_data_key].get(step, None)
+        if isinstance(values, str):
+            values = decode_step_data(values)
+        if values is not None:
+            values = MultiValueDict(values)
+        return values
+
+    def set_step_data(self, step, cleaned_data):
+        if isinstance(cleaned_data, MultiValueDict):
+            cleaned_data = dict(cleaned_data.lists())
+
+        encoded = encode_step_data(cleaned_data)
+        self.data[self.step_data_key][step] = encoded
+        self._record_bytes_saved(f"{step} step data", cleaned_data, encoded)
+
+
+class CompactSessionStorage(CompactStepDataMixin, SessionStorage):
+    """Wizard storage that keeps each step's data in the session as a compact
+    string, to reduce the size of the sessions held in Redis.
+    """
+
+
+class RedisHashStorage(BaseStorage):
+    """Wizard storage that keeps each wizard in its own Redis hash, with a
+    field per step, rather than in the session.
+
+    The whole hash is read in one round trip the first time it is needed and
+    only the fields that changed are written back, in one round trip when the
+    response is returned. The session only holds the id of the wizard.
+    """
+
+    key_prefix = "wizard"
+    current_step_field = "step"
+    extra_data_field = "extra_data"
+    step_data_field_prefix = "step_data:"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.redis = get_redis_connection("default")
+        self._fields = None
+        self._changed_fields = {}
+        self._deleted = False
+
+    @property
+    def key(self):
+        wizard_id = self.request.session.get(self.prefix)
+        if not isinstance(wizard_id, str):
+            wizard_id = uuid.uuid4().hex
+            self.request.session[self.prefix] = wizard_id
+        return f"{self.key_prefix}:{self.prefix}:{wizard_id}"
+
+    def _get_fields(self):
+        if self._fields is None:
+            self._fields = {
+                field.decode("utf-8"): value.decode("utf-8")
+                for field, value in self.redis.hgetall(self.key).items()
+            }
+        return self._fields
+
+    def _get_field(self, field):
+        return self._get_fields().get(field)
+
+    def _set_field(self, field, value):
+        self._get_fields()[field] = value
+        self._changed_fields[field] = value
+
+    def init_data(self):
+        self._fields = {}
+        self._changed_fields = {}
+
+    def reset(self):
+        self.init_data()
+        self._deleted = True
+
+    def _get_current_step(self):
+        return self._get_field(self.current_step_field)
+
+    def _set_current_step(self, step):
+        self._set_field(self.current_step_field, step)
+
+    def _get_extra_data(self):
+        extra_data = self._get_field(self.extra_data_field)
+        if extra_data is None:
+            return {}
+        # Extra data stored before it was compacted is plain JSON
+        if extra_data.startswith("{"):
+            return json.loads(extra_data)
+        return decode_extra_data(extra_data)
+
+    def _set_extra_data(self, extra_data):
+        self._set_field(self.extra_data_field, encode_extra_data(extra_data))
+
+    def get_step_data(self, step):
+        if step is None:
+            return None
+
+        values = self._get_field(self.step_data_field_prefix + step)
+        if values is not None:
+            values = decode_step_data(values)
+        if values is not None:
+            values = MultiValueDict(values)
+        return values
+
+    def set_step_data(self, step, cleaned_data):
+        if isinstance(cleaned_data, MultiValueDict):
+            cleaned_data = dict(cleaned_data.lists())
+        self._set_field(
+            self.step_data_field_prefix + step, encode_step_data(cleaned_data)
+        )
+
+    # None of the wizards upload files so the files for each step aren't stored
+    def get_step_files(self, step):
+        return None
+
+    def set_step_files(self, step, files):
+        if files:
+            raise NoFileStorageConfigured("RedisHashStorage doesn't store files")
+
+    def update_response(self, response):
+        super().update_response(response)
+
+        if not self._deleted and not self._changed_fields:
+            return
+
+        pipeline = self.redis.pipeline()
+        if self._deleted:
+            pipeline.delete(self.key)
+        if self._changed_fields:
+            pipeline.hset(self.key, mapping=self._changed_fields)
+            pipeline.expire(self.key, settings.SESSION_COOKIE_AGE)
+        pipeline.execute()
+
+        self._changed_fields = {}
+        self._deleted = False
+
+
+class EncryptedCookieStorage(CompactStepDataMixin, BaseStorage):
+    """Wizard storage that keeps the wizard's data in an encrypted cookie so
+    that the wizard doesn't need Redis.
+
+    Wizards too big for a cookie are kept in the cache instead, in which case
+    the cookie only holds the cache key.
+    """
+
+    cache_key_prefix = "wizard-cookie"
+    inline = "c"
+    cached = "r"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_key = None
+        self.data = self.load_data()
+        if self.data is None:
+            self.init_data()
+
+    @property
+    def fernet(self):
+        # Fernet authenticates the data as well as encrypting it, so a cookie
+        # that has been tampered with can't be decrypted
+        key = hashlib.sha256(
+            f"{self.prefix}:{settings.SECRET_KEY}".encode("utf-8")
+        ).digest()
+        return Fernet(base64.urlsafe_b64encode(key))
+
+    def _encode(self, data):
+        return zlib.compress(_to_json(data).encode("utf-8"))
+
+    def _decode(self, encoded):
+        return json.loads(zlib.decompress(encoded).decode("utf-8"))
+
+    def load_data(self):
+        cookie = self.request.COOKIES.get(self.prefix)
+        if cookie is None:
+            return None
+
+        try:
+            value = self.fernet.decrypt(
+                cookie.encode("ascii"), ttl=settings.SESSION_COOKIE_AGE
+            )
+        except InvalidToken:
+            return None
+
+        kind, value = value[:1].decode("ascii"), value[1:]
+        if kind == self.cached:
+            self.cache_key = value.decode("ascii")
+            value = cache.get(self.cache_key)
+            if value is None:
+                return None
+
+        return self._decode(value)
+
+    def _is_empty(self):
+        return not (
+            self.data[self.step_key]
+            or self.data[self.step_data_key]
+            or self.data[self.extra_data_key]
+        )
+
+    def update_response(self, response):
+        super().update_response(response)
+
+        if self._is_empty():
+            if self.cache_key:
+                cache.delete(self.cache_key)
+            response.delete_cookie(
+                self.prefix,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+            return
+
+        encoded = self._encode(self.data)
+        if len(encoded) > settings.ENQUIRY_WIZARD_COOKIE_MAX_SIZE:
+            if not self.cache_key:
+                self.cache_key = f"{self.cache_key_prefix}:{get_random_string(32)}"
+            cache.set(self.cache_key, encoded, timeout=settings.SESSION_COOKIE_AGE)
+            value = self.cached.encode("ascii") + self.cache_key.encode("ascii")
+        else:
+            if self.cache_key:
+                cache.delete(self.cache_key)
+                self.cache_key = None
+            value = self.inline.encode("ascii") + encoded
+
+        response.set_cookie(
+            self.prefix,
+            self.fernet.encrypt(value).decode("ascii"),
+            secure=settings.SESSION_COOKIE_SECURE,
+            httponly=True,
+            samesite=settings.SESSION_COOKIE_SAMESITE,
+        )
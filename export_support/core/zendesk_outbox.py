@@ -0,0 +1,358 @@
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from directory_forms_api_client import actions
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from .forms_api import forms_api_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "zendesk-outbox"
+PENDING_KEY = f"{KEY_PREFIX}:pending"
+RETRY_KEY = f"{KEY_PREFIX}:retry"
+DEAD_LETTER_KEY = f"{KEY_PREFIX}:dead"
+SENT_KEY_PREFIX = f"{KEY_PREFIX}:sent"
+SENDING_KEY_PREFIX = f"{KEY_PREFIX}:sending"
+# Each worker moves the messages it is sending to its own processing list and
+# keeps its heartbeat key alive whilst it runs, so that the messages of a
+# worker that stopped without finishing them can be told apart and recovered
+WORKERS_KEY = f"{KEY_PREFIX}:workers"
+PROCESSING_KEY_PREFIX = f"{KEY_PREFIX}:processing"
+HEARTBEAT_KEY_PREFIX = f"{KEY_PREFIX}:heartbeat"
+
+# Moves the retries that are due back onto the pending list in one step, so
+# that a retry is never lost or moved twice
+MOVE_DUE_RETRIES_SCRIPT = """
+local due = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1], "LIMIT", 0, ARGV[2])
+for _, message in ipairs(due) do
+    redis.call("ZREM", KEYS[1], message)
+    redis.call("LPUSH", KEYS[2], message)
+end
+return #due
+"""
+MOVE_DUE_RETRIES_BATCH_SIZE = 100
+
+
+def _get_redis():
+    return get_redis_connection("default")
+
+
+def submit(zendesk_form, **action_kwargs):
+    """Sends `zendesk_form` to directory-forms-api, or adds it to the outbox
+    for the `zendesk_outbox_worker` command to send if the outbox is enabled.
+    """
+    if not settings.ZENDESK_OUTBOX_ENABLED:
+        zendesk_form.save(client=forms_api_client, **action_kwargs)
+        return
+
+    message_id = enqueue(zendesk_form.serialized_data, action_kwargs)
+    logger.info("Added Zendesk submission %s to the outbox", message_id)
+
+
+def enqueue(data, action_kwargs):
+    message = {
+        # Also the idempotency key, so that a message is only sent once however
+        # many times it is processed
+        "id": uuid.uuid4().hex,
+        "data": data,
+        "action": action_kwargs,
+        "attempts": 0,
+        "enqueued_at": time.time(),
+    }
+    _get_redis().lpush(PENDING_KEY, json.dumps(message))
+    return message["id"]
+
+
+def get_retry_delay(attempts):
+    """Returns the exponential backoff in seconds before retrying a message
+    that has failed `attempts` times, with half of it random so that messages
+    that failed together aren't all retried together.
+    """
+    delay = min(
+        settings.ZENDESK_OUTBOX_RETRY_MAX_DELAY,
+        settings.ZENDESK_OUTBOX_RETRY_BASE_DELAY * 2 ** (attempts - 1),
+    )
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def _is_retryable(error):
+    # Other client errors mean the submission itself was rejected, so retrying
+    # it won't help
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status_code = error.response.status_code
+        return status_code == 429 or status_code >= 500
+    return True
+
+
+def get_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _get_processing_key(worker_id):
+    return f"{PROCESSING_KEY_PREFIX}:{worker_id}"
+
+
+def _get_heartbeat_key(worker_id):
+    return f"{HEARTBEAT_KEY_PREFIX}:{worker_id}"
+
+
+def _get_sending_timeout():
+    # Long enough for the slowest send, which times out on every retry
+    return int(
+        (
+            settings.DIRECTORY_FORMS_API_CONNECT_TIMEOUT
+            + settings.DIRECTORY_FORMS_API_DEFAULT_TIMEOUT
+        )
+        * (settings.DIRECTORY_FORMS_API_RETRIES + 1)
+        + 1
+    )
+
+
+def send(message):
+    action = actions.ZendeskAction(client=forms_api_client, **message["action"])
+    response = action.save(message["data"])
+    response.raise_for_status()
+
+
+def _fail(pipeline, message, error):
+    message["attempts"] += 1
+    message["error"] = repr(error)
+
+    can_retry = message["attempts"] < settings.ZENDESK_OUTBOX_MAX_ATTEMPTS
+    if can_retry and _is_retryable(error):
+        retry_at = time.time() + get_retry_delay(message["attempts"])
+        pipeline.zadd(RETRY_KEY, {json.dumps(message): retry_at})
+        logger.warning(
+            "Failed to send Zendesk submission %s, retrying (attempt %s)",
+            message["id"],
+            message["attempts"],
+        )
+        return
+
+    logger.error(
+        "Failed to send Zendesk submission %s after %s attempts: %s",
+        message["id"],
+        message["attempts"],
+        message["error"],
+    )
+    # Replaying a dead letter retries it in full
+    message["dead_lettered_at"] = time.time()
+    message["attempts"] = 0
+    pipeline.lpush(DEAD_LETTER_KEY, json.dumps(message))
+
+
+def _claim_sending(redis, message, worker_id):
+    """Returns whether this worker may send `message`, which it can't if it
+    has already been sent or another worker is sending it.
+    """
+    sent_key = f"{SENT_KEY_PREFIX}:{message['id']}"
+    if redis.exists(sent_key):
+        logger.info("Zendesk submission %s has already been sent", message["id"])
+        return False
+
+    # A recovered message can be processed by two workers at the same time
+    sending_key = f"{SENDING_KEY_PREFIX}:{message['id']}"
+    if not redis.set(sending_key, worker_id, nx=True, ex=_get_sending_timeout()):
+        logger.info("Zendesk submission %s is being sent already", message["id"])
+        return False
+
+    # The other worker may have finished sending it before our claim
+    if redis.exists(sent_key):
+        redis.delete(sending_key)
+        logger.info("Zendesk submission %s has already been sent", message["id"])
+        return False
+
+    return True
+
+
+def process_message(redis, raw_message, worker_id):
+    processing_key = _get_processing_key(worker_id)
+    try:
+        message = json.loads(raw_message)
+    except ValueError:
+        logger.exception("Moving an unreadable Zendesk submission to dead letters")
+        pipeline = redis.pipeline()
+        pipeline.lpush(DEAD_LETTER_KEY, raw_message)
+        pipeline.lrem(processing_key, 1, raw_message)
+        pipeline.execute()
+        return
+
+    pipeline = redis.pipeline()
+    if _claim_sending(redis, message, worker_id):
+        try:
+            send(message)
+        except Exception as e:
+            _fail(pipeline, message, e)
+        else:
+            pipeline.set(
+                f"{SENT_KEY_PREFIX}:{message['id']}",
+                1,
+                ex=settings.ZENDESK_OUTBOX_SENT_TTL,
+            )
+            logger.info("Sent Zendesk submission %s", message["id"])
+        pipeline.delete(f"{SENDING_KEY_PREFIX}:{message['id']}")
+    pipeline.lrem(processing_key, 1, raw_message)
+    pipeline.execute()
+
+
+def move_due_retries(redis):
+    move = redis.register_script(MOVE_DUE_RETRIES_SCRIPT)
+    moved = 0
+    while True:
+        batch = move(
+            keys=[RETRY_KEY, PENDING_KEY],
+            args=[time.time(), MOVE_DUE_RETRIES_BATCH_SIZE],
+        )
+        moved += batch
+        if batch < MOVE_DUE_RETRIES_BATCH_SIZE:
+            return moved
+
+
+def _beat(redis, worker_id):
+    redis.set(
+        _get_heartbeat_key(worker_id),
+        1,
+        ex=settings.ZENDESK_OUTBOX_HEARTBEAT_TIMEOUT,
+    )
+
+
+def _recover_worker(redis, worker_id):
+    processing_key = _get_processing_key(worker_id)
+    recovered = 0
+    while redis.rpoplpush(processing_key, PENDING_KEY) is not None:
+        recovered += 1
+    redis.srem(WORKERS_KEY, worker_id)
+    return recovered
+
+
+def recover_processing(redis):
+    """Moves the messages that stopped workers were processing back onto the
+    pending list, leaving those of the workers whose heartbeat is still alive.
+    """
+    recovered = 0
+    for worker_id in redis.smembers(WORKERS_KEY):
+        worker_id = worker_id.decode("utf-8")
+        if not redis.exists(_get_heartbeat_key(worker_id)):
+            recovered += _recover_worker(redis, worker_id)
+    if recovered:
+        logger.warning("Recovered %s Zendesk submissions", recovered)
+    return recovered
+
+
+def _run_heartbeat(redis, worker_id, stop):
+    interval = settings.ZENDESK_OUTBOX_HEARTBEAT_TIMEOUT / 3
+    while not stop.wait(interval):
+        try:
+            _beat(redis, worker_id)
+        except Exception:
+            logger.exception("Failed to keep the Zendesk outbox worker alive")
+
+
+def run_worker(concurrency, once=False, poll_interval=1, stop=None):
+    """Sends the messages in the outbox, `concurrency` at a time, until `stop`
+    is set or, if `once` is true, until there are no more pending messages.
+    """
+    redis = _get_redis()
+    stop = stop or threading.Event()
+    slots = threading.BoundedSemaphore(concurrency)
+    worker_id = get_worker_id()
+    processing_key = _get_processing_key(worker_id)
+
+    def release_slot(future):
+        slots.release()
+        if future.exception():
+            logger.error(
+                "Failed to process a Zendesk submission", exc_info=future.exception()
+            )
+
+    _beat(redis, worker_id)
+    redis.sadd(WORKERS_KEY, worker_id)
+    heartbeat_stop = threading.Event()
+    heartbeat = threading.Thread(
+        target=_run_heartbeat, args=(redis, worker_id, heartbeat_stop), daemon=True
+    )
+    heartbeat.start()
+
+    recovered_at = None
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while not stop.is_set():
+                # Picks up after workers that have stopped without finishing
+                now = time.monotonic()
+                if (
+                    recovered_at is None
+                    or now - recovered_at > settings.ZENDESK_OUTBOX_HEARTBEAT_TIMEOUT
+                ):
+                    recover_processing(redis)
+                    recovered_at = now
+                move_due_retries(redis)
+
+                # Messages are only taken off the pending list when there is a
+                # slot free to send them
+                slots.acquire()
+                if once:
+                    raw_message = redis.rpoplpush(PENDING_KEY, processing_key)
+                else:
+                    raw_message = redis.brpoplpush(
+                        PENDING_KEY, processing_key, timeout=poll_interval
+                    )
+
+                if raw_message is None:
+                    slots.release()
+                    if once:
+                        break
+                    continue
+
+                future = executor.submit(process_message, redis, raw_message, worker_id)
+                future.add_done_callback(release_slot)
+    finally:
+        heartbeat_stop.set()
+        # Anything still in our processing list wasn't finished
+        _recover_worker(redis, worker_id)
+        redis.delete(_get_heartbeat_key(worker_id))
+
+
+def replay_dead_letters(batch_size=1000):
+    """Moves the dead letters back onto the pending list, a batch per round
+    trip to Redis, and returns how many were moved.
+    """
+    redis = _get_redis()
+    replayed = 0
+    while True:
+        pipeline = redis.pipeline(transaction=False)
+        for _ in range(batch_size):
+            pipeline.rpoplpush(DEAD_LETTER_KEY, PENDING_KEY)
+        batch = sum(1 for message in pipeline.execute() if message is not None)
+        replayed += batch
+        if batch < batch_size:
+            return replayed
+
+
+def get_outbox_stats():
+    redis = _get_redis()
+    worker_ids = [
+        worker_id.decode("utf-8") for worker_id in redis.smembers(WORKERS_KEY)
+    ]
+    pipeline = redis.pipeline(transaction=False)
+    pipeline.llen(PENDING_KEY)
+    pipeline.zcard(RETRY_KEY)
+    pipeline.llen(DEAD_LETTER_KEY)
+    for worker_id in worker_ids:
+        pipeline.llen(_get_processing_key(worker_id))
+    pending, retrying, dead, *processing = pipeline.execute()
+    return {
+        "pending": pending,
+        "processing": sum(processing),
+        "retrying": retrying,
+        "dead": dead,
+    }
@@ -1,9 +1,239 @@
+import copy
+import re
+from collections import OrderedDict
+
 from django import forms
+from django.utils.formats import localize
+from django.utils.html import conditional_escape
+from django.utils.safestring import SafeData, mark_safe
+
+
+def _render_value(value):
+    # The same as {{ value }} in a template
+    return conditional_escape(localize(value))
+
+
+def _render_attrs(attrs):
+    # The same as the "django/forms/widgets/attrs.html" template
+    html = []
+    for name, value in attrs.items():
+        if value is False:
+            continue
+        html.append(f" {_render_value(name)}")
+        if value is not True:
+            if not isinstance(value, SafeData):
+                value = str(value)
+            html.append(f'="{conditional_escape(value)}"')
+    return "".join(html)
+
+
+class FastRenderMixin:
+    """Renders the widget's options in Python rather than including a
+    template for every option, which is slow for widgets with a lot of them.
+
+    Widgets using this set `fast_template_name` and define a
+    `render_optgroups(widget)` method that builds exactly the same HTML as that
+    template from the widget's context. Only that template is rendered this
+    way, so a subclass that uses a different template still renders it.
+    """
 
+    fast_template_name = None
 
-class CheckboxSelectMultiple(forms.CheckboxSelectMultiple):
+    def render(self, name, value, attrs=None, renderer=None):
+        render_optgroups = getattr(self, "render_optgroups", None)
+        if (
+            render_optgroups is None
+            or self.fast_template_name is None
+            or self.template_name != self.fast_template_name
+        ):
+            return super().render(name, value, attrs, renderer)
+
+        context = self.get_context(name, value, attrs)
+        # Django's form renderers strip the rendered templates
+        return mark_safe(render_optgroups(context["widget"]).strip())
+
+
+class CheckboxSelectMultiple(FastRenderMixin, forms.CheckboxSelectMultiple):
     template_name = "gds/forms/fields/checkbox_select_multiple.html"
+    fast_template_name = template_name
+
+    def render_optgroups(self, widget):
+        html = []
+        for group, options, _ in widget["optgroups"]:
+            margin = "govuk-!-margin-bottom-6" if group else "govuk-!-margin-bottom-4"
+            html.append(f'\n    <div class="{margin}">\n        ')
+            if group:
+                html.append(
+                    "\n            "
+                    f'<h3 class="govuk-heading-m">{_render_value(group)}</h3>'
+                    "\n        "
+                )
+            html.append('\n        <div class="govuk-checkboxes">\n            ')
+            for option in options:
+                checked = "checked" if option["selected"] else ""
+                html.append(
+                    '\n                <div class="govuk-checkboxes__item">'
+                    "\n                    "
+                    f'<input {_render_attrs(option["attrs"])}'
+                    ' class="govuk-checkboxes__input"'
+                    f' name="{_render_value(option["name"])}"'
+                    f' type="checkbox" {checked}'
+                    f' value="{_render_value(option["value"])}">'
+                    "\n                    "
+                    '<label class="govuk-label govuk-checkboxes__label"'
+                    f' for="{_render_value(option["attrs"].get("id", ""))}">'
+                    f'\n                        {_render_value(option["label"])}'
+                    "\n                    </label>"
+                    "\n                </div>"
+                    "\n            "
+                )
+            html.append("\n        </div>\n    </div>\n")
+        html.append("\n")
+        return "".join(html)
 
 
-class RadioSelect(forms.RadioSelect):
+class RadioSelect(FastRenderMixin, forms.RadioSelect):
     template_name = "gds/forms/fields/radio_select.html"
+    fast_template_name = template_name
+
+    def render_optgroups(self, widget):
+        html = ['<div class="govuk-radios">\n    ']
+        name = _render_value(widget["name"])
+        for group, options, _ in widget["optgroups"]:
+            html.append("\n        ")
+            if group:
+                html.append(
+                    '\n            <div class="govuk-!-margin-bottom-6">'
+                    "\n                "
+                    f'<h3 class="govuk-heading-m">{_render_value(group)}</h3>'
+                    "\n        "
+                )
+            html.append("\n        ")
+            for option in options:
+                checked = "checked" if option["selected"] else ""
+                html.append(
+                    '\n            <div class="govuk-radios__item">'
+                    "\n                "
+                    f'<input {_render_attrs(option["attrs"])}'
+                    ' class="govuk-radios__input"'
+                    f' name="{name}"'
+                    f' type="radio" {checked}'
+                    f' value="{_render_value(option["value"])}">'
+                    "\n                "
+                    '<label class="govuk-label govuk-radios__label"'
+                    f' for="{_render_value(option["attrs"].get("id", ""))}">'
+                    f'\n                    {_render_value(option["label"])}'
+                    "\n                </label>"
+                    "\n            </div>"
+                    "\n        "
+                )
+            html.append("\n        ")
+            if group:
+                html.append("\n            </div>\n        ")
+            html.append("\n    ")
+        html.append("\n</div>\n")
+        return "".join(html)
+
+
+class PrerenderedCheckboxSelectMultiple(CheckboxSelectMultiple):
+    """Renders the same as `CheckboxSelectMultiple` but only renders its
+    template once per process for each set of choices, which is worthwhile
+    when there are hundreds of them.
+
+    The template is rendered with every option checked and split either side
+    of the places each option is checked, so that the fragments can be joined
+    back together with only the selected options checked.
+    """
+
+    # The attribute Django adds to checked options is swapped for a marker so
+    # that it can't be confused with the template's own "checked"
+    checked_marker = "data-prerendered-checked"
+    replacements = {
+        f" {checked_marker}": (" checked", ""),
+        'type="checkbox" checked': ('type="checkbox" checked', 'type="checkbox" '),
+    }
+    separator = re.compile("({})".format("|".join(map(re.escape, replacements))))
+
+    # The fragments of the most recently rendered sets of choices, the forms
+    # only have a few so this is only reached by dynamic choices
+    max_fragments = 32
+    _fragments = OrderedDict()
+
+    @classmethod
+    def _get_choices_key(cls, choices):
+        # Grouped choices have a list of choices in place of the label
+        return tuple(
+            (
+                (value, cls._get_choices_key(label))
+                if isinstance(label, (list, tuple))
+                else (value, label)
+            )
+            for value, label in choices
+        )
+
+    def _get_fragments(self, name, attrs, renderer):
+        """Returns the option values and the fragments for the widget, or
+        `None` if its choices or attributes can't be used as a cache key.
+        """
+        key = (
+            self.template_name,
+            name,
+            tuple(sorted(self.build_attrs(self.attrs, attrs).items())),
+            self._get_choices_key(self.choices),
+        )
+        try:
+            fragments = self._fragments.get(key)
+        except TypeError:
+            return None
+
+        if fragments is None:
+            fragments = self._prerender(name, attrs, renderer)
+            self._fragments[key] = fragments
+            while len(self._fragments) > self.max_fragments:
+                self._fragments.popitem(last=False)
+        else:
+            self._fragments.move_to_end(key)
+        return fragments
+
+    def _prerender(self, name, attrs, renderer):
+        widget = copy.copy(self)
+        widget.checked_attribute = {self.checked_marker: True}
+
+        values = [
+            str(option["value"])
+            for _, options, _ in widget.optgroups(name, [], attrs)
+            for option in options
+        ]
+        context = widget.get_context(name, values, attrs)
+        html = widget._render(self.template_name, context, renderer)
+
+        parts = self.separator.split(html)
+        separators = parts[1::2]
+        # Anything else that renders the same as being checked would break the
+        # splitting so these choices are always rendered in full
+        if separators != list(self.replacements) * len(values):
+            return values, None
+
+        return values, parts
+
+    def render(self, name, value, attrs=None, renderer=None):
+        fragments = self._get_fragments(name, attrs, renderer)
+        if fragments is None or fragments[1] is None:
+            return super().render(name, value, attrs, renderer)
+        values, parts = fragments
+
+        selected = set(self.format_value(value))
+        # Each option has a separator and the fragment after it per replacement
+        parts_per_option = len(self.replacements) * 2
+
+        html = [parts[0]]
+        for index, option_value in enumerate(values):
+            replacement = 0 if option_value in selected else 1
+            start = 1 + index * parts_per_option
+            end = start + parts_per_option
+            option_parts = parts[start:end]
+            for separator, fragment in zip(option_parts[::2], option_parts[1::2]):
+                html.append(self.replacements[separator][replacement])
+                html.append(fragment)
+
+        return mark_safe("".join(html))
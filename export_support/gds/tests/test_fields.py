@@ -0,0 +1,209 @@
+import pytest
+from django import forms
+from django.utils.safestring import mark_safe
+from django.utils.translation import gettext_lazy
+
+from export_support.core import forms as core_forms
+from export_support.core.consts import MARKETS_MAP, SECTORS_MAP
+
+from ..fields import (
+    CheckboxSelectMultiple,
+    FastRenderMixin,
+    PrerenderedCheckboxSelectMultiple,
+    RadioSelect,
+)
+
+CHOICES = [
+    ("first", "First"),
+    ("second", "Second & <more>"),
+    ("third", "Third"),
+]
+
+
+class CheckboxForm(forms.Form):
+    choices = forms.MultipleChoiceField(
+        choices=CHOICES,
+        required=False,
+        widget=CheckboxSelectMultiple,
+    )
+
+
+class PrerenderedCheckboxForm(forms.Form):
+    choices = forms.MultipleChoiceField(
+        choices=CHOICES,
+        required=False,
+        widget=PrerenderedCheckboxSelectMultiple,
+    )
+
+
+@pytest.mark.parametrize(
+    "selected",
+    [[], ["first"], ["second", "third"], ["first", "second", "third"]],
+)
+def test_prerendered_checkbox_select_multiple(selected):
+    data = {"choices": selected}
+
+    assert str(PrerenderedCheckboxForm(data=data)["choices"]) == str(
+        CheckboxForm(data=data)["choices"]
+    )
+    assert str(PrerenderedCheckboxForm(prefix="step", data=data)["choices"]) == str(
+        CheckboxForm(prefix="step", data=data)["choices"]
+    )
+
+
+def test_prerendered_checkbox_select_multiple_renders_once(mocker):
+    mock_render = mocker.spy(PrerenderedCheckboxSelectMultiple, "_render")
+    PrerenderedCheckboxSelectMultiple._fragments.clear()
+
+    for selected in [[], ["first"], ["second"]]:
+        str(PrerenderedCheckboxForm(data={"choices": selected})["choices"])
+
+    mock_render.assert_called_once()
+
+
+def test_prerendered_checkbox_select_multiple_ambiguous_choices():
+    class Form(forms.Form):
+        choices = forms.MultipleChoiceField(
+            choices=[("checked", 'type="checkbox" checked')],
+            required=False,
+            widget=PrerenderedCheckboxSelectMultiple,
+        )
+
+    class ExpectedForm(forms.Form):
+        choices = forms.MultipleChoiceField(
+            choices=[("checked", 'type="checkbox" checked')],
+            required=False,
+            widget=CheckboxSelectMultiple,
+        )
+
+    assert str(Form(data={"choices": ["checked"]})["choices"]) == str(
+        ExpectedForm(data={"choices": ["checked"]})["choices"]
+    )
+
+
+@pytest.mark.parametrize("selected", [[], ["a"], ["a", "c"]])
+def test_prerendered_checkbox_select_multiple_grouped_choices(selected):
+    choices = [("g", [("a", "A"), ("b", "B")]), ("c", "C")]
+    widget = PrerenderedCheckboxSelectMultiple(choices=choices)
+
+    assert widget.render("choices", selected) == CheckboxSelectMultiple(
+        choices=choices
+    ).render("choices", selected)
+
+
+def test_prerendered_checkbox_select_multiple_unhashable_choices(mocker):
+    mock_prerender = mocker.spy(PrerenderedCheckboxSelectMultiple, "_prerender")
+    choices = [(["unhashable"], "Unhashable")]
+    widget = PrerenderedCheckboxSelectMultiple(choices=choices)
+
+    assert widget.render("choices", []) == CheckboxSelectMultiple(
+        choices=choices
+    ).render("choices", [])
+    mock_prerender.assert_not_called()
+
+
+def test_prerendered_checkbox_select_multiple_max_fragments(mocker):
+    mocker.patch.object(PrerenderedCheckboxSelectMultiple, "max_fragments", 2)
+    PrerenderedCheckboxSelectMultiple._fragments.clear()
+
+    for choices in [CHOICES[:1], CHOICES[:2], CHOICES[:1], CHOICES]:
+        PrerenderedCheckboxSelectMultiple(choices=choices).render("choices", [])
+
+    # the least recently rendered choices are dropped
+    assert [len(key[-1]) for key in PrerenderedCheckboxSelectMultiple._fragments] == [
+        1,
+        3,
+    ]
+
+
+def _render_template(widget, name, value, attrs=None):
+    context = widget.get_context(name, value, attrs)
+    return widget._render(widget.template_name, context)
+
+
+GOLDEN_CHOICES = [
+    ("first", "First"),
+    ("second", "Second & <more>"),
+    ('"quoted"', gettext_lazy("Lazy")),
+    ("safe", mark_safe("<strong>Safe</strong>")),
+    (1, "Integer value"),
+    (
+        "Group & <one>",
+        [("grouped-first", "Grouped first"), ("grouped-second", "Grouped second")],
+    ),
+    ("last", "Last"),
+]
+
+
+@pytest.mark.parametrize("widget_class", [CheckboxSelectMultiple, RadioSelect])
+@pytest.mark.parametrize(
+    "value",
+    [None, [], ["first"], ['"quoted"', "1", "grouped-second"], ["missing"]],
+)
+@pytest.mark.parametrize(
+    "attrs",
+    [
+        None,
+        {"id": "id_choices"},
+        {"id": 'id_"choices"', "required": True, "disabled": False},
+        {"class": "govuk-input--error", "data-count": 3},
+        {"data-safe": mark_safe("<safe>")},
+    ],
+)
+def test_fast_render_golden(widget_class, value, attrs):
+    widget = widget_class(choices=GOLDEN_CHOICES)
+
+    rendered = widget.render("step-choices", value, attrs=attrs)
+    assert rendered == _render_template(widget, "step-choices", value, attrs)
+
+
+@pytest.mark.parametrize(
+    "form_class,field_name,data",
+    [
+        (core_forms.ExportMarketsForm, "markets", {}),
+        (core_forms.ExportMarketsForm, "markets", {"markets": list(MARKETS_MAP)}),
+        (core_forms.SectorsForm, "sectors", {"sectors": list(SECTORS_MAP)[::3]}),
+        (core_forms.EnquirySubjectForm, "enquiry_subject", {"enquiry_subject": ["1"]}),
+        (core_forms.BusinessTypeForm, "business_type", {}),
+        (core_forms.BusinessTypeForm, "business_type", {"business_type": "3"}),
+        (
+            core_forms.BusinessAdditionalInformationForm,
+            "positivity_for_growth",
+            {"positivity_for_growth": "1"},
+        ),
+    ],
+)
+def test_fast_render_golden_forms(form_class, field_name, data):
+    form = form_class(prefix="step", data={f"step-{field_name}": data.get(field_name)})
+    field = form[field_name]
+    widget = field.field.widget
+    if isinstance(widget, PrerenderedCheckboxSelectMultiple):
+        widget = CheckboxSelectMultiple(choices=widget.choices)
+    assert isinstance(widget, FastRenderMixin)
+
+    attrs = field.build_widget_attrs({"id": field.auto_id})
+    rendered = widget.render(field.html_name, field.value(), attrs=attrs)
+    assert rendered == _render_template(widget, field.html_name, field.value(), attrs)
+
+
+def test_fast_render_other_template(mocker):
+    class Widget(CheckboxSelectMultiple):
+        template_name = "django/forms/widgets/checkbox_select.html"
+
+    mock_render_optgroups = mocker.spy(Widget, "render_optgroups")
+
+    widget = Widget(choices=CHOICES)
+    assert widget.render("choices", ["first"]) == _render_template(
+        widget, "choices", ["first"]
+    )
+    mock_render_optgroups.assert_not_called()
+
+
+def test_fast_render_without_render_optgroups():
+    class Widget(FastRenderMixin, forms.CheckboxSelectMultiple):
+        fast_template_name = forms.CheckboxSelectMultiple.template_name
+
+    widget = Widget(choices=CHOICES)
+    assert widget.render("choices", ["first"]) == _render_template(
+        widget, "choices", ["first"]
+    )
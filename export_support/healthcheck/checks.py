@@ -0,0 +1,141 @@
+import logging
+import os
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from export_support.companies.search import _search_companies_house_api
+from export_support.core import forms_api
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "healthcheck"
+
+
+class HealthCheckError(Exception):
+    pass
+
+
+class CheckDirectoryFormsApi:
+    name = "directory-forms-api"
+
+    def __call__(self):
+        response = forms_api.session.get(
+            settings.DIRECTORY_FORMS_API_HEALTHCHECK_URL,
+            timeout=forms_api.get_timeout(),
+        )
+        try:
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise HealthCheckError("Directory forms API healthcheck failed") from e
+
+
+class CheckCompaniesHouseApi:
+    name = "companies-house"
+
+    def __call__(self):
+        response = _search_companies_house_api("test", 0)
+        try:
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise HealthCheckError("Companies API healthcheck failed") from e
+
+
+CHECKS = [CheckDirectoryFormsApi(), CheckCompaniesHouseApi()]
+
+# The results of this worker's checks when they aren't shared through the cache
+_local_results = {}
+
+
+def _get_key(name):
+    return f"{CACHE_KEY_PREFIX}:{name}"
+
+
+def get_result(check):
+    """Returns the last result of `check`, or None if it hasn't run yet."""
+    if settings.HEALTHCHECK_CLUSTER_WIDE:
+        return cache.get(_get_key(check.name))
+    return _local_results.get(check.name)
+
+
+def run_check(check):
+    start = time.time()
+    try:
+        check()
+    except Exception as e:
+        logger.warning("%s healthcheck failed", check.name, exc_info=True)
+        error = str(e)
+    else:
+        error = None
+
+    result = {
+        "ok": error is None,
+        "error": error,
+        "checked_at": start,
+        "duration": time.time() - start,
+    }
+    if settings.HEALTHCHECK_CLUSTER_WIDE:
+        cache.set(_get_key(check.name), result, timeout=None)
+    else:
+        _local_results[check.name] = result
+    return result
+
+
+def refresh_checks():
+    """Runs the checks that are due. When the results are shared only one
+    worker in the cluster runs each check per interval.
+    """
+    for check in CHECKS:
+        if settings.HEALTHCHECK_CLUSTER_WIDE and not cache.add(
+            _get_key(f"{check.name}:lock"),
+            True,
+            timeout=settings.HEALTHCHECK_REFRESH_INTERVAL,
+        ):
+            continue
+        run_check(check)
+
+
+class HealthCheckScheduler:
+    """Refreshes the healthchecks every HEALTHCHECK_REFRESH_INTERVAL seconds
+    from a background thread, which is a greenlet when gevent has patched
+    threading.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.pid = None
+
+    def start(self):
+        # Started in each worker, as a thread started before gunicorn forks
+        # its workers wouldn't be running in them
+        pid = os.getpid()
+        if self.pid == pid:
+            return
+        with self.lock:
+            if self.pid == pid:
+                return
+            self.pid = pid
+            self.stopped.clear()
+            self.thread = threading.Thread(
+                target=self._run, name="healthcheck", daemon=True
+            )
+            self.thread.start()
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                refresh_checks()
+            except Exception:
+                logger.exception("Failed to refresh the healthchecks")
+            self.stopped.wait(settings.HEALTHCHECK_REFRESH_INTERVAL)
+
+    def stop(self):
+        self.stopped.set()
+
+
+scheduler = HealthCheckScheduler()
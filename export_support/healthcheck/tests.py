@@ -1,7 +1,9 @@
 import pytest
+from django.core.cache import cache
 from django.urls import reverse
 from requests_mock import ANY as ANY_URL
 
+from .checks import _local_results, get_result, refresh_checks, run_check
 from .views import HealthCheckError
 
 
@@ -32,6 +34,7 @@ def test_healthcheck_success(client, settings, mocker, requests_mock):
         f"""<pingdom_http_custom_check>
     <status>OK</status>
     <response_time>{now - start_time}</response_time>
+    <circuit_state>closed</circuit_state>
 </pingdom_http_custom_check>
 """.encode(
             "utf-8"
@@ -69,3 +72,83 @@ def test_healthcheck_companies_house_failure(client, requests_mock):
     url = reverse("healthcheck:companies-house")
     with pytest.raises(HealthCheckError):
         client.get(url)
+
+
+@pytest.fixture
+def cached_healthchecks(settings, mocker):
+    settings.HEALTHCHECK_REFRESH_INTERVAL = 60
+    settings.HEALTHCHECK_MAX_AGE = 180
+    settings.HEALTHCHECK_CLUSTER_WIDE = True
+    mocker.patch("export_support.healthcheck.views.scheduler")
+    cache.clear()
+    yield
+    cache.clear()
+    _local_results.clear()
+
+
+@pytest.mark.usefixtures("cached_healthchecks")
+def test_healthcheck_serves_cached_result(client, requests_mock):
+    requests_mock.post(ANY_URL)
+    companies_house_mock = requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies"
+    )
+
+    url = reverse("healthcheck:companies-house")
+    response = client.get(url)
+    assert response.status_code == 200
+    assert b"<age>" in response.content
+    assert companies_house_mock.call_count == 1
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert companies_house_mock.call_count == 1
+
+
+@pytest.mark.usefixtures("cached_healthchecks")
+def test_healthcheck_cached_failure(client, requests_mock):
+    requests_mock.post(ANY_URL)
+    companies_house_mock = requests_mock.get(
+        "https://api.companieshouse.gov.uk/search/companies", status_code=403
+    )
+
+    refresh_checks()
+    assert companies_house_mock.call_count == 1
+
+    url = reverse("healthcheck:companies-house")
+    with pytest.raises(HealthCheckError, match="Companies API healthcheck failed"):
+        client.get(url)
+    assert companies_house_mock.call_count == 1
+
+
+@pytest.mark.usefixtures("cached_healthchecks")
+def test_healthcheck_stale_result(client, settings, mocker):
+    mock_check = mocker.Mock(name="directory-forms-api")
+    mock_check.name = "directory-forms-api"
+    result = run_check(mock_check)
+    assert result["ok"]
+
+    settings.HEALTHCHECK_MAX_AGE = 10
+    mock_view_time = mocker.patch("export_support.healthcheck.views.time")
+    mock_view_time.time.return_value = result["checked_at"] + 11
+    url = reverse("healthcheck:healthcheck")
+    with pytest.raises(HealthCheckError, match="11s old"):
+        client.get(url)
+
+
+@pytest.mark.parametrize("cluster_wide,expected_calls", [(True, 1), (False, 2)])
+@pytest.mark.usefixtures("cached_healthchecks")
+def test_refresh_checks(settings, mocker, cluster_wide, expected_calls):
+    settings.HEALTHCHECK_CLUSTER_WIDE = cluster_wide
+    mock_checks = [mocker.Mock(), mocker.Mock()]
+    mock_checks[0].name = "first"
+    mock_checks[1].name = "second"
+    mock_checks[1].side_effect = HealthCheckError("Second healthcheck failed")
+    mocker.patch("export_support.healthcheck.checks.CHECKS", mock_checks)
+
+    # Once cluster-wide the second refresh within the interval is skipped
+    refresh_checks()
+    refresh_checks()
+
+    assert [check.call_count for check in mock_checks] == [expected_calls] * 2
+    assert get_result(mock_checks[0])["ok"]
+    assert get_result(mock_checks[1])["error"] == "Second healthcheck failed"
@@ -1,32 +1,18 @@
 import time
 
-import requests
 from django.conf import settings
 from django.views.generic import TemplateView
 
-from export_support.companies.search import _search_companies_house_api
+from export_support.companies.circuit_breaker import get_state
 
-
-class HealthCheckError(Exception):
-    pass
-
-
-class CheckDirectoryFormsApi:
-    def __call__(self):
-        response = requests.get(settings.DIRECTORY_FORMS_API_HEALTHCHECK_URL)
-        try:
-            response.raise_for_status()
-        except requests.exceptions.RequestException as e:
-            raise HealthCheckError("Directory forms API healthcheck failed") from e
-
-
-class CheckCompaniesHouseApi:
-    def __call__(self):
-        response = _search_companies_house_api("test", 0)
-        try:
-            response.raise_for_status()
-        except requests.exceptions.RequestException as e:
-            raise HealthCheckError("Companies API healthcheck failed") from e
+from .checks import (
+    CheckCompaniesHouseApi,
+    CheckDirectoryFormsApi,
+    HealthCheckError,
+    get_result,
+    run_check,
+    scheduler,
+)
 
 
 class BaseHealthCheckView(TemplateView):
@@ -34,9 +20,28 @@ class BaseHealthCheckView(TemplateView):
     template_name = "healthcheck/healthcheck.xml"
     check = None
 
+    def run_check(self):
+        if not settings.HEALTHCHECK_REFRESH_INTERVAL:
+            self.check()
+            return None
+
+        # Serves the result of the last check run in the background rather
+        # than calling the upstream API on every probe
+        scheduler.start()
+        result = get_result(self.check) or run_check(self.check)
+
+        age = time.time() - result["checked_at"]
+        if age > settings.HEALTHCHECK_MAX_AGE:
+            raise HealthCheckError(
+                f"{self.check.name} healthcheck result is {age:.0f}s old"
+            )
+        if not result["ok"]:
+            raise HealthCheckError(result["error"])
+        return age
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        self.check()
+        context["age"] = self.run_check()
         context["status"] = "OK"
         # nearest approximation of a response time
         context["response_time"] = time.time() - self.request.start_time
@@ -46,6 +51,11 @@ class BaseHealthCheckView(TemplateView):
 class CompaniesHouseHealthCheckView(BaseHealthCheckView):
     check = CheckCompaniesHouseApi()
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["circuit_state"] = get_state()
+        return context
+
 
 class DirectoryFormsHealthCheckView(BaseHealthCheckView):
     check = CheckDirectoryFormsApi()
@@ -56,6 +56,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "export_support.core",
+    "export_support.companies",
     "export_support.gds",
     "export_support.cookies",
     "export_support.healthcheck",
@@ -73,7 +74,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "django_ga_measurement_protocol.middleware.page_view_tracking_middleware",
+    "export_support.core.middleware.page_view_tracking_middleware",
     "export_support.core.middleware.no_index_middleware",
     "export_support.core.middleware.no_cache_middleware",
     "export_support.healthcheck.middleware.HealthCheckMiddleware",
@@ -129,8 +130,17 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # Templates are compiled once per worker, see warm_up_templates
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
+            ],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -255,6 +265,17 @@ SESSION_COOKIE_HTTPONLY = True
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 SESSION_COOKIE_SAMESITE = "Strict"
 
+# How the enquiry wizards keep the data for each step. In
+# export_support.core.wizard_storage CompactSessionStorage makes sessions
+# smaller, RedisHashStorage keeps each wizard in its own Redis hash instead and
+# EncryptedCookieStorage keeps it in a cookie unless it is too big for one
+ENQUIRY_WIZARD_STORAGE = env.str(
+    "ENQUIRY_WIZARD_STORAGE", "formtools.wizard.storage.session.SessionStorage"
+)
+# The most compressed wizard data kept in a cookie before it is kept in Redis,
+# allowing for the encryption overhead within the 4KB browsers allow per cookie
+ENQUIRY_WIZARD_COOKIE_MAX_SIZE = env.int("ENQUIRY_WIZARD_COOKIE_MAX_SIZE", 2048)
+
 CSRF_COOKIE_HTTPONLY = True
 CSRF_COOKIE_AGE = 31 * 24 * 60 * 60
 
@@ -278,7 +299,20 @@ FORM_URL = env.str("FORM_URL")
 DIRECTORY_FORMS_API_BASE_URL = env.str("DIRECTORY_FORMS_API_BASE_URL")
 DIRECTORY_FORMS_API_API_KEY = env.str("DIRECTORY_FORMS_API_API_KEY")
 DIRECTORY_FORMS_API_SENDER_ID = env.str("DIRECTORY_FORMS_API_SENDER_ID")
-DIRECTORY_FORMS_API_DEFAULT_TIMEOUT = 10
+DIRECTORY_FORMS_API_DEFAULT_TIMEOUT = env.float(
+    "DIRECTORY_FORMS_API_DEFAULT_TIMEOUT", 10
+)
+DIRECTORY_FORMS_API_CONNECT_TIMEOUT = env.float(
+    "DIRECTORY_FORMS_API_CONNECT_TIMEOUT", 3.05
+)
+DIRECTORY_FORMS_API_POOL_MAXSIZE = env.int("DIRECTORY_FORMS_API_POOL_MAXSIZE", 10)
+DIRECTORY_FORMS_API_POOL_BLOCK = env.bool("DIRECTORY_FORMS_API_POOL_BLOCK", False)
+# Requests that fail to connect, and idempotent requests that fail after
+# connecting, are retried this many times with exponential backoff
+DIRECTORY_FORMS_API_RETRIES = env.int("DIRECTORY_FORMS_API_RETRIES", 2)
+DIRECTORY_FORMS_API_RETRY_BACKOFF_FACTOR = env.float(
+    "DIRECTORY_FORMS_API_RETRY_BACKOFF_FACTOR", 0.2
+)
 DIRECTORY_CLIENT_CORE_CACHE_EXPIRE_SECONDS = env.int(
     "DIRECTORY_CLIENT_CORE_CACHE_EXPIRE_SECONDS"
 )
@@ -286,14 +320,105 @@ DIRECTORY_CLIENT_CORE_CACHE_LOG_THROTTLING_SECONDS = env.int(
     "DIRECTORY_CLIENT_CORE_CACHE_LOG_THROTTLING_SECONDS"
 )
 DIRECTORY_FORMS_API_HEALTHCHECK_URL = env.str("DIRECTORY_FORMS_API_HEALTHCHECK_URL")
+# The healthchecks are run in the background every this many seconds and the
+# endpoints serve the last result, which is unhealthy once it is older than the
+# max age. An interval of 0 calls the upstream APIs on every request.
+HEALTHCHECK_REFRESH_INTERVAL = env.int("HEALTHCHECK_REFRESH_INTERVAL", 0)
+HEALTHCHECK_MAX_AGE = env.int("HEALTHCHECK_MAX_AGE", 180)
+# Shares the results through the cache so that each check only runs once per
+# interval across the cluster, rather than once in every worker
+HEALTHCHECK_CLUSTER_WIDE = env.bool("HEALTHCHECK_CLUSTER_WIDE", True)
 
 ZENDESK_SERVICE_NAME = env.str("ZENDESK_SERVICE_NAME")
 ZENDESK_SUBDOMAIN = env.str("ZENDESK_SUBDOMAIN")
 ZENDESK_CUSTOM_FIELD_MAPPING = env.dict("ZENDESK_CUSTOM_FIELD_MAPPING", default=dict())
+# Identical submissions from the same session within this many seconds are
+# only sent once. A TTL of 0 sends every submission.
+ZENDESK_DUPLICATE_SUBMISSION_TTL = env.int("ZENDESK_DUPLICATE_SUBMISSION_TTL", 300)
+# Identical submissions made whilst one is being sent are also ignored, for up
+# to this many seconds in case the worker sending it dies
+ZENDESK_DUPLICATE_SUBMISSION_IN_FLIGHT_TTL = env.int(
+    "ZENDESK_DUPLICATE_SUBMISSION_IN_FLIGHT_TTL", 30
+)
+# Sends the Zendesk submissions from the zendesk_outbox_worker command rather
+# than whilst the user waits for the last step of the wizards
+ZENDESK_OUTBOX_ENABLED = env.bool("ZENDESK_OUTBOX_ENABLED", False)
+ZENDESK_OUTBOX_CONCURRENCY = env.int("ZENDESK_OUTBOX_CONCURRENCY", 10)
+# Submissions that still fail after this many attempts are moved to the dead
+# letters, which the zendesk_outbox_replay command moves back into the outbox
+ZENDESK_OUTBOX_MAX_ATTEMPTS = env.int("ZENDESK_OUTBOX_MAX_ATTEMPTS", 8)
+# Retries back off exponentially from the base delay up to the max, in seconds
+ZENDESK_OUTBOX_RETRY_BASE_DELAY = env.float("ZENDESK_OUTBOX_RETRY_BASE_DELAY", 2)
+ZENDESK_OUTBOX_RETRY_MAX_DELAY = env.float("ZENDESK_OUTBOX_RETRY_MAX_DELAY", 600)
+# How long sent submissions are remembered so that they aren't sent again
+ZENDESK_OUTBOX_SENT_TTL = env.int("ZENDESK_OUTBOX_SENT_TTL", 7 * 24 * 60 * 60)
+# The submissions of a worker that hasn't been heard from for this many seconds
+# are moved back into the outbox for the other workers to send
+ZENDESK_OUTBOX_HEARTBEAT_TIMEOUT = env.int("ZENDESK_OUTBOX_HEARTBEAT_TIMEOUT", 60)
 
 GA_MEASUREMENT_PROTOCOL_UA = env.str("GA_MEASUREMENT_PROTOCOL_UA")
 GA_MEASUREMENT_PROTOCOL_TRACK_EVENTS = env.str(
     "GA_MEASUREMENT_PROTOCOL_TRACK_EVENTS", False
 )
+# Page views are queued and sent in batches from a background thread, the
+# oldest are dropped once the queue is full
+GA_MEASUREMENT_PROTOCOL_QUEUE_SIZE = env.int("GA_MEASUREMENT_PROTOCOL_QUEUE_SIZE", 1000)
+GA_MEASUREMENT_PROTOCOL_FLUSH_INTERVAL = env.float(
+    "GA_MEASUREMENT_PROTOCOL_FLUSH_INTERVAL", 5
+)
+GA_MEASUREMENT_PROTOCOL_TIMEOUT = env.float("GA_MEASUREMENT_PROTOCOL_TIMEOUT", 5)
 
 COMPANIES_HOUSE_TOKEN = env.str("COMPANIES_HOUSE_TOKEN")
+COMPANIES_HOUSE_CONNECT_TIMEOUT = env.float("COMPANIES_HOUSE_CONNECT_TIMEOUT", 3.05)
+COMPANIES_HOUSE_READ_TIMEOUT = env.float("COMPANIES_HOUSE_READ_TIMEOUT", 5)
+COMPANIES_HOUSE_POOL_MAXSIZE = env.int("COMPANIES_HOUSE_POOL_MAXSIZE", 20)
+COMPANIES_HOUSE_POOL_BLOCK = env.bool("COMPANIES_HOUSE_POOL_BLOCK", False)
+# Searches fail fast once there have been this many failed requests to Companies
+# House within the failure window, until a probe request succeeds after the reset
+# timeout. A threshold of 0 disables the circuit breaker.
+COMPANIES_HOUSE_CIRCUIT_FAILURE_THRESHOLD = env.int(
+    "COMPANIES_HOUSE_CIRCUIT_FAILURE_THRESHOLD", 5
+)
+COMPANIES_HOUSE_CIRCUIT_FAILURE_WINDOW = env.int(
+    "COMPANIES_HOUSE_CIRCUIT_FAILURE_WINDOW", 60
+)
+COMPANIES_HOUSE_CIRCUIT_RESET_TIMEOUT = env.int(
+    "COMPANIES_HOUSE_CIRCUIT_RESET_TIMEOUT", 30
+)
+# The number of result pages requested from Companies House at the same time,
+# anything above 1 fetches the following pages speculatively.
+COMPANIES_HOUSE_PAGE_FETCH_CONCURRENCY = env.int(
+    "COMPANIES_HOUSE_PAGE_FETCH_CONCURRENCY", 1
+)
+# The most result pages fetched for a search. Fetching stops once there are
+# enough results after filtering, which three pages manage unless most of each
+# page is filtered out, and results are ranked before being returned so exact
+# matches further down are still shown first.
+COMPANIES_HOUSE_SEARCH_MAX_PAGES = env.int("COMPANIES_HOUSE_SEARCH_MAX_PAGES", 3)
+# Search results are cached for the TTL and then served for up to the stale TTL
+# longer whilst they are refreshed in the background. A TTL of 0 disables caching.
+COMPANIES_HOUSE_SEARCH_CACHE_TTL = env.int("COMPANIES_HOUSE_SEARCH_CACHE_TTL", 3600)
+COMPANIES_HOUSE_SEARCH_NEGATIVE_CACHE_TTL = env.int(
+    "COMPANIES_HOUSE_SEARCH_NEGATIVE_CACHE_TTL", 300
+)
+COMPANIES_HOUSE_SEARCH_CACHE_STALE_TTL = env.int(
+    "COMPANIES_HOUSE_SEARCH_CACHE_STALE_TTL", 3600
+)
+# How long a worker waits for another worker to fetch the same query before
+# fetching it itself
+COMPANIES_HOUSE_SEARCH_LOCK_WAIT = env.float("COMPANIES_HOUSE_SEARCH_LOCK_WAIT", 3)
+# Answers longer queries by filtering the cached results of shorter ones
+COMPANIES_HOUSE_SEARCH_INCREMENTAL = env.bool(
+    "COMPANIES_HOUSE_SEARCH_INCREMENTAL", False
+)
+# Either "api" to search the live Companies House API or "snapshot" to search
+# the local index built by the build_companies_index command, optionally
+# falling back to the API when the index has no results or is unavailable
+COMPANIES_HOUSE_SEARCH_BACKEND = env.str("COMPANIES_HOUSE_SEARCH_BACKEND", "api")
+COMPANIES_HOUSE_SNAPSHOT_PATH = env.str(
+    "COMPANIES_HOUSE_SNAPSHOT_PATH",
+    str(BASE_DIR / "build" / "companies_house_snapshot.sqlite3"),
+)
+COMPANIES_HOUSE_SNAPSHOT_API_FALLBACK = env.bool(
+    "COMPANIES_HOUSE_SNAPSHOT_API_FALLBACK", True
+)
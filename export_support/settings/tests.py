@@ -1 +1,9 @@
 from .base import *  # noqa: F403,F401
+
+# Each test mocks its own Companies House responses so these mustn't be shared
+# between tests through the cache
+COMPANIES_HOUSE_SEARCH_CACHE_TTL = 0
+# Likewise failures in one test mustn't open the circuit for the others
+COMPANIES_HOUSE_CIRCUIT_FAILURE_THRESHOLD = 0
+# Nor must identical submissions in different tests be ignored as duplicates
+ZENDESK_DUPLICATE_SUBMISSION_TTL = 0
@@ -1,3 +1,24 @@
 import gunicorn
 
 gunicorn.SERVER = gunicorn.SERVER_SOFTWARE = "intentionally-undisclosed-fn-2187"
+
+
+def post_worker_init(worker):
+    # Runs once the worker has loaded Django, before it accepts any requests
+    from export_support.core.warm_up import warm_up_templates
+
+    warm_up_templates()
+
+    from django.conf import settings
+
+    if settings.HEALTHCHECK_REFRESH_INTERVAL:
+        from export_support.healthcheck.checks import scheduler
+
+        scheduler.start()
+
+
+def worker_exit(server, worker):
+    # Sends the page views still waiting to be sent to Google Analytics
+    from export_support.core.analytics import dispatcher
+
+    dispatcher.shutdown()